@@ -1,68 +1,197 @@
 """Pytest configuration and fixtures."""
 
+import itertools
+import json
+from collections.abc import Callable, Iterator
 from pathlib import Path
 from typing import Any
+from unittest.mock import AsyncMock, MagicMock
 
 import pytest
+from click.testing import CliRunner
 
+from wormhole.daemon import WormholeDaemon
 from wormhole.persistence import EventPersistence, SessionPersistence
 
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+
+def _load_fixture(name: str) -> dict[str, Any]:
+    return json.loads((FIXTURES_DIR / f"{name}.json").read_text())
+
+
+# Sample SDK messages, loaded once per run. Tests treat these as read-only.
+_SAMPLE_SYSTEM_INIT = _load_fixture("system_init")
+_SAMPLE_ASSISTANT_MESSAGE = _load_fixture("assistant_message")
+_SAMPLE_RESULT = _load_fixture("result")
+
+
+PersistenceFactory = Callable[[], tuple[EventPersistence, SessionPersistence]]
+DaemonFactory = Callable[..., WormholeDaemon]
+SubdirFactory = Callable[[int], list[Path]]
+
+
+@pytest.fixture(scope="session")
+def cli_runner() -> CliRunner:
+    """Shared Click runner; each invoke() gets its own isolated I/O."""
+    return CliRunner()
+
+
+class ResponseQueue:
+    """Stand-in for send_control_request_sync that replays queued responses."""
+
+    def __init__(self) -> None:
+        self.resp: list[Any] = []
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        return self.resp.pop(0)
+
+
+@pytest.fixture
+def sync_send(monkeypatch: pytest.MonkeyPatch) -> ResponseQueue:
+    """Stub the CLI's daemon IPC; tests append the responses the daemon would send."""
+    queue = ResponseQueue()
+    monkeypatch.setattr("wormhole.cli.send_control_request_sync", queue)
+    monkeypatch.setattr("wormhole.cli.ensure_daemon_running", lambda silent=False: True)
+    monkeypatch.setattr("wormhole.cli._daemon_alive", False)
+    return queue
+
+
+@pytest.fixture(scope="module")
+def _sdk_client_template() -> AsyncMock:
+    """One AsyncMock SDK client per module; see mock_sdk_client."""
+    return AsyncMock()
+
+
+@pytest.fixture
+def mock_sdk_client(_sdk_client_template: AsyncMock) -> AsyncMock:
+    """Stand-in ClaudeSDKClient with call history cleared for each test.
+
+    Tests must not configure return values or side effects on it, since
+    those survive reset_mock() and would leak into later tests.
+    """
+    _sdk_client_template.reset_mock()
+    return _sdk_client_template
+
+
+@pytest.fixture
+def mock_zeroconf(monkeypatch: pytest.MonkeyPatch) -> tuple[MagicMock, MagicMock]:
+    """Replace zeroconf's Zeroconf and ServiceInfo; returns (zeroconf, service_info)."""
+    zc = MagicMock()
+    si = MagicMock()
+    si.name = "test._wormhole._tcp."
+    # Registration verification finds our own service
+    zc.get_service_info.return_value = si
+    monkeypatch.setattr("zeroconf.Zeroconf", lambda *args, **kwargs: zc)
+    monkeypatch.setattr("zeroconf.ServiceInfo", lambda *args, **kwargs: si)
+    return zc, si
+
+
+@pytest.fixture(scope="session")
+def persistence_factory(tmp_path_factory: pytest.TempPathFactory) -> PersistenceFactory:
+    """Return a callable that builds a fresh, isolated persistence pair."""
+
+    def make() -> tuple[EventPersistence, SessionPersistence]:
+        base = tmp_path_factory.mktemp("persistence")
+        return (
+            EventPersistence(base_dir=base / "events"),
+            SessionPersistence(path=base / "sessions.json"),
+        )
+
+    return make
+
 
 @pytest.fixture
-def event_persistence(tmp_path: Path) -> EventPersistence:
+def persistence(
+    persistence_factory: PersistenceFactory,
+) -> tuple[EventPersistence, SessionPersistence]:
+    """Create the persistence pair shared by a single test."""
+    return persistence_factory()
+
+
+@pytest.fixture
+def event_persistence(
+    persistence: tuple[EventPersistence, SessionPersistence],
+) -> EventPersistence:
     """Create isolated event persistence for each test."""
-    return EventPersistence(base_dir=tmp_path / "events")
+    return persistence[0]
 
 
 @pytest.fixture
-def session_persistence(tmp_path: Path) -> SessionPersistence:
+def session_persistence(
+    persistence: tuple[EventPersistence, SessionPersistence],
+) -> SessionPersistence:
     """Create isolated session persistence for each test."""
-    return SessionPersistence(path=tmp_path / "sessions.json")
+    return persistence[1]
+
+
+@pytest.fixture
+def daemon_factory(
+    event_persistence: EventPersistence,
+    session_persistence: SessionPersistence,
+) -> DaemonFactory:
+    """Return a callable that builds a daemon wired to the test's persistence."""
+
+    def make(**kwargs: Any) -> WormholeDaemon:
+        return WormholeDaemon(
+            event_persistence=event_persistence,
+            session_persistence=session_persistence,
+            **kwargs,
+        )
+
+    return make
+
+
+@pytest.fixture
+def daemon(daemon_factory: DaemonFactory) -> Iterator[WormholeDaemon]:
+    """Create a daemon on the default port with isolated persistence."""
+    d = daemon_factory(port=7117)
+    yield d
+    # Stop writer tasks for clients the test registered but never disconnected
+    for ws in list(d._outboxes):
+        d._drop_client(ws)
+
+
+@pytest.fixture
+def resolved_tmp(tmp_path: Path) -> Path:
+    """tmp_path with symlinks resolved, matching how the daemon keys directories."""
+    return tmp_path.resolve()
 
 
 @pytest.fixture
+def subdirs(resolved_tmp: Path) -> SubdirFactory:
+    """Return a callable that creates ``n`` fresh directories under resolved_tmp."""
+    counter = itertools.count()
+
+    def make(n: int) -> list[Path]:
+        dirs = [resolved_tmp / f"project{next(counter)}" for _ in range(n)]
+        for d in dirs:
+            d.mkdir()
+        return dirs
+
+    return make
+
+
+@pytest.fixture
+def two_subdirs(subdirs: SubdirFactory) -> tuple[Path, Path]:
+    """Create two sibling project directories for multi-session tests."""
+    dir_a, dir_b = subdirs(2)
+    return dir_a, dir_b
+
+
+@pytest.fixture(scope="session")
 def sample_system_init() -> dict[str, Any]:
     """Sample system init message from SDK."""
-    return {
-        "type": "system",
-        "subtype": "init",
-        "session_id": "550e8400-e29b-41d4-a716-446655440000",
-        "cwd": "/home/user/project",
-        "tools": ["Bash", "Read", "Write", "Edit", "Glob", "Grep"],
-        "model": "claude-sonnet-4-5",
-        "permission_mode": "default",
-    }
+    return _SAMPLE_SYSTEM_INIT
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_assistant_message() -> dict[str, Any]:
     """Sample assistant message from SDK."""
-    return {
-        "type": "assistant",
-        "message": {
-            "content": [
-                {"type": "text", "text": "I'll create the authentication module."},
-                {
-                    "type": "tool_use",
-                    "id": "toolu_01ABC123",
-                    "name": "Write",
-                    "input": {
-                        "file_path": "auth.py",
-                        "content": "def authenticate(user, password):\n    pass\n",
-                    },
-                },
-            ]
-        },
-    }
+    return _SAMPLE_ASSISTANT_MESSAGE
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_result() -> dict[str, Any]:
     """Sample result message from SDK."""
-    return {
-        "type": "result",
-        "subtype": "success",
-        "session_id": "550e8400-e29b-41d4-a716-446655440000",
-        "total_cost_usd": 0.0234,
-        "usage": {"input_tokens": 1234, "output_tokens": 567},
-    }
+    return _SAMPLE_RESULT
@@ -1,206 +1,507 @@
 """Tests for CLI commands."""
 
+import fcntl
+import itertools
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
 from pathlib import Path
-from unittest.mock import patch
+from typing import Any
 
+import pytest
 from click.testing import CliRunner
-
-from wormhole.cli import generate_session_name, main
+from conftest import ResponseQueue
+
+import wormhole.cli
+from wormhole.cli import (
+    _backoff_delays,
+    _event_loop_factory,
+    _run_probe,
+    _screen_session_exists,
+    _spawn_detached,
+    _tail_lines,
+    _wait_for_exit,
+    claude_args_to_options,
+    find_pids_on_port,
+    generate_session_name,
+    is_daemon_running,
+    kill_process_on_port,
+    main,
+    read_pid_file,
+    wait_for_socket,
+    write_pid_file,
+)
 from wormhole.control import (
     ErrorResponse,
     SessionInfoResponse,
     SessionListResponse,
     StatusResponse,
     SuccessResponse,
+    close_control_connections,
 )
 
 
-class TestGenerateSessionName:
-    """Tests for session name generation."""
+# Tests for session name generation.
+def test_generate_session_name_uses_directory_name(tmp_path: Path) -> None:
+    name = generate_session_name(tmp_path)
+    assert tmp_path.name in name
+
+
+def test_generate_session_name_includes_hash_suffix(tmp_path: Path) -> None:
+    name = generate_session_name(tmp_path)
+    # Format is name-hash
+    parts = name.rsplit("-", 1)
+    assert len(parts) == 2
+    assert len(parts[1]) == 4  # 4 char hash
+
+
+def test_generate_session_name_is_stable() -> None:
+    # Existing users and scripts rely on the same directory keeping its name
+    assert generate_session_name(Path("/home/user/projects/myapp")) == "myapp-58f3"
+
+
+def test_generate_session_name_handles_undecodable_path() -> None:
+    # A directory name that is not valid UTF-8 arrives surrogate-escaped
+    directory = Path(os.fsdecode(b"/tmp/caf\xe9"))
+    assert generate_session_name(directory).startswith(directory.name + "-")
+
+
+# Tests for CLI version command.
+def test_cli_version(cli_runner: CliRunner) -> None:
+    result = cli_runner.invoke(main, ["--version"])
+    assert result.exit_code == 0
+    assert "0.1.0" in result.output
+
+
+# Tests for completion command.
+@pytest.mark.parametrize("shell", ["bash", "zsh", "fish"])
+def test_completion_prints_script(cli_runner: CliRunner, shell: str) -> None:
+    result = cli_runner.invoke(main, ["completion", "--shell", shell])
+
+    assert result.exit_code == 0
+    assert "_WORMHOLE_COMPLETE" in result.output
+
+
+def test_completion_install_adds_source_line_once(
+    cli_runner: CliRunner, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("HOME", str(tmp_path))
+    bashrc = tmp_path / ".bashrc"
+    bashrc.write_text("export EDITOR=vi\n")
+
+    first = cli_runner.invoke(main, ["completion", "--shell", "bash", "--install"])
+    second = cli_runner.invoke(main, ["completion", "--shell", "bash", "--install"])
+
+    assert "Added source line" in first.output
+    assert "already in" in second.output
+    assert bashrc.read_text().count("# Wormhole CLI completion") == 1
+    assert bashrc.read_text().startswith("export EDITOR=vi\n")
+
+
+def test_completion_install_ignores_commented_out_source_line(
+    cli_runner: CliRunner, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("HOME", str(tmp_path))
+    bashrc = tmp_path / ".bashrc"
+    bashrc.write_text(f"# source {tmp_path / '.wormhole-complete.bash'}\n")
+
+    result = cli_runner.invoke(main, ["completion", "--shell", "bash", "--install"])
+
+    assert "Added source line" in result.output
+    assert bashrc.read_text().count("# Wormhole CLI completion") == 1
 
-    def test_uses_directory_name(self, tmp_path: Path) -> None:
-        name = generate_session_name(tmp_path)
-        assert tmp_path.name in name
 
-    def test_includes_hash_suffix(self, tmp_path: Path) -> None:
-        name = generate_session_name(tmp_path)
-        # Format is name-hash
-        parts = name.rsplit("-", 1)
-        assert len(parts) == 2
-        assert len(parts[1]) == 4  # 4 char hash
+# Tests for status command.
+def test_status_daemon_running(cli_runner: CliRunner, sync_send: ResponseQueue) -> None:
+    sync_send.resp.append(
+        StatusResponse(
+            running=True,
+            port=7117,
+            machine_name="testbox",
+            session_count=2,
+            connected_clients=1,
+        )
+    )
 
+    result = cli_runner.invoke(main, ["status"])
 
-class TestCliVersion:
-    """Tests for CLI version command."""
+    assert result.exit_code == 0
+    assert "running" in result.output
+    assert "testbox" in result.output
+    assert "7117" in result.output
+
+
+def test_status_daemon_not_running(cli_runner: CliRunner, sync_send: ResponseQueue) -> None:
+    sync_send.resp.append(
+        ErrorResponse(
+            code="DAEMON_NOT_RUNNING",
+            message="Daemon is not running",
+        )
+    )
+
+    result = cli_runner.invoke(main, ["status"])
+
+    assert result.exit_code == 1
+    assert "not running" in result.output
+
+
+# Tests for list command.
+def test_list_no_sessions(cli_runner: CliRunner, sync_send: ResponseQueue) -> None:
+    sync_send.resp.append(SessionListResponse(sessions=[]))
+
+    result = cli_runner.invoke(main, ["list"])
+
+    assert result.exit_code == 0
+    assert "No active sessions" in result.output
+
+
+def test_list_with_sessions(cli_runner: CliRunner, sync_send: ResponseQueue) -> None:
+    sync_send.resp.append(
+        SessionListResponse(
+            sessions=[
+                SessionInfoResponse(
+                    name="test-session",
+                    directory="/home/user/project",
+                    state="working",
+                    cost_usd=0.05,
+                ),
+            ]
+        )
+    )
+
+    result = cli_runner.invoke(main, ["list"])
+
+    assert result.exit_code == 0
+    assert "test-session" in result.output
+    assert "working" in result.output
+    assert "/home/user/project" in result.output
+
+
+# Tests for open command.
+def test_open_with_name(cli_runner: CliRunner, sync_send: ResponseQueue) -> None:
+    sync_send.resp.append(SuccessResponse(message="Session created"))
+
+    result = cli_runner.invoke(main, ["open", "--name", "my-session"])
+
+    assert result.exit_code == 0
+    assert "my-session" in result.output
+    assert "created" in result.output
+
+
+def test_open_generates_name(
+    cli_runner: CliRunner, sync_send: ResponseQueue, tmp_path: Path
+) -> None:
+    sync_send.resp.append(SuccessResponse(message="Session created"))
+
+    with cli_runner.isolated_filesystem(temp_dir=tmp_path):
+        result = cli_runner.invoke(main, ["open"])
 
-    def test_version(self) -> None:
-        runner = CliRunner()
-        result = runner.invoke(main, ["--version"])
         assert result.exit_code == 0
-        assert "0.1.0" in result.output
+        assert "created" in result.output
 
 
-class TestStatusCommand:
-    """Tests for status command."""
+def test_open_duplicate_directory_error(cli_runner: CliRunner, sync_send: ResponseQueue) -> None:
+    sync_send.resp.append(
+        ErrorResponse(
+            code="SESSION_EXISTS",
+            message="A session already exists in this directory: test-session",
+        )
+    )
 
-    def test_status_daemon_running(self) -> None:
-        runner = CliRunner()
+    result = cli_runner.invoke(main, ["open", "--name", "new-session"])
 
-        with patch("wormhole.cli.send_control_request_sync") as mock:
-            mock.return_value = StatusResponse(
-                running=True,
-                port=7117,
-                machine_name="testbox",
-                session_count=2,
-                connected_clients=1,
-            )
+    assert result.exit_code == 1
+    assert "already exists" in result.output
 
-            result = runner.invoke(main, ["status"])
 
-            assert result.exit_code == 0
-            assert "running" in result.output
-            assert "testbox" in result.output
-            assert "7117" in result.output
+@pytest.mark.parametrize(
+    ("args", "expected"),
+    [
+        ((), {}),
+        (("--model", "opus"), {"model": "opus"}),
+        (("--verbose", "--max-turns", "5"), {"verbose": None, "max_turns": "5"}),
+        (("--model", "opus", "stray", "--verbose"), {"model": "opus", "verbose": None}),
+    ],
+)
+def test_claude_args_to_options(args: tuple[str, ...], expected: dict[str, str | None]) -> None:
+    assert claude_args_to_options(args) == expected
 
-    def test_status_daemon_not_running(self) -> None:
-        runner = CliRunner()
 
-        with patch("wormhole.cli.send_control_request_sync") as mock:
-            mock.return_value = ErrorResponse(
-                code="DAEMON_NOT_RUNNING",
-                message="Daemon is not running",
-            )
+# Tests for close command.
+def test_close_session(cli_runner: CliRunner, sync_send: ResponseQueue) -> None:
+    sync_send.resp.append(SuccessResponse(message="Session closed"))
 
-            result = runner.invoke(main, ["status"])
+    result = cli_runner.invoke(main, ["close", "test-session"])
 
-            assert result.exit_code == 1
-            assert "not running" in result.output
+    assert result.exit_code == 0
+    assert "closed" in result.output
 
 
-class TestListCommand:
-    """Tests for list command."""
+def test_close_nonexistent_session(cli_runner: CliRunner, sync_send: ResponseQueue) -> None:
+    sync_send.resp.append(
+        ErrorResponse(
+            code="SESSION_NOT_FOUND",
+            message="Session not found: nonexistent",
+        )
+    )
 
-    def test_list_no_sessions(self) -> None:
-        runner = CliRunner()
+    result = cli_runner.invoke(main, ["close", "nonexistent"])
+
+    assert result.exit_code == 1
+    assert "not found" in result.output
+
+
+# Tests for waiting on the daemon socket.
+def test_wait_for_socket_wakes_when_socket_appears(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr("wormhole.cli.is_daemon_running", lambda: True)
+    socket_path = tmp_path / "wormhole.sock"
+    timer = threading.Timer(0.05, socket_path.touch)
+    timer.start()
+
+    start = time.monotonic()
+    assert wait_for_socket(socket_path, timeout=5.0) is True
+    assert time.monotonic() - start < 1.0
+    timer.join()
+
+
+def test_backoff_delays_grow_to_cap() -> None:
+    delays = list(itertools.islice(_backoff_delays(0.005, 0.02), 6))
+
+    assert delays[:3] == pytest.approx([0.005, 0.0075, 0.01125])
+    assert delays[-1] == 0.02
+
+
+def test_wait_for_socket_times_out(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr("wormhole.cli.is_daemon_running", lambda: True)
+
+    assert wait_for_socket(tmp_path / "wormhole.sock", timeout=0.05) is False
+
+
+# Tests for the daemon liveness cache.
+@pytest.mark.parametrize("listening", [True, False])
+def test_is_daemon_running_checks_socket_accepts(
+    monkeypatch: pytest.MonkeyPatch, sync_send: ResponseQueue, listening: bool
+) -> None:
+    # Short directory: Unix socket paths are limited to ~100 bytes
+    with tempfile.TemporaryDirectory() as tmp, socket.socket(socket.AF_UNIX) as server:
+        socket_path = Path(tmp) / "wormhole.sock"
+        server.bind(str(socket_path))
+        if listening:
+            server.listen()
+        monkeypatch.setattr("wormhole.control.get_socket_path", lambda: socket_path)
+
+        # Nothing is queued on sync_send, so sending a status request would fail
+        try:
+            assert is_daemon_running() is listening
+        finally:
+            close_control_connections()
+
+
+def test_is_daemon_running_caches_positive_answer(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(wormhole.cli, "_daemon_alive", True)
+    monkeypatch.setattr(wormhole.cli, "daemon_accepting_connections", lambda: False)
+
+    assert is_daemon_running() is True
+
+
+def test_failed_request_clears_daemon_cache(
+    cli_runner: CliRunner, monkeypatch: pytest.MonkeyPatch, sync_send: ResponseQueue
+) -> None:
+    monkeypatch.setattr(wormhole.cli, "_daemon_alive", True)
+    sync_send.resp.append(ErrorResponse(code="DAEMON_NOT_RUNNING", message="Daemon is not running"))
+
+    cli_runner.invoke(main, ["list"])
+
+    assert wormhole.cli._daemon_alive is False
+
+
+# Tests for finding processes on a port.
+@pytest.mark.skipif(sys.platform != "linux", reason="reads /proc")
+def test_find_pids_on_port_finds_own_listener() -> None:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        sock.listen()
+        port = sock.getsockname()[1]
+
+        assert find_pids_on_port(port) == [os.getpid()]
+
+
+@pytest.mark.skipif(sys.platform != "linux", reason="reads /proc")
+def test_find_pids_on_port_ignores_unused_port() -> None:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]  # Bound but not listening
+
+        assert find_pids_on_port(port) == []
+
+
+@pytest.mark.skipif(sys.platform != "linux", reason="reads /proc")
+def test_kill_process_on_port_returns_once_listener_exits() -> None:
+    script = (
+        "import socket, time; s = socket.socket(); s.bind(('127.0.0.1', 0)); s.listen(); "
+        "print(s.getsockname()[1], flush=True); time.sleep(30)"
+    )
+    proc = subprocess.Popen([sys.executable, "-c", script], stdout=subprocess.PIPE, text=True)
+    try:
+        assert proc.stdout is not None
+        port = int(proc.stdout.readline())
+
+        start = time.monotonic()
+        assert kill_process_on_port(port) is True
+        assert time.monotonic() - start < 0.5
+    finally:
+        proc.kill()
+        proc.wait()
+    assert proc.returncode == -signal.SIGTERM
+
+
+# Tests for spawning the background daemon.
+def test_spawn_detached_logs_output_in_new_session(tmp_path: Path) -> None:
+    log_file = tmp_path / "daemon.log"
+
+    script = "import os, sys; print(os.getsid(0) == os.getpid()); print('err', file=sys.stderr)"
+
+    pid = _spawn_detached([sys.executable, "-c", script], log_file)
+    os.waitpid(pid, 0)
+
+    assert log_file.read_text().split() == ["True", "err"]
+
+
+def test_event_loop_factory_falls_back_without_uvloop(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setitem(sys.modules, "uvloop", None)  # makes the import raise ImportError
+
+    assert _event_loop_factory() is None
+
+
+# Tests for reading the tail of the log file.
+@pytest.mark.parametrize(
+    ("content", "lines", "expected"),
+    [
+        (b"a\nb\nc\n", 2, b"b\nc\n"),
+        (b"a\nb\nc", 2, b"b\nc"),
+        (b"a\nb\n", 5, b"a\nb\n"),
+        (b"", 3, b""),
+    ],
+)
+def test_tail_lines(tmp_path: Path, content: bytes, lines: int, expected: bytes) -> None:
+    log_file = tmp_path / "daemon.log"
+    log_file.write_bytes(content)
 
-        with (
-            patch("wormhole.cli.ensure_daemon_running", return_value=True),
-            patch("wormhole.cli.send_control_request_sync") as mock,
-        ):
-            mock.return_value = SessionListResponse(sessions=[])
+    assert _tail_lines(log_file, lines) == expected
 
-            result = runner.invoke(main, ["list"])
 
-            assert result.exit_code == 0
-            assert "No active sessions" in result.output
+# Tests for waiting on the daemon to exit.
+def test_wait_for_exit_returns_when_process_exits() -> None:
+    proc = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(0.05)"])
+    try:
+        assert _wait_for_exit(proc.pid, timeout=5.0) is True
+    finally:
+        proc.wait()
 
-    def test_list_with_sessions(self) -> None:
-        runner = CliRunner()
 
-        with (
-            patch("wormhole.cli.ensure_daemon_running", return_value=True),
-            patch("wormhole.cli.send_control_request_sync") as mock,
-        ):
-            mock.return_value = SessionListResponse(
-                sessions=[
-                    SessionInfoResponse(
-                        name="test-session",
-                        directory="/home/user/project",
-                        state="working",
-                        cost_usd=0.05,
-                    ),
-                ]
-            )
+def test_wait_for_exit_times_out_for_running_process() -> None:
+    proc = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(5)"])
+    try:
+        assert _wait_for_exit(proc.pid, timeout=0.05) is False
+    finally:
+        proc.kill()
+        proc.wait()
 
-            result = runner.invoke(main, ["list"])
 
-            assert result.exit_code == 0
-            assert "test-session" in result.output
-            assert "working" in result.output
-            assert "/home/user/project" in result.output
+# Tests for the locked PID file.
+def test_pid_file_live_while_lock_held(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    pid_file = tmp_path / "daemon.pid"
+    monkeypatch.setattr(wormhole.cli, "_pid_file_fd", None)
 
+    assert write_pid_file(pid_file) is True
+    assert read_pid_file(pid_file) == os.getpid()
+    assert write_pid_file(pid_file) is False  # A second daemon cannot take it over
 
-class TestOpenCommand:
-    """Tests for open command."""
+    assert wormhole.cli._pid_file_fd is not None
+    os.close(wormhole.cli._pid_file_fd)  # As if the daemon exited
 
-    def test_open_with_name(self) -> None:
-        runner = CliRunner()
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    pid_file.write_text(str(proc.pid))
+    assert read_pid_file(pid_file) is None
 
-        with (
-            patch("wormhole.cli.ensure_daemon_running", return_value=True),
-            patch("wormhole.cli.send_control_request_sync") as mock,
-        ):
-            mock.return_value = SuccessResponse(message="Session created")
 
-            result = runner.invoke(main, ["open", "--name", "my-session"])
+def test_read_pid_file_missing(tmp_path: Path) -> None:
+    assert read_pid_file(tmp_path / "daemon.pid") is None
 
-            assert result.exit_code == 0
-            assert "my-session" in result.output
-            assert "created" in result.output
 
-    def test_open_generates_name(self, tmp_path: Path) -> None:
-        runner = CliRunner()
+def test_read_pid_file_unlocked_but_alive(tmp_path: Path) -> None:
+    # Daemons started by older versions wrote the PID without locking the file
+    pid_file = tmp_path / "daemon.pid"
+    pid_file.write_text(str(os.getpid()))
+    assert read_pid_file(pid_file) == os.getpid()
 
-        with (
-            patch("wormhole.cli.ensure_daemon_running", return_value=True),
-            patch("wormhole.cli.send_control_request_sync") as mock,
-        ):
-            mock.return_value = SuccessResponse(message="Session created")
 
-            with runner.isolated_filesystem(temp_dir=tmp_path):
-                result = runner.invoke(main, ["open"])
+def test_write_pid_file_waits_for_previous_daemon(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    pid_file = tmp_path / "daemon.pid"
+    monkeypatch.setattr(wormhole.cli, "_pid_file_fd", None)
+    old_daemon = os.open(pid_file, os.O_RDWR | os.O_CREAT)
+    fcntl.flock(old_daemon, fcntl.LOCK_EX)
 
-                assert result.exit_code == 0
-                assert "created" in result.output
+    assert write_pid_file(pid_file, timeout=0.05) is False
 
-    def test_open_duplicate_directory_error(self) -> None:
-        runner = CliRunner()
+    # The previous daemon finishes shutting down while the new one waits
+    threading.Timer(0.05, os.close, args=(old_daemon,)).start()
+    try:
+        assert write_pid_file(pid_file, timeout=5.0) is True
+        assert read_pid_file(pid_file) == os.getpid()
+    finally:
+        assert wormhole.cli._pid_file_fd is not None
+        os.close(wormhole.cli._pid_file_fd)
 
-        with (
-            patch("wormhole.cli.ensure_daemon_running", return_value=True),
-            patch("wormhole.cli.send_control_request_sync") as mock,
-        ):
-            mock.return_value = ErrorResponse(
-                code="SESSION_EXISTS",
-                message="A session already exists in this directory: test-session",
-            )
 
-            result = runner.invoke(main, ["open", "--name", "new-session"])
+def test_daemon_exits_when_pid_file_stays_locked(
+    cli_runner: CliRunner, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr("wormhole.log_config.setup_logging", lambda **kwargs: None)
+    monkeypatch.setattr(wormhole.cli, "kill_process_on_port", lambda port: False)
+    monkeypatch.setattr(
+        wormhole.cli, "get_daemon_paths", lambda: (tmp_path, tmp_path / "daemon.pid", tmp_path)
+    )
+    monkeypatch.setattr(wormhole.cli, "write_pid_file", lambda pid_file, timeout: False)
 
-            assert result.exit_code == 1
-            assert "already exists" in result.output
+    result = cli_runner.invoke(main, ["daemon"])
 
+    assert result.exit_code == 1
+    assert "still holds" in result.output
 
-class TestCloseCommand:
-    """Tests for close command."""
 
-    def test_close_session(self) -> None:
-        runner = CliRunner()
+# Tests for detecting existing screen sessions.
+def test_screen_session_exists_reads_screendir(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    (tmp_path / "4242.wormhole-api").touch()
+    monkeypatch.setenv("SCREENDIR", str(tmp_path))
 
-        with (
-            patch("wormhole.cli.ensure_daemon_running", return_value=True),
-            patch("wormhole.cli.send_control_request_sync") as mock,
-        ):
-            mock.return_value = SuccessResponse(message="Session closed")
+    assert _screen_session_exists("wormhole-api") is True
+    assert _screen_session_exists("wormhole-ap") is False
 
-            result = runner.invoke(main, ["close", "test-session"])
 
-            assert result.exit_code == 0
-            assert "closed" in result.output
+def test_run_probe_uses_posix_spawn(monkeypatch: pytest.MonkeyPatch) -> None:
+    spawned: list[str] = []
+    real_spawn = os.posix_spawn
 
-    def test_close_nonexistent_session(self) -> None:
-        runner = CliRunner()
+    def spy(path: str, *args: Any, **kwargs: Any) -> int:
+        spawned.append(path)
+        return real_spawn(path, *args, **kwargs)
 
-        with (
-            patch("wormhole.cli.ensure_daemon_running", return_value=True),
-            patch("wormhole.cli.send_control_request_sync") as mock,
-        ):
-            mock.return_value = ErrorResponse(
-                code="SESSION_NOT_FOUND",
-                message="Session not found: nonexistent",
-            )
+    monkeypatch.setattr(os, "posix_spawn", spy)
 
-            result = runner.invoke(main, ["close", "nonexistent"])
+    result = _run_probe([sys.executable, "-c", "print('ok')"], capture_output=True)
 
-            assert result.exit_code == 1
-            assert "not found" in result.output
+    assert result.stdout.strip() == b"ok"
+    assert len(spawned) == 1
@@ -0,0 +1,64 @@
+"""Tests for configuration loading."""
+
+from pathlib import Path
+
+import pytest
+from pydantic import ValidationError
+
+from wormhole.config import load_config
+
+
+@pytest.fixture(autouse=True)
+def clear_env_overrides(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv("WORMHOLE_PORT", raising=False)
+    monkeypatch.delenv("WORMHOLE_BUFFER_SIZE", raising=False)
+
+
+@pytest.fixture
+def config_path(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Point the config file at tmp_path; it does not exist until a test writes it."""
+    path = tmp_path / "config.toml"
+    monkeypatch.setattr("wormhole.config._CONFIG_PATH", path)
+    return path
+
+
+# Tests for load_config.
+def test_load_config_without_file_uses_defaults(config_path: Path) -> None:
+    config = load_config()
+    assert config.daemon.port == 7117
+    assert config.discovery.enabled is True
+
+
+def test_load_config_without_overrides_returns_shared_default(config_path: Path) -> None:
+    assert load_config() is load_config()
+
+
+def test_config_is_read_only(config_path: Path) -> None:
+    config = load_config()
+    with pytest.raises(ValidationError):
+        config.daemon.port = 9000  # type: ignore[misc]
+    assert load_config().daemon.port == 7117
+
+
+def test_load_config_reads_file(config_path: Path) -> None:
+    config_path.write_text("[daemon]\nport = 9000\n\n[discovery]\nenabled = false\n")
+    config = load_config()
+    assert config.daemon.port == 9000
+    assert config.daemon.buffer_size == 1000
+    assert config.discovery.enabled is False
+
+
+def test_load_config_env_overrides_file(config_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    config_path.write_text("[daemon]\nport = 9000\n")
+    monkeypatch.setenv("WORMHOLE_PORT", "9100")
+    assert load_config().daemon.port == 9100
+
+
+def test_load_config_follows_home_set_after_import(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("HOME", str(tmp_path))
+    path = tmp_path / ".config" / "wormhole" / "config.toml"
+    path.parent.mkdir(parents=True)
+    path.write_text("[daemon]\nport = 9200\n")
+    assert load_config().daemon.port == 9200
@@ -1,125 +1,331 @@
 """Tests for control socket IPC."""
 
+import asyncio
 import json
+import socketserver
+import tempfile
+import threading
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
 
 import pytest
 
 from wormhole.control import (
     CloseSessionRequest,
+    ControlClient,
+    ControlRequest,
     ErrorResponse,
+    GetSessionInfoRequest,
     GetStatusRequest,
     ListSessionsRequest,
     OpenSessionRequest,
     QuerySessionRequest,
+    SessionInfoResponse,
     SessionListResponse,
     StatusResponse,
     SuccessResponse,
+    _parse_control_response,
+    _read_frame,
+    close_control_connections,
+    encode_control_frame,
     parse_control_request,
+    read_control_frame,
+    send_control_request_sync,
+    send_control_requests,
 )
+from wormhole.daemon import WormholeDaemon
 
-
-class TestControlRequestParsing:
-    """Tests for parsing control requests."""
-
-    def test_parse_open_session(self) -> None:
-        raw = json.dumps({
+# Serialized once at import; the parsing tests only read them.
+_RAW_CASES: dict[str, str] = {
+    "open_session": json.dumps(
+        {
             "type": "open_session",
             "name": "test-session",
             "directory": "/home/user/project",
-        })
-        request = parse_control_request(raw)
-        assert isinstance(request, OpenSessionRequest)
-        assert request.name == "test-session"
-        assert request.directory == "/home/user/project"
-
-    def test_parse_open_session_with_options(self) -> None:
-        raw = json.dumps({
+        }
+    ),
+    "open_session_with_options": json.dumps(
+        {
             "type": "open_session",
             "name": "test",
             "directory": "/tmp",
             "options": {"model": "claude-sonnet-4-5"},
-        })
-        request = parse_control_request(raw)
-        assert isinstance(request, OpenSessionRequest)
-        assert request.options == {"model": "claude-sonnet-4-5"}
-
-    def test_parse_close_session(self) -> None:
-        raw = json.dumps({
-            "type": "close_session",
-            "name": "test-session",
-        })
-        request = parse_control_request(raw)
-        assert isinstance(request, CloseSessionRequest)
-        assert request.name == "test-session"
-
-    def test_parse_list_sessions(self) -> None:
-        raw = json.dumps({"type": "list_sessions"})
-        request = parse_control_request(raw)
-        assert isinstance(request, ListSessionsRequest)
-
-    def test_parse_get_status(self) -> None:
-        raw = json.dumps({"type": "get_status"})
-        request = parse_control_request(raw)
-        assert isinstance(request, GetStatusRequest)
-
-    def test_parse_query_session(self) -> None:
-        raw = json.dumps({
+        }
+    ),
+    "close_session": json.dumps({"type": "close_session", "name": "test-session"}),
+    "list_sessions": json.dumps({"type": "list_sessions"}),
+    "get_status": json.dumps({"type": "get_status"}),
+    "get_session_info": json.dumps({"type": "get_session_info", "name": "test-session"}),
+    "query_session": json.dumps(
+        {
             "type": "query_session",
             "name": "test",
             "text": "Hello Claude",
-        })
-        request = parse_control_request(raw)
-        assert isinstance(request, QuerySessionRequest)
-        assert request.name == "test"
-        assert request.text == "Hello Claude"
-
-    def test_parse_unknown_type_raises(self) -> None:
-        raw = json.dumps({"type": "unknown"})
-        with pytest.raises(ValueError, match="Unknown control message type"):
-            parse_control_request(raw)
-
-
-class TestControlResponseSerialization:
-    """Tests for response serialization."""
-
-    def test_success_response(self) -> None:
-        response = SuccessResponse(message="Session created")
-        data = json.loads(response.model_dump_json())
-        assert data["type"] == "success"
-        assert data["message"] == "Session created"
-
-    def test_success_response_with_data(self) -> None:
-        response = SuccessResponse(
-            message="OK",
-            data={"session_id": "abc123"},
-        )
-        data = json.loads(response.model_dump_json())
-        assert data["data"]["session_id"] == "abc123"
-
-    def test_error_response(self) -> None:
-        response = ErrorResponse(
-            code="SESSION_EXISTS",
-            message="A session already exists in this directory",
-        )
-        data = json.loads(response.model_dump_json())
-        assert data["type"] == "error"
-        assert data["code"] == "SESSION_EXISTS"
-
-    def test_session_list_response(self) -> None:
-        response = SessionListResponse(sessions=[])
-        data = json.loads(response.model_dump_json())
-        assert data["type"] == "session_list"
-        assert data["sessions"] == []
-
-    def test_status_response(self) -> None:
-        response = StatusResponse(
-            running=True,
-            port=7117,
-            machine_name="testbox",
-            session_count=2,
-            connected_clients=1,
-        )
-        data = json.loads(response.model_dump_json())
-        assert data["type"] == "status"
-        assert data["port"] == 7117
-        assert data["session_count"] == 2
+        }
+    ),
+}
+_UNKNOWN_RAW = json.dumps({"type": "unknown"})
+
+
+@pytest.fixture(scope="session")
+def parsed_requests() -> dict[str, ControlRequest]:
+    """Parse every raw case once; the models are only read by the tests."""
+    return {key: parse_control_request(raw) for key, raw in _RAW_CASES.items()}
+
+
+_EXPECTED: dict[str, tuple[type[Any], dict[str, Any]]] = {
+    "open_session": (
+        OpenSessionRequest,
+        {"name": "test-session", "directory": "/home/user/project"},
+    ),
+    "open_session_with_options": (OpenSessionRequest, {"options": {"model": "claude-sonnet-4-5"}}),
+    "close_session": (CloseSessionRequest, {"name": "test-session"}),
+    "list_sessions": (ListSessionsRequest, {}),
+    "get_status": (GetStatusRequest, {}),
+    "get_session_info": (GetSessionInfoRequest, {"name": "test-session"}),
+    "query_session": (QuerySessionRequest, {"name": "test", "text": "Hello Claude"}),
+}
+
+
+# Tests for parsing control requests.
+@pytest.mark.parametrize("case", list(_RAW_CASES))
+def test_parse_control_request(parsed_requests: dict[str, ControlRequest], case: str) -> None:
+    expected_type, fields = _EXPECTED[case]
+    request = parsed_requests[case]
+    assert isinstance(request, expected_type)
+    for name, value in fields.items():
+        assert getattr(request, name) == value
+
+
+def test_parse_control_request_unknown_type_raises() -> None:
+    with pytest.raises(ValueError, match="Unknown control message type"):
+        parse_control_request(_UNKNOWN_RAW)
+
+
+def test_encode_control_frame_round_trips() -> None:
+    request = QuerySessionRequest(name="test", text="Hello Claude")
+    frame = encode_control_frame(request)
+    assert int.from_bytes(frame[:4], "little") == len(frame) - 4
+    assert parse_control_request(frame[4:]) == request
+
+
+def test_parse_fieldless_request_skips_validation() -> None:
+    payload = encode_control_frame(GetStatusRequest())[4:]
+    assert parse_control_request(payload) is parse_control_request(payload)
+
+
+# Tests for response serialization.
+def test_serialize_success_response() -> None:
+    response = SuccessResponse(message="Session created")
+    data = json.loads(response.model_dump_json())
+    assert data["type"] == "success"
+    assert data["message"] == "Session created"
+
+
+def test_serialize_success_response_with_data() -> None:
+    response = SuccessResponse(
+        message="OK",
+        data={"session_id": "abc123"},
+    )
+    data = json.loads(response.model_dump_json())
+    assert data["data"]["session_id"] == "abc123"
+
+
+def test_serialize_error_response() -> None:
+    response = ErrorResponse(
+        code="SESSION_EXISTS",
+        message="A session already exists in this directory",
+    )
+    data = json.loads(response.model_dump_json())
+    assert data["type"] == "error"
+    assert data["code"] == "SESSION_EXISTS"
+
+
+def test_serialize_session_list_response() -> None:
+    response = SessionListResponse(sessions=[])
+    data = json.loads(response.model_dump_json())
+    assert data["type"] == "session_list"
+    assert data["sessions"] == []
+
+
+def test_serialize_status_response() -> None:
+    response = StatusResponse(
+        running=True,
+        port=7117,
+        machine_name="testbox",
+        session_count=2,
+        connected_clients=1,
+    )
+    data = json.loads(response.model_dump_json())
+    assert data["type"] == "status"
+    assert data["port"] == 7117
+    assert data["session_count"] == 2
+
+
+# Tests for parsing daemon responses.
+def test_parse_control_response_dispatches_on_type() -> None:
+    response = _parse_control_response(b'{"type": "session_list", "sessions": []}\n')
+    assert response == SessionListResponse(sessions=[])
+
+
+def test_parse_control_response_unknown_type() -> None:
+    response = _parse_control_response(b'{"type": "bogus"}\n')
+    assert isinstance(response, ErrorResponse)
+    assert response.code == "INVALID_RESPONSE"
+    assert "bogus" in response.message
+
+
+@pytest.mark.asyncio
+async def test_read_control_frame_beyond_line_limit() -> None:
+    response = SessionListResponse(
+        sessions=[
+            SessionInfoResponse(name=f"session-{i}", directory="/deep" * 50, state="idle")
+            for i in range(500)
+        ]
+    )
+    frame = encode_control_frame(response)
+    assert len(frame) > 2**16  # StreamReader's default readline limit
+
+    reader = asyncio.StreamReader()
+    reader.feed_data(frame)
+    reader.feed_eof()
+
+    payload = await read_control_frame(reader)
+    assert payload is not None
+    assert _parse_control_response(payload) == response
+    assert await read_control_frame(reader) is None
+
+
+# Tests for pipelined requests over the control socket.
+@pytest.mark.asyncio
+async def test_pipelined_requests_share_one_connection(
+    daemon: WormholeDaemon, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    connections = 0
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        nonlocal connections
+        connections += 1
+        await daemon._handle_control_connection(reader, writer)
+
+    # Short directory: Unix socket paths are limited to ~100 bytes
+    with tempfile.TemporaryDirectory() as tmp:
+        socket_path = Path(tmp) / "wormhole.sock"
+        monkeypatch.setattr("wormhole.control.get_socket_path", lambda: socket_path)
+        server = await asyncio.start_unix_server(handle, path=str(socket_path))
+        async with server:
+            status, sessions = await send_control_requests(
+                [GetStatusRequest(), ListSessionsRequest()]
+            )
+
+    assert isinstance(status, StatusResponse)
+    assert isinstance(sessions, SessionListResponse)
+    assert connections == 1
+
+
+_STATUS = StatusResponse(port=7117, machine_name="testbox", session_count=0, connected_clients=0)
+
+
+class _StatusServer(socketserver.ThreadingUnixStreamServer):
+    """Answers every request frame with _STATUS, counting connections and requests.
+
+    While stall is set, requests are read but not answered; the connection is
+    closed once release is set, or after a second.
+    """
+
+    def __init__(self, socket_path: Path, one_per_connection: bool = False) -> None:
+        self.connections = 0
+        self.requests = 0
+        self.stall = False
+        self.release = threading.Event()
+        self.lock = threading.Lock()
+        self.one_per_connection = one_per_connection
+        super().__init__(str(socket_path), _StatusHandler)
+
+
+class _StatusHandler(socketserver.StreamRequestHandler):
+    server: _StatusServer
+
+    def handle(self) -> None:
+        with self.server.lock:
+            self.server.connections += 1
+        while _read_frame(self.rfile):
+            with self.server.lock:
+                self.server.requests += 1
+            if self.server.stall:
+                self.server.release.wait(1)
+                return
+            self.wfile.write(encode_control_frame(_STATUS))
+            if self.server.one_per_connection:
+                return
+
+
+@contextmanager
+def _serve_status(
+    monkeypatch: pytest.MonkeyPatch, one_per_connection: bool = False
+) -> Iterator[_StatusServer]:
+    # Short directory: Unix socket paths are limited to ~100 bytes
+    with tempfile.TemporaryDirectory() as tmp:
+        socket_path = Path(tmp) / "wormhole.sock"
+        monkeypatch.setattr("wormhole.control.get_socket_path", lambda: socket_path)
+        with _StatusServer(socket_path, one_per_connection) as server:
+            threading.Thread(target=server.serve_forever, args=(0.01,), daemon=True).start()
+            try:
+                yield server
+            finally:
+                close_control_connections()
+                server.shutdown()
+
+
+@pytest.mark.parametrize(
+    ("one_per_connection", "expected_connections"),
+    [(False, 1), (True, 2)],
+    ids=["reused", "reconnects-when-stale"],
+)
+def test_sync_requests_share_connection(
+    monkeypatch: pytest.MonkeyPatch, one_per_connection: bool, expected_connections: int
+) -> None:
+    with _serve_status(monkeypatch, one_per_connection) as server:
+        first = send_control_request_sync(GetStatusRequest())
+        second = send_control_request_sync(GetStatusRequest())
+
+    assert first == second == _STATUS
+    assert server.connections == expected_connections
+
+
+def test_control_client_pool_bounds_connections(monkeypatch: pytest.MonkeyPatch) -> None:
+    client = ControlClient(size=2)
+
+    with _serve_status(monkeypatch) as server, ThreadPoolExecutor(max_workers=8) as pool:
+        try:
+            responses = list(pool.map(lambda _: client.call(GetStatusRequest()), range(32)))
+        finally:
+            client.close()
+
+    assert responses == [_STATUS] * 32
+    assert 1 <= server.connections <= 2
+
+
+def test_control_client_does_not_resend_after_timeout(monkeypatch: pytest.MonkeyPatch) -> None:
+    client = ControlClient()
+
+    with _serve_status(monkeypatch) as server:
+        try:
+            assert client.call(GetStatusRequest()) == _STATUS
+            conn = client._idle.get()
+            conn.sock.settimeout(0.1)
+            client._idle.put(conn)
+
+            # The daemon accepts the request on the pooled connection but never answers
+            server.stall = True
+            response = client.call(OpenSessionRequest(name="test", directory="/tmp"))
+        finally:
+            server.release.set()
+            client.close()
+
+    assert isinstance(response, ErrorResponse)
+    assert response.code == "CONNECTION_ERROR"
+    assert server.requests == 2
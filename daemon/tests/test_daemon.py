@@ -1,336 +1,297 @@
 """Tests for WormholeDaemon session management."""
 
+from collections.abc import Callable
 from pathlib import Path
+from typing import get_args
 from unittest.mock import AsyncMock
 
 import pytest
 
+from wormhole.control import (
+    ControlRequest,
+    ErrorResponse,
+    GetSessionInfoRequest,
+    SessionDetailResponse,
+)
 from wormhole.daemon import WormholeDaemon
-from wormhole.persistence import EventPersistence, SessionPersistence
-
-
-class TestSessionCreation:
-    """Tests for creating sessions."""
-
-    def test_create_session_returns_session(
-        self,
-        tmp_path: Path,
-        event_persistence: EventPersistence,
-        session_persistence: SessionPersistence,
-    ) -> None:
-        daemon = WormholeDaemon(
-            port=7117,
-            event_persistence=event_persistence,
-            session_persistence=session_persistence,
-        )
-
-        session = daemon.create_session("test-session", tmp_path)
-
-        assert session is not None
-        assert session.name == "test-session"
-        assert session.directory == tmp_path.resolve()
-
-    def test_create_session_registers_in_sessions_dict(
-        self,
-        tmp_path: Path,
-        event_persistence: EventPersistence,
-        session_persistence: SessionPersistence,
-    ) -> None:
-        daemon = WormholeDaemon(
-            port=7117,
-            event_persistence=event_persistence,
-            session_persistence=session_persistence,
-        )
-
-        daemon.create_session("test-session", tmp_path)
-
-        assert "test-session" in daemon.sessions
-        assert daemon.sessions["test-session"].name == "test-session"
-
-    def test_create_session_registers_directory_mapping(
-        self,
-        tmp_path: Path,
-        event_persistence: EventPersistence,
-        session_persistence: SessionPersistence,
-    ) -> None:
-        daemon = WormholeDaemon(
-            port=7117,
-            event_persistence=event_persistence,
-            session_persistence=session_persistence,
-        )
-
-        daemon.create_session("test-session", tmp_path)
-
-        assert tmp_path.resolve() in daemon.directory_to_session
-        assert daemon.directory_to_session[tmp_path.resolve()] == "test-session"
-
-    def test_create_session_sets_broadcast_callback(
-        self,
-        tmp_path: Path,
-        event_persistence: EventPersistence,
-        session_persistence: SessionPersistence,
-    ) -> None:
-        daemon = WormholeDaemon(
-            port=7117,
-            event_persistence=event_persistence,
-            session_persistence=session_persistence,
-        )
-
-        session = daemon.create_session("test-session", tmp_path)
-
-        assert session._broadcast_callback is not None
-
-
-class TestOneSessionPerDirectory:
-    """Tests for one-session-per-directory constraint."""
-
-    def test_duplicate_directory_raises_error(
-        self,
-        tmp_path: Path,
-        event_persistence: EventPersistence,
-        session_persistence: SessionPersistence,
-    ) -> None:
-        daemon = WormholeDaemon(
-            port=7117,
-            event_persistence=event_persistence,
-            session_persistence=session_persistence,
-        )
-
-        daemon.create_session("first-session", tmp_path)
-
-        with pytest.raises(ValueError) as exc_info:
-            daemon.create_session("second-session", tmp_path)
-
-        assert "already exists" in str(exc_info.value)
-        assert "first-session" in str(exc_info.value)
-
-    def test_different_directories_allowed(
-        self,
-        tmp_path: Path,
-        event_persistence: EventPersistence,
-        session_persistence: SessionPersistence,
-    ) -> None:
-        daemon = WormholeDaemon(
-            port=7117,
-            event_persistence=event_persistence,
-            session_persistence=session_persistence,
-        )
-        dir_a = tmp_path / "a"
-        dir_b = tmp_path / "b"
-        dir_a.mkdir()
-        dir_b.mkdir()
-
-        session_a = daemon.create_session("session-a", dir_a)
-        session_b = daemon.create_session("session-b", dir_b)
-
-        assert session_a is not None
-        assert session_b is not None
-        assert len(daemon.sessions) == 2
-
-    def test_resolves_relative_paths(
-        self,
-        tmp_path: Path,
-        event_persistence: EventPersistence,
-        session_persistence: SessionPersistence,
-    ) -> None:
-        daemon = WormholeDaemon(
-            port=7117,
-            event_persistence=event_persistence,
-            session_persistence=session_persistence,
-        )
-
-        # Create with explicit path
-        daemon.create_session("first", tmp_path)
-
-        # Try to create with same path but different form
-        with pytest.raises(ValueError):
-            daemon.create_session("second", tmp_path / "." / ".")
-
-
-class TestSessionClosure:
-    """Tests for closing sessions."""
-
-    @pytest.mark.asyncio
-    async def test_close_session_removes_from_registry(
-        self,
-        tmp_path: Path,
-        event_persistence: EventPersistence,
-        session_persistence: SessionPersistence,
-    ) -> None:
-        daemon = WormholeDaemon(
-            port=7117,
-            event_persistence=event_persistence,
-            session_persistence=session_persistence,
-        )
-
-        session = daemon.create_session("test-session", tmp_path)
-        session._client = AsyncMock()  # Mock to avoid real SDK calls
-
-        await daemon.close_session("test-session")
-
-        assert "test-session" not in daemon.sessions
-        assert tmp_path.resolve() not in daemon.directory_to_session
-
-    @pytest.mark.asyncio
-    async def test_close_session_stops_sdk_client(
-        self,
-        tmp_path: Path,
-        event_persistence: EventPersistence,
-        session_persistence: SessionPersistence,
-    ) -> None:
-        daemon = WormholeDaemon(
-            port=7117,
-            event_persistence=event_persistence,
-            session_persistence=session_persistence,
-        )
-
-        session = daemon.create_session("test-session", tmp_path)
-        mock_client = AsyncMock()
-        session._client = mock_client
-
-        await daemon.close_session("test-session")
-
-        mock_client.disconnect.assert_called_once()
-
-    @pytest.mark.asyncio
-    async def test_close_nonexistent_session_no_error(
-        self,
-        event_persistence: EventPersistence,
-        session_persistence: SessionPersistence,
-    ) -> None:
-        daemon = WormholeDaemon(
-            port=7117,
-            event_persistence=event_persistence,
-            session_persistence=session_persistence,
-        )
-
-        # Should not raise
-        await daemon.close_session("nonexistent")
-
-    @pytest.mark.asyncio
-    async def test_can_create_session_after_closing(
-        self,
-        tmp_path: Path,
-        event_persistence: EventPersistence,
-        session_persistence: SessionPersistence,
-    ) -> None:
-        daemon = WormholeDaemon(
-            port=7117,
-            event_persistence=event_persistence,
-            session_persistence=session_persistence,
-        )
-
-        session1 = daemon.create_session("test-session", tmp_path)
-        session1._client = AsyncMock()
-
-        await daemon.close_session("test-session")
-
-        # Should be able to create new session in same directory
-        session2 = daemon.create_session("new-session", tmp_path)
-        assert session2 is not None
-
-
-class TestMultipleSessions:
-    """Tests for handling multiple concurrent sessions."""
-
-    def test_multiple_sessions_tracked_independently(
-        self,
-        tmp_path: Path,
-        event_persistence: EventPersistence,
-        session_persistence: SessionPersistence,
-    ) -> None:
-        daemon = WormholeDaemon(
-            port=7117,
-            event_persistence=event_persistence,
-            session_persistence=session_persistence,
-        )
-
-        dirs = [tmp_path / f"project{i}" for i in range(3)]
-        for d in dirs:
-            d.mkdir()
-
-        sessions = [
-            daemon.create_session(f"session-{i}", dirs[i]) for i in range(3)
-        ]
-
-        assert len(daemon.sessions) == 3
-        assert len(daemon.directory_to_session) == 3
-
-        # Verify each session has correct directory
-        for i, session in enumerate(sessions):
-            assert session.directory == dirs[i].resolve()
-
-    @pytest.mark.asyncio
-    async def test_session_broadcasts_routed_independently(
-        self,
-        tmp_path: Path,
-        event_persistence: EventPersistence,
-        session_persistence: SessionPersistence,
-    ) -> None:
-        daemon = WormholeDaemon(
-            port=7117,
-            event_persistence=event_persistence,
-            session_persistence=session_persistence,
-        )
-
-        received_events: list[tuple[str, object]] = []
-
-        async def capture_broadcast(msg: object) -> None:
-            received_events.append((getattr(msg, "session", ""), msg))
-
-        # Override daemon's broadcast BEFORE creating sessions
-        daemon._broadcast = capture_broadcast  # type: ignore
-
-        (tmp_path / "a").mkdir()
-        (tmp_path / "b").mkdir()
-        session_a = daemon.create_session("session-a", tmp_path / "a")
-        session_b = daemon.create_session("session-b", tmp_path / "b")
-
-        # Have both sessions emit events
-        await session_a._handle_sdk_message({"type": "from_a"})
-        await session_b._handle_sdk_message({"type": "from_b"})
-
-        # Verify events are correctly attributed
-        assert len(received_events) == 2
-        assert received_events[0][0] == "session-a"
-        assert received_events[1][0] == "session-b"
-
-
-class TestDaemonInitialization:
-    """Tests for daemon initialization."""
-
-    def test_default_port(
-        self,
-        event_persistence: EventPersistence,
-        session_persistence: SessionPersistence,
-    ) -> None:
-        daemon = WormholeDaemon(
-            event_persistence=event_persistence,
-            session_persistence=session_persistence,
-        )
-        assert daemon.port == 7117
-
-    def test_custom_port(
-        self,
-        event_persistence: EventPersistence,
-        session_persistence: SessionPersistence,
-    ) -> None:
-        daemon = WormholeDaemon(
-            port=8080,
-            event_persistence=event_persistence,
-            session_persistence=session_persistence,
-        )
-        assert daemon.port == 8080
-
-    def test_starts_with_empty_sessions(
-        self,
-        event_persistence: EventPersistence,
-        session_persistence: SessionPersistence,
-    ) -> None:
-        daemon = WormholeDaemon(
-            event_persistence=event_persistence,
-            session_persistence=session_persistence,
-        )
-        assert len(daemon.sessions) == 0
-        assert len(daemon.directory_to_session) == 0
-        assert len(daemon._clients) == 0
+from wormhole.persistence import SessionPersistence
+
+
+# Tests for creating sessions.
+def test_create_session_returns_session(resolved_tmp: Path, daemon: WormholeDaemon) -> None:
+    session = daemon.create_session("test-session", resolved_tmp)
+
+    assert session is not None
+    assert session.name == "test-session"
+    assert session.directory == resolved_tmp
+
+
+def test_create_session_registers_in_sessions_dict(
+    tmp_path: Path,
+    daemon: WormholeDaemon,
+) -> None:
+    daemon.create_session("test-session", tmp_path)
+
+    assert "test-session" in daemon.sessions
+    assert daemon.sessions["test-session"].name == "test-session"
+
+
+def test_create_session_registers_directory_mapping(
+    resolved_tmp: Path,
+    daemon: WormholeDaemon,
+) -> None:
+    daemon.create_session("test-session", resolved_tmp)
+
+    assert resolved_tmp in daemon.directory_to_session
+    assert daemon.directory_to_session[resolved_tmp] == "test-session"
+
+
+def test_create_session_sets_broadcast_callback(
+    tmp_path: Path,
+    daemon: WormholeDaemon,
+) -> None:
+    session = daemon.create_session("test-session", tmp_path)
+
+    assert session._broadcast_callback is not None
+
+
+# Tests for one-session-per-directory constraint.
+def test_duplicate_directory_raises_error(tmp_path: Path, daemon: WormholeDaemon) -> None:
+    daemon.create_session("first-session", tmp_path)
+
+    with pytest.raises(ValueError) as exc_info:
+        daemon.create_session("second-session", tmp_path)
+
+    assert "already exists" in str(exc_info.value)
+    assert "first-session" in str(exc_info.value)
+
+
+def test_different_directories_allowed(
+    two_subdirs: tuple[Path, Path], daemon: WormholeDaemon
+) -> None:
+    dir_a, dir_b = two_subdirs
+
+    session_a = daemon.create_session("session-a", dir_a)
+    session_b = daemon.create_session("session-b", dir_b)
+
+    assert session_a is not None
+    assert session_b is not None
+    assert len(daemon.sessions) == 2
+
+
+def test_resolves_relative_paths(tmp_path: Path, daemon: WormholeDaemon) -> None:
+    # Create with explicit path
+    daemon.create_session("first", tmp_path)
+
+    # Try to create with same path but different form
+    with pytest.raises(ValueError):
+        daemon.create_session("second", tmp_path / "." / ".")
+
+
+# Tests for closing sessions.
+@pytest.mark.asyncio
+async def test_close_session_removes_from_registry(
+    resolved_tmp: Path,
+    daemon: WormholeDaemon,
+    mock_sdk_client: AsyncMock,
+) -> None:
+    session = daemon.create_session("test-session", resolved_tmp)
+    session._client = mock_sdk_client  # Mock to avoid real SDK calls
+
+    await daemon.close_session("test-session")
+
+    assert "test-session" not in daemon.sessions
+    assert resolved_tmp not in daemon.directory_to_session
+
+
+@pytest.mark.asyncio
+async def test_close_session_stops_sdk_client(
+    tmp_path: Path,
+    daemon: WormholeDaemon,
+    mock_sdk_client: AsyncMock,
+) -> None:
+    session = daemon.create_session("test-session", tmp_path)
+    session._client = mock_sdk_client
+
+    await daemon.close_session("test-session")
+
+    mock_sdk_client.disconnect.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_close_nonexistent_session_no_error(daemon: WormholeDaemon) -> None:
+    # Should not raise
+    await daemon.close_session("nonexistent")
+
+
+@pytest.mark.asyncio
+async def test_can_create_session_after_closing(
+    tmp_path: Path,
+    daemon: WormholeDaemon,
+    mock_sdk_client: AsyncMock,
+) -> None:
+    session1 = daemon.create_session("test-session", tmp_path)
+    session1._client = mock_sdk_client
+
+    await daemon.close_session("test-session")
+
+    # Should be able to create new session in same directory
+    session2 = daemon.create_session("new-session", tmp_path)
+    assert session2 is not None
+
+
+# Tests for handling multiple concurrent sessions.
+def test_multiple_sessions_tracked_independently(
+    subdirs: Callable[[int], list[Path]],
+    daemon: WormholeDaemon,
+) -> None:
+    dirs = subdirs(3)
+
+    sessions = [daemon.create_session(f"session-{i}", dirs[i]) for i in range(3)]
+
+    assert len(daemon.sessions) == 3
+    assert len(daemon.directory_to_session) == 3
+
+    # Verify each session has correct directory
+    for i, session in enumerate(sessions):
+        assert session.directory == dirs[i]
+
+
+@pytest.mark.asyncio
+async def test_session_broadcasts_routed_independently(
+    two_subdirs: tuple[Path, Path],
+    daemon: WormholeDaemon,
+) -> None:
+    dir_a, dir_b = two_subdirs
+    received_events: list[tuple[str, object]] = []
+
+    async def capture_broadcast(msg: object) -> None:
+        received_events.append((getattr(msg, "session", ""), msg))
+
+    # Override daemon's broadcast BEFORE creating sessions
+    daemon._broadcast = capture_broadcast  # type: ignore
+
+    session_a = daemon.create_session("session-a", dir_a)
+    session_b = daemon.create_session("session-b", dir_b)
+
+    # Have both sessions emit events
+    await session_a._handle_sdk_message({"type": "from_a"})
+    await session_b._handle_sdk_message({"type": "from_b"})
+
+    # Verify events are correctly attributed
+    assert len(received_events) == 2
+    assert received_events[0][0] == "session-a"
+    assert received_events[1][0] == "session-b"
+
+
+# Tests for daemon initialization.
+def test_daemon_default_port(daemon_factory: Callable[..., WormholeDaemon]) -> None:
+    daemon = daemon_factory()
+    assert daemon.port == 7117
+
+
+def test_daemon_custom_port(daemon_factory: Callable[..., WormholeDaemon]) -> None:
+    daemon = daemon_factory(port=8080)
+    assert daemon.port == 8080
+
+
+def test_daemon_starts_with_empty_sessions(daemon: WormholeDaemon) -> None:
+    assert len(daemon.sessions) == 0
+    assert len(daemon.directory_to_session) == 0
+    assert len(daemon._clients) == 0
+
+
+# Tests for control request dispatch.
+def test_every_control_request_has_a_handler(daemon: WormholeDaemon) -> None:
+    assert set(daemon._control_handlers) == set(get_args(ControlRequest))
+
+
+# Tests for looking up one session over the control socket.
+@pytest.mark.asyncio
+async def test_get_session_info_returns_session(resolved_tmp: Path, daemon: WormholeDaemon) -> None:
+    daemon.create_session("test-session", resolved_tmp)
+
+    response = await daemon._handle_control_request(GetSessionInfoRequest(name="test-session"))
+
+    assert isinstance(response, SessionDetailResponse)
+    assert response.session.name == "test-session"
+    assert response.session.directory == str(resolved_tmp)
+
+
+@pytest.mark.asyncio
+async def test_get_session_info_unknown_name(daemon: WormholeDaemon) -> None:
+    response = await daemon._handle_control_request(GetSessionInfoRequest(name="missing"))
+
+    assert isinstance(response, ErrorResponse)
+    assert response.code == "SESSION_NOT_FOUND"
+
+
+# Tests for persisting session updates.
+def test_session_updates_append_to_log(
+    resolved_tmp: Path, daemon: WormholeDaemon, session_persistence: SessionPersistence
+) -> None:
+    session = daemon.create_session("test-session", resolved_tmp)
+    session.cost_usd = 1.5
+    daemon._persist_session(session)
+
+    assert not session_persistence.path.exists()
+    assert len(session_persistence.log_path.read_text().splitlines()) == 2
+    (persisted,) = session_persistence.load_sessions()
+    assert persisted.cost_usd == 1.5
+
+
+def test_compact_folds_log_into_snapshot(
+    resolved_tmp: Path, daemon: WormholeDaemon, session_persistence: SessionPersistence
+) -> None:
+    daemon.create_session("test-session", resolved_tmp)
+
+    session_persistence.compact()
+
+    assert not session_persistence.log_path.exists()
+    assert [s.name for s in session_persistence.load_sessions()] == ["test-session"]
+
+
+def test_log_compacted_once_past_threshold(
+    resolved_tmp: Path, daemon: WormholeDaemon, session_persistence: SessionPersistence
+) -> None:
+    session = daemon.create_session("test-session", resolved_tmp)
+    line_size = session_persistence.log_path.stat().st_size
+    session_persistence.log_compact_bytes = 2 * line_size
+
+    session.cost_usd = 1.0
+    daemon._persist_session(session)
+    assert len(session_persistence.log_path.read_text().splitlines()) == 2
+
+    session.cost_usd = 2.0
+    daemon._persist_session(session)
+    assert not session_persistence.log_path.exists()
+    (persisted,) = session_persistence.load_sessions()
+    assert persisted.cost_usd == 2.0
+
+
+@pytest.mark.asyncio
+async def test_persistence_flushed_in_background(
+    resolved_tmp: Path, daemon: WormholeDaemon, session_persistence: SessionPersistence
+) -> None:
+    session = daemon.create_session("test-session", resolved_tmp)
+    session.cost_usd = 2.0
+    daemon._persist_session(session)
+
+    # Both updates are coalesced into one line, written off the event loop
+    assert daemon._persist_task is not None
+    await daemon._persist_task
+    assert len(session_persistence.log_path.read_text().splitlines()) == 1
+    assert session_persistence.load_sessions()[0].cost_usd == 2.0
+
+
+@pytest.mark.asyncio
+async def test_closed_session_not_resurrected_by_queued_update(
+    resolved_tmp: Path, daemon: WormholeDaemon, session_persistence: SessionPersistence
+) -> None:
+    daemon.create_session("test-session", resolved_tmp)
+
+    await daemon.close_session("test-session")
+    if daemon._persist_task:
+        await daemon._persist_task
+
+    assert session_persistence.load_sessions() == []
@@ -1,64 +1,145 @@
 """Tests for protocol message parsing."""
 
 import json
+from datetime import datetime
+from typing import Any
 
 import pytest
 
 from wormhole.protocol import (
+    ErrorMessage,
+    EventMessage,
     HelloMessage,
     InputMessage,
     PermissionResponseMessage,
+    SessionInfo,
+    WelcomeMessage,
+    encode_event,
+    encode_message,
+    encode_session_infos,
+    encode_welcome,
+    encode_welcome_prefix,
     parse_client_message,
+    timestamp_ns,
 )
 
+# Serialized once at import; the parsing tests only read them.
+_HELLO_RAW = json.dumps(
+    {
+        "type": "hello",
+        "client_version": "1.0.0",
+        "device_name": "Test iPhone",
+    }
+)
+_INPUT_RAW = json.dumps(
+    {
+        "type": "input",
+        "session": "test-session",
+        "text": "Hello Claude",
+    }
+)
+_PERMISSION_ALLOW_RAW = json.dumps(
+    {
+        "type": "permission_response",
+        "request_id": "abc123",
+        "decision": "allow",
+    }
+)
+_PERMISSION_DENY_RAW = json.dumps(
+    {
+        "type": "permission_response",
+        "request_id": "abc123",
+        "decision": "deny",
+    }
+)
+_UNKNOWN_RAW = json.dumps({"type": "unknown"})
+
+
+# Tests for parsing messages from phone.
+@pytest.mark.parametrize(
+    ("raw", "expected_type", "fields"),
+    [
+        pytest.param(
+            _HELLO_RAW,
+            HelloMessage,
+            {"client_version": "1.0.0", "device_name": "Test iPhone"},
+            id="hello",
+        ),
+        pytest.param(
+            _INPUT_RAW,
+            InputMessage,
+            {"session": "test-session", "text": "Hello Claude"},
+            id="input",
+        ),
+        pytest.param(
+            _PERMISSION_ALLOW_RAW,
+            PermissionResponseMessage,
+            {"request_id": "abc123", "decision": "allow"},
+            id="permission_response_allow",
+        ),
+        pytest.param(
+            _PERMISSION_DENY_RAW,
+            PermissionResponseMessage,
+            {"decision": "deny"},
+            id="permission_response_deny",
+        ),
+    ],
+)
+def test_parse_client_message(raw: str, expected_type: type[Any], fields: dict[str, Any]) -> None:
+    msg = parse_client_message(raw)
+    assert isinstance(msg, expected_type)
+    for name, value in fields.items():
+        assert getattr(msg, name) == value
+
+
+def test_parse_client_message_unknown_type_raises() -> None:
+    with pytest.raises(ValueError, match="Unknown message type"):
+        parse_client_message(_UNKNOWN_RAW)
+
+
+def test_parse_client_message_missing_type_raises() -> None:
+    with pytest.raises(ValueError, match="Unknown message type: None"):
+        parse_client_message(json.dumps({"session": "test"}))
+
+
+def test_parse_client_message_accepts_bytes() -> None:
+    msg = parse_client_message(_HELLO_RAW.encode())
+    assert isinstance(msg, HelloMessage)
+
+
+# Tests for serializing messages to phone.
+def test_encode_event_matches_model_dump_json() -> None:
+    event = EventMessage(
+        session="test",
+        sequence=1,
+        timestamp=timestamp_ns(datetime(2025, 1, 1, 12, 0, 0)),
+        message={"type": "assistant", "text": "héllo"},
+    )
+    assert encode_event(event) == event.model_dump_json().encode()
+
+
+def test_event_timestamp_is_integer_nanoseconds() -> None:
+    ts = timestamp_ns(datetime.fromtimestamp(1_700_000_000.123456))
+    assert ts == 1_700_000_000_123_456_000
+
+    event = EventMessage(session="test", sequence=1, timestamp=ts, message={})
+    assert json.loads(encode_event(event))["timestamp"] == ts
+
+
+def test_encode_welcome_matches_model_dump_json() -> None:
+    welcome = WelcomeMessage(server_version="0.1.0", machine_name="testbox", sessions=[])
+    assert encode_welcome(welcome) == welcome.model_dump_json().encode()
+
+
+def test_encode_message_matches_model_dump_json() -> None:
+    error = ErrorMessage(code="INVALID_MESSAGE", message="bad frame", session="test")
+    assert encode_message(error) == error.model_dump_json().encode()
+
+
+def test_welcome_prefix_plus_sessions_matches_full_welcome() -> None:
+    sessions = [SessionInfo(name="a", directory="/tmp/a", state="idle")]
+    welcome = WelcomeMessage(server_version="0.1.0", machine_name="testbox", sessions=sessions)
+
+    spliced = encode_welcome_prefix("0.1.0", "testbox") + encode_session_infos(sessions) + b"}"
 
-class TestClientMessageParsing:
-    """Tests for parsing messages from phone."""
-
-    def test_parse_hello(self) -> None:
-        raw = json.dumps({
-            "type": "hello",
-            "client_version": "1.0.0",
-            "device_name": "Test iPhone",
-        })
-        msg = parse_client_message(raw)
-        assert isinstance(msg, HelloMessage)
-        assert msg.client_version == "1.0.0"
-        assert msg.device_name == "Test iPhone"
-
-    def test_parse_input(self) -> None:
-        raw = json.dumps({
-            "type": "input",
-            "session": "test-session",
-            "text": "Hello Claude",
-        })
-        msg = parse_client_message(raw)
-        assert isinstance(msg, InputMessage)
-        assert msg.session == "test-session"
-        assert msg.text == "Hello Claude"
-
-    def test_parse_permission_response_allow(self) -> None:
-        raw = json.dumps({
-            "type": "permission_response",
-            "request_id": "abc123",
-            "decision": "allow",
-        })
-        msg = parse_client_message(raw)
-        assert isinstance(msg, PermissionResponseMessage)
-        assert msg.request_id == "abc123"
-        assert msg.decision == "allow"
-
-    def test_parse_permission_response_deny(self) -> None:
-        raw = json.dumps({
-            "type": "permission_response",
-            "request_id": "abc123",
-            "decision": "deny",
-        })
-        msg = parse_client_message(raw)
-        assert isinstance(msg, PermissionResponseMessage)
-        assert msg.decision == "deny"
-
-    def test_parse_unknown_type_raises(self) -> None:
-        raw = json.dumps({"type": "unknown"})
-        with pytest.raises(ValueError, match="Unknown message type"):
-            parse_client_message(raw)
+    assert spliced == encode_welcome(welcome)
@@ -12,370 +12,394 @@ from wormhole.persistence import EventPersistence
 from wormhole.session import SessionState, WormholeSession
 
 
-class TestSessionCreation:
-    """Tests for session creation."""
-
-    def test_creates_with_correct_state(
-        self, tmp_path: Path, event_persistence: EventPersistence
-    ) -> None:
-        session = WormholeSession(
-            name="test", directory=tmp_path, event_persistence=event_persistence
-        )
-        assert session.name == "test"
-        assert session.directory == tmp_path
-        assert session.state == SessionState.IDLE
-        assert session.claude_session_id is None
-        assert session.cost_usd == 0.0
-
-    def test_event_buffer_empty_initially(
-        self, tmp_path: Path, event_persistence: EventPersistence
-    ) -> None:
-        session = WormholeSession(
-            name="test", directory=tmp_path, event_persistence=event_persistence
-        )
-        events = session.get_events_since(0)
-        assert events == []
-
-    def test_custom_buffer_size(
-        self, tmp_path: Path, event_persistence: EventPersistence
-    ) -> None:
-        session = WormholeSession(
-            name="test",
-            directory=tmp_path,
-            buffer_size_bytes=1024,
-            event_persistence=event_persistence,
-        )
-        assert session.buffer_size_bytes == 1024
-
-
-class TestEventBuffering:
-    """Tests for event buffering."""
-
-    @pytest.mark.asyncio
-    async def test_buffer_respects_max_size(
-        self, tmp_path: Path, event_persistence: EventPersistence
-    ) -> None:
-        # Use a small buffer that can hold ~2-3 events
-        # Each event is roughly 100 bytes overhead + message content
-        session = WormholeSession(
-            name="test",
-            directory=tmp_path,
-            buffer_size_bytes=500,
-            event_persistence=event_persistence,
-        )
-
-        # Simulate adding events via internal method - each ~150 bytes
-        for i in range(10):
-            await session._handle_sdk_message(
-                {"type": "test", "index": i, "padding": "x" * 50}
-            )
-
-        # Memory buffer should have evicted older events to stay under size limit
-        # But persisted events should have all 10
-        assert len(session._event_buffer) < 10  # Memory buffer has evictions
-        # get_events_since uses persisted events, so should have all 10
-        events = session.get_events_since(0)
-        assert len(events) == 10  # All events persisted
-        # Verify the newest events are kept
-        assert events[-1].message["index"] == 9
-
-    @pytest.mark.asyncio
-    async def test_get_events_since_sequence(
-        self, tmp_path: Path, event_persistence: EventPersistence
-    ) -> None:
-        # Use default buffer size (2MB) - plenty of room for small events
-        session = WormholeSession(
-            name="test", directory=tmp_path, event_persistence=event_persistence
-        )
-
-        for i in range(5):
-            await session._handle_sdk_message({"type": "test", "index": i})
-
-        # Get events since sequence 3
-        events = session.get_events_since(3)
-        assert len(events) == 2
-        assert events[0].sequence == 4
-        assert events[1].sequence == 5
-
-    @pytest.mark.asyncio
-    async def test_events_have_correct_timestamps(
-        self, tmp_path: Path, event_persistence: EventPersistence
-    ) -> None:
-        session = WormholeSession(
-            name="test", directory=tmp_path, event_persistence=event_persistence
-        )
-
-        await session._handle_sdk_message({"type": "test"})
-        events = session.get_events_since(0)
-
-        assert len(events) == 1
-        assert events[0].timestamp is not None
-        assert events[0].sequence == 1
-
-
-class TestSDKMessageHandling:
-    """Tests for handling SDK messages."""
-
-    @pytest.mark.asyncio
-    async def test_captures_session_id_from_init(
-        self, tmp_path: Path, event_persistence: EventPersistence
-    ) -> None:
-        session = WormholeSession(
-            name="test", directory=tmp_path, event_persistence=event_persistence
-        )
-
-        # SDK SystemMessage structure
-        await session._handle_sdk_message({
+# Tests for session creation.
+def test_session_creates_with_correct_state(
+    tmp_path: Path, event_persistence: EventPersistence
+) -> None:
+    session = WormholeSession(name="test", directory=tmp_path, event_persistence=event_persistence)
+    assert session.name == "test"
+    assert session.directory == tmp_path
+    assert session.state == SessionState.IDLE
+    assert session.claude_session_id is None
+    assert session.cost_usd == 0.0
+
+
+def test_event_buffer_empty_initially(tmp_path: Path, event_persistence: EventPersistence) -> None:
+    session = WormholeSession(name="test", directory=tmp_path, event_persistence=event_persistence)
+    events = session.get_events_since(0)
+    assert events == []
+
+
+def test_custom_buffer_size(tmp_path: Path, event_persistence: EventPersistence) -> None:
+    session = WormholeSession(
+        name="test",
+        directory=tmp_path,
+        buffer_size_bytes=1024,
+        event_persistence=event_persistence,
+    )
+    assert session.buffer_size_bytes == 1024
+
+
+# Tests for event buffering.
+@pytest.mark.asyncio
+async def test_buffer_respects_max_size(
+    tmp_path: Path, event_persistence: EventPersistence
+) -> None:
+    # Use a small buffer that can hold ~2-3 events
+    # Each event is roughly 100 bytes overhead + message content
+    session = WormholeSession(
+        name="test",
+        directory=tmp_path,
+        buffer_size_bytes=500,
+        event_persistence=event_persistence,
+    )
+
+    # Simulate adding events via internal method - each ~150 bytes
+    for i in range(10):
+        await session._handle_sdk_message({"type": "test", "index": i, "padding": "x" * 50})
+
+    # Memory buffer should have evicted older events to stay under size limit
+    # But persisted events should have all 10
+    assert len(session._event_messages) < 10  # Memory buffer has evictions
+    # get_events_since uses persisted events, so should have all 10
+    events = session.get_events_since(0)
+    assert len(events) == 10  # All events persisted
+    # Verify the newest events are kept
+    assert events[-1].message["index"] == 9
+
+
+@pytest.mark.asyncio
+async def test_get_events_since_sequence(
+    tmp_path: Path, event_persistence: EventPersistence
+) -> None:
+    # Use default buffer size (2MB) - plenty of room for small events
+    session = WormholeSession(name="test", directory=tmp_path, event_persistence=event_persistence)
+
+    for i in range(5):
+        await session._handle_sdk_message({"type": "test", "index": i})
+
+    # Get events since sequence 3
+    events = session.get_events_since(3)
+    assert len(events) == 2
+    assert events[0].sequence == 4
+    assert events[1].sequence == 5
+
+
+@pytest.mark.asyncio
+async def test_get_events_since_evicted_range_reads_persistence(
+    tmp_path: Path, event_persistence: EventPersistence
+) -> None:
+    session = WormholeSession(
+        name="test",
+        directory=tmp_path,
+        buffer_size_bytes=500,
+        event_persistence=event_persistence,
+    )
+
+    for i in range(20):
+        await session._handle_sdk_message({"type": "test", "index": i, "padding": "x" * 50})
+
+    # Sequence 5 has long been evicted from memory, so this comes from disk
+    events = session.get_events_since(4)
+    assert [e.sequence for e in events] == list(range(5, 21))
+
+
+@pytest.mark.asyncio
+async def test_get_events_since_served_from_buffer(
+    tmp_path: Path, event_persistence: EventPersistence, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    session = WormholeSession(name="test", directory=tmp_path, event_persistence=event_persistence)
+
+    for i in range(5):
+        await session._handle_sdk_message({"type": "test", "index": i})
+
+    def fail(*args: Any, **kwargs: Any) -> None:
+        raise AssertionError("buffered range should not hit persistence")
+
+    monkeypatch.setattr(event_persistence, "load_events", fail)
+
+    assert [e.sequence for e in session.get_events_since(0)] == [1, 2, 3, 4, 5]
+    assert [e.sequence for e in session.get_events_since(3)] == [4, 5]
+    assert session.get_events_since(5) == []
+
+
+@pytest.mark.asyncio
+async def test_events_have_correct_timestamps(
+    tmp_path: Path, event_persistence: EventPersistence
+) -> None:
+    session = WormholeSession(name="test", directory=tmp_path, event_persistence=event_persistence)
+
+    await session._handle_sdk_message({"type": "test"})
+    events = session.get_events_since(0)
+
+    assert len(events) == 1
+    assert events[0].timestamp is not None
+    assert events[0].sequence == 1
+
+
+# Tests for handling SDK messages.
+@pytest.mark.asyncio
+async def test_captures_session_id_from_init(
+    tmp_path: Path, event_persistence: EventPersistence
+) -> None:
+    session = WormholeSession(name="test", directory=tmp_path, event_persistence=event_persistence)
+
+    # SDK SystemMessage structure
+    await session._handle_sdk_message(
+        {
             "subtype": "init",
             "data": {
                 "session_id": "abc-123-def",
                 "cwd": str(tmp_path),
                 "tools": ["Bash", "Read"],
-            }
-        })
+            },
+        }
+    )
 
-        assert session.claude_session_id == "abc-123-def"
+    assert session.claude_session_id == "abc-123-def"
 
-    @pytest.mark.asyncio
-    async def test_updates_cost_from_result(
-        self, tmp_path: Path, event_persistence: EventPersistence
-    ) -> None:
-        session = WormholeSession(
-            name="test", directory=tmp_path, event_persistence=event_persistence
-        )
 
-        await session._handle_sdk_message({
+@pytest.mark.asyncio
+async def test_updates_cost_from_result(
+    tmp_path: Path, event_persistence: EventPersistence
+) -> None:
+    session = WormholeSession(name="test", directory=tmp_path, event_persistence=event_persistence)
+
+    await session._handle_sdk_message(
+        {
             "subtype": "success",
             "total_cost_usd": 0.0234,
             "session_id": "abc",
-        })
+        }
+    )
 
-        assert session.cost_usd == 0.0234
+    assert session.cost_usd == 0.0234
 
-    @pytest.mark.asyncio
-    async def test_broadcasts_events(
-        self, tmp_path: Path, event_persistence: EventPersistence
-    ) -> None:
-        session = WormholeSession(
-            name="test", directory=tmp_path, event_persistence=event_persistence
-        )
 
-        received_messages: list[Any] = []
+@pytest.mark.asyncio
+async def test_broadcasts_events(tmp_path: Path, event_persistence: EventPersistence) -> None:
+    session = WormholeSession(name="test", directory=tmp_path, event_persistence=event_persistence)
 
-        async def capture_broadcast(msg: Any) -> None:
-            received_messages.append(msg)
+    received_messages: list[Any] = []
 
-        session.set_broadcast_callback(capture_broadcast)
+    async def capture_broadcast(msg: Any) -> None:
+        received_messages.append(msg)
 
-        await session._handle_sdk_message({"type": "test", "data": "value"})
+    session.set_broadcast_callback(capture_broadcast)
 
-        assert len(received_messages) == 1
-        assert received_messages[0].session == "test"
-        assert received_messages[0].sequence == 1
+    await session._handle_sdk_message({"type": "test", "data": "value"})
 
-    @pytest.mark.asyncio
-    async def test_handles_dataclass_messages(
-        self, tmp_path: Path, event_persistence: EventPersistence
-    ) -> None:
-        """Test that SDK dataclass messages are properly converted."""
-        session = WormholeSession(
-            name="test", directory=tmp_path, event_persistence=event_persistence
-        )
+    assert len(received_messages) == 1
+    assert received_messages[0].session == "test"
+    assert received_messages[0].sequence == 1
 
-        @dataclass
-        class MockSDKMessage:
-            subtype: str
-            data: dict[str, Any]
 
-        msg = MockSDKMessage(subtype="init", data={"session_id": "test-123"})
-        await session._handle_sdk_message(msg)
+@pytest.mark.asyncio
+async def test_handles_dataclass_messages(
+    tmp_path: Path, event_persistence: EventPersistence
+) -> None:
+    """Test that SDK dataclass messages are properly converted."""
+    session = WormholeSession(name="test", directory=tmp_path, event_persistence=event_persistence)
 
-        assert session.claude_session_id == "test-123"
+    @dataclass
+    class MockSDKMessage:
+        subtype: str
+        data: dict[str, Any]
 
+    msg = MockSDKMessage(subtype="init", data={"session_id": "test-123"})
+    await session._handle_sdk_message(msg)
 
-class TestPermissionHandling:
-    """Tests for permission request/response."""
+    assert session.claude_session_id == "test-123"
 
-    def test_respond_to_unknown_request_returns_false(
-        self, tmp_path: Path, event_persistence: EventPersistence
-    ) -> None:
-        session = WormholeSession(
-            name="test", directory=tmp_path, event_persistence=event_persistence
-        )
-        result = session.respond_to_permission("nonexistent", "allow")
-        assert result is False
-
-    @pytest.mark.asyncio
-    async def test_permission_callback_blocks_until_response(
-        self, tmp_path: Path, event_persistence: EventPersistence
-    ) -> None:
-        """Verify can_use_tool blocks until permission response received."""
-        session = WormholeSession(
-            name="test", directory=tmp_path, event_persistence=event_persistence
-        )
 
-        received_requests: list[Any] = []
+# Tests for permission request/response.
+def test_respond_to_unknown_request_returns_false(
+    tmp_path: Path, event_persistence: EventPersistence
+) -> None:
+    session = WormholeSession(name="test", directory=tmp_path, event_persistence=event_persistence)
+    result = session.respond_to_permission("nonexistent", "allow")
+    assert result is False
+
+
+@pytest.mark.asyncio
+async def test_pending_permission_infos_built_once(
+    tmp_path: Path, event_persistence: EventPersistence
+) -> None:
+    session = WormholeSession(name="test", directory=tmp_path, event_persistence=event_persistence)
+    requests: asyncio.Queue[Any] = asyncio.Queue()
+    session.set_broadcast_callback(requests.put)
+
+    task = asyncio.create_task(session._permission_handler("Bash", {"command": "ls"}, MagicMock()))
+    await requests.get()
 
-        async def capture_broadcast(msg: Any) -> None:
-            received_requests.append(msg)
+    (info,) = session.get_pending_permission_infos()
+    assert info.session_name == "test"
+    assert info.tool_name == "Bash"
+    assert session.get_pending_permission_infos()[0] is info
 
-        session.set_broadcast_callback(capture_broadcast)
+    session.respond_to_permission(info.request_id, "allow")
+    await task
+    assert session.get_pending_permission_infos() == []
 
-        # Mock the context
-        mock_context = MagicMock()
 
-        # Start permission request in background
-        async def request_permission() -> Any:
-            return await session._permission_handler(
-                "Write",
-                {"file_path": "test.py", "content": "hello"},
-                mock_context,
-            )
+@pytest.mark.asyncio
+async def test_permission_callback_blocks_until_response(
+    tmp_path: Path, event_persistence: EventPersistence
+) -> None:
+    """Verify can_use_tool blocks until permission response received."""
+    session = WormholeSession(name="test", directory=tmp_path, event_persistence=event_persistence)
+
+    requests: asyncio.Queue[Any] = asyncio.Queue()
+    session.set_broadcast_callback(requests.put)
+
+    # Mock the context
+    mock_context = MagicMock()
+
+    # Start permission request in background
+    async def request_permission() -> Any:
+        return await session._permission_handler(
+            "Write",
+            {"file_path": "test.py", "content": "hello"},
+            mock_context,
+        )
+
+    task = asyncio.create_task(request_permission())
 
-        task = asyncio.create_task(request_permission())
+    # Wait for the request to be broadcast
+    request = await requests.get()
 
-        # Wait a bit for the request to be registered
-        await asyncio.sleep(0.01)
+    # Verify state changed
+    assert session.state == SessionState.AWAITING_APPROVAL
+    assert requests.empty()
+    request_id = request.request_id
 
-        # Verify state changed
-        assert session.state == SessionState.AWAITING_APPROVAL
+    # Respond to permission
+    assert session.respond_to_permission(request_id, "allow") is True
 
-        # Verify request was broadcast
-        assert len(received_requests) == 1
-        request_id = received_requests[0].request_id
+    # Wait for result
+    result = await task
 
-        # Respond to permission
-        assert session.respond_to_permission(request_id, "allow") is True
+    # Verify state changed back
+    assert session.state == SessionState.WORKING
 
-        # Wait for result
-        result = await task
+    # Verify result is PermissionResultAllow
+    assert result.behavior == "allow"
 
-        # Verify state changed back
-        assert session.state == SessionState.WORKING
 
-        # Verify result is PermissionResultAllow
-        assert result.behavior == "allow"
+@pytest.mark.asyncio
+async def test_permission_deny_returns_correct_result(
+    tmp_path: Path, event_persistence: EventPersistence
+) -> None:
+    session = WormholeSession(name="test", directory=tmp_path, event_persistence=event_persistence)
 
-    @pytest.mark.asyncio
-    async def test_permission_deny_returns_correct_result(
-        self, tmp_path: Path, event_persistence: EventPersistence
-    ) -> None:
-        session = WormholeSession(
-            name="test", directory=tmp_path, event_persistence=event_persistence
+    requests: asyncio.Queue[Any] = asyncio.Queue()
+    session.set_broadcast_callback(requests.put)
+    mock_context = MagicMock()
+
+    async def request_permission() -> Any:
+        return await session._permission_handler(
+            "Bash",
+            {"command": "rm -rf /"},
+            mock_context,
         )
 
-        received_requests: list[Any] = []
+    task = asyncio.create_task(request_permission())
+    request = await requests.get()
 
-        async def capture_broadcast(msg: Any) -> None:
-            received_requests.append(msg)
+    session.respond_to_permission(request.request_id, "deny")
 
-        session.set_broadcast_callback(capture_broadcast)
-        mock_context = MagicMock()
+    result = await task
 
-        async def request_permission() -> Any:
-            return await session._permission_handler(
-                "Bash",
-                {"command": "rm -rf /"},
-                mock_context,
-            )
+    assert result.behavior == "deny"
+    assert result.message == "User denied"
+    assert result.interrupt is False
 
-        task = asyncio.create_task(request_permission())
-        await asyncio.sleep(0.01)
 
-        request_id = received_requests[0].request_id
-        session.respond_to_permission(request_id, "deny")
+@pytest.mark.asyncio
+async def test_permission_allow_returns_tool_input(
+    tmp_path: Path, event_persistence: EventPersistence
+) -> None:
+    session = WormholeSession(name="test", directory=tmp_path, event_persistence=event_persistence)
 
-        result = await task
+    requests: asyncio.Queue[Any] = asyncio.Queue()
+    session.set_broadcast_callback(requests.put)
+    tool_input = {"file_path": "a.py", "content": "x = 1"}
 
-        assert result.behavior == "deny"
-        assert result.message == "User denied"
-        assert result.interrupt is False
+    task = asyncio.create_task(session._permission_handler("Write", tool_input, MagicMock()))
+    request = await requests.get()
 
-    @pytest.mark.asyncio
-    async def test_multiple_concurrent_permissions(
-        self, tmp_path: Path, event_persistence: EventPersistence
-    ) -> None:
-        """Test handling multiple permission requests concurrently."""
-        session = WormholeSession(
-            name="test", directory=tmp_path, event_persistence=event_persistence
-        )
+    session.respond_to_permission(request.request_id, "allow")
+    result = await task
 
-        received_requests: list[Any] = []
+    assert result.behavior == "allow"
+    assert result.updated_input == tool_input
 
-        async def capture_broadcast(msg: Any) -> None:
-            received_requests.append(msg)
 
-        session.set_broadcast_callback(capture_broadcast)
-        mock_context = MagicMock()
+@pytest.mark.asyncio
+async def test_multiple_concurrent_permissions(
+    tmp_path: Path, event_persistence: EventPersistence
+) -> None:
+    """Test handling multiple permission requests concurrently."""
+    session = WormholeSession(name="test", directory=tmp_path, event_persistence=event_persistence)
 
-        # Start two permission requests
-        task1 = asyncio.create_task(
-            session._permission_handler("Write", {"file": "a.py"}, mock_context)
-        )
-        await asyncio.sleep(0.01)
+    requests: asyncio.Queue[Any] = asyncio.Queue()
+    session.set_broadcast_callback(requests.put)
+    mock_context = MagicMock()
 
-        task2 = asyncio.create_task(
-            session._permission_handler("Bash", {"cmd": "ls"}, mock_context)
-        )
-        await asyncio.sleep(0.01)
+    # Start two permission requests, then respond in reverse order
+    async with asyncio.TaskGroup() as tg:
+        task1 = tg.create_task(session._permission_handler("Write", {"file": "a.py"}, mock_context))
+        request1 = await requests.get()
 
-        assert len(received_requests) == 2
+        task2 = tg.create_task(session._permission_handler("Bash", {"cmd": "ls"}, mock_context))
+        request2 = await requests.get()
 
-        # Respond in reverse order
-        session.respond_to_permission(received_requests[1].request_id, "allow")
-        session.respond_to_permission(received_requests[0].request_id, "deny")
+        session.respond_to_permission(request2.request_id, "allow")
+        session.respond_to_permission(request1.request_id, "deny")
 
-        result1 = await task1
-        result2 = await task2
+    result1 = task1.result()
+    result2 = task2.result()
 
-        assert result1.behavior == "deny"
-        assert result2.behavior == "allow"
+    assert result1.behavior == "deny"
+    assert result2.behavior == "allow"
 
 
-class TestSessionStateTransitions:
-    """Test session state machine transitions."""
+# Test session state machine transitions.
+def test_initial_state_is_idle(tmp_path: Path, event_persistence: EventPersistence) -> None:
+    session = WormholeSession(name="test", directory=tmp_path, event_persistence=event_persistence)
+    assert session.state == SessionState.IDLE
 
-    def test_initial_state_is_idle(
-        self, tmp_path: Path, event_persistence: EventPersistence
-    ) -> None:
-        session = WormholeSession(
-            name="test", directory=tmp_path, event_persistence=event_persistence
-        )
-        assert session.state == SessionState.IDLE
-
-    @pytest.mark.asyncio
-    async def test_query_changes_state_to_working(
-        self, tmp_path: Path, event_persistence: EventPersistence
-    ) -> None:
-        session = WormholeSession(
-            name="test", directory=tmp_path, event_persistence=event_persistence
-        )
 
-        # Mock the client
-        mock_client = AsyncMock()
-        mock_client.query = AsyncMock()
-        mock_client.receive_response = MagicMock(return_value=iter([]))
-        session._client = mock_client
+@pytest.mark.asyncio
+async def test_query_changes_state_to_working(
+    tmp_path: Path, event_persistence: EventPersistence
+) -> None:
+    session = WormholeSession(name="test", directory=tmp_path, event_persistence=event_persistence)
 
-        await session.query("test prompt")
+    # Mock the client
+    mock_client = AsyncMock()
+    mock_client.query = AsyncMock()
+    mock_client.receive_response = MagicMock(return_value=iter([]))
+    session._client = mock_client
 
-        assert session.state == SessionState.WORKING
-        mock_client.query.assert_called_once_with("test prompt")
+    await session.query("test prompt")
 
-    @pytest.mark.asyncio
-    async def test_stop_resets_state_to_idle(
-        self, tmp_path: Path, event_persistence: EventPersistence
-    ) -> None:
-        session = WormholeSession(
-            name="test", directory=tmp_path, event_persistence=event_persistence
-        )
-        session.state = SessionState.WORKING
+    assert session.state == SessionState.WORKING
+    mock_client.query.assert_called_once_with("test prompt")
+
+
+@pytest.mark.asyncio
+async def test_stop_resets_state_to_idle(
+    tmp_path: Path, event_persistence: EventPersistence
+) -> None:
+    session = WormholeSession(name="test", directory=tmp_path, event_persistence=event_persistence)
+    session.state = SessionState.WORKING
 
-        mock_client = AsyncMock()
-        session._client = mock_client
+    mock_client = AsyncMock()
+    session._client = mock_client
 
-        await session.stop()
+    await session.stop()
 
-        assert session.state == SessionState.IDLE
-        assert session._client is None
-        mock_client.disconnect.assert_called_once()
+    assert session.state == SessionState.IDLE
+    assert session._client is None
+    mock_client.disconnect.assert_called_once()
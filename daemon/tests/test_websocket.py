@@ -2,40 +2,51 @@
 
 import asyncio
 import json
+import time
+from datetime import datetime
 from pathlib import Path
 from unittest.mock import AsyncMock, MagicMock
 
 import pytest
+from websockets.exceptions import ConnectionClosed
 
 from wormhole.daemon import WormholeDaemon
-from wormhole.persistence import EventPersistence, SessionPersistence
 from wormhole.protocol import (
+    ControlMessage,
     EventMessage,
     HelloMessage,
     InputMessage,
+    PermissionRequestMessage,
     PermissionResponseMessage,
     SubscribeMessage,
     SyncMessage,
 )
+from wormhole.session import PendingPermission, SessionState, _PermissionSlot
 
 
 class MockWebSocket:
     """Mock WebSocket for testing."""
 
     def __init__(self) -> None:
-        self.sent_messages: list[str] = []
+        self.sent_messages: list[str | bytes] = []
         self.incoming_messages: asyncio.Queue[str] = asyncio.Queue()
         self._closed = False
+        self.close_code: int | None = None
 
-    async def send(self, data: str) -> None:
+    async def send(self, data: str | bytes) -> None:
         if not self._closed:
             self.sent_messages.append(data)
 
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
     async def recv(self) -> str:
         return await self.incoming_messages.get()
 
-    async def close(self) -> None:
+    async def close(self, code: int = 1000, reason: str = "") -> None:
         self._closed = True
+        self.close_code = code
 
     def __aiter__(self) -> "MockWebSocket":
         return self
@@ -54,369 +65,477 @@ class MockWebSocket:
         self.incoming_messages.put_nowait(msg)
 
 
-class TestWebSocketHandshake:
-    """Tests for WebSocket handshake (hello/welcome)."""
-
-    @pytest.mark.asyncio
-    async def test_hello_receives_welcome(
-        self,
-        event_persistence: EventPersistence,
-        session_persistence: SessionPersistence,
-    ) -> None:
-        daemon = WormholeDaemon(
-            port=7117,
-            event_persistence=event_persistence,
-            session_persistence=session_persistence,
-        )
-        ws = MockWebSocket()
-
-        # Queue hello message
-        hello = HelloMessage(client_version="1.0.0", device_name="Test iPhone")
-        ws.queue_message(hello.model_dump_json())
-
-        # Handle connection (runs until no more messages)
-        await daemon._handle_connection(ws)
-
-        # Verify welcome was sent
-        assert len(ws.sent_messages) == 1
-        welcome = json.loads(ws.sent_messages[0])
-        assert welcome["type"] == "welcome"
-        assert welcome["server_version"] == "0.1.0"
-        assert "machine_name" in welcome
-        assert "sessions" in welcome
-
-    @pytest.mark.asyncio
-    async def test_welcome_includes_session_list(
-        self,
-        tmp_path: Path,
-        event_persistence: EventPersistence,
-        session_persistence: SessionPersistence,
-    ) -> None:
-        daemon = WormholeDaemon(
-            port=7117,
-            event_persistence=event_persistence,
-            session_persistence=session_persistence,
-        )
-
-        # Create a session
-        daemon.create_session("test-session", tmp_path)
-
-        ws = MockWebSocket()
-        hello = HelloMessage(client_version="1.0.0", device_name="Test iPhone")
-        ws.queue_message(hello.model_dump_json())
-
-        await daemon._handle_connection(ws)
-
-        welcome = json.loads(ws.sent_messages[0])
-        assert len(welcome["sessions"]) == 1
-        assert welcome["sessions"][0]["name"] == "test-session"
-        assert welcome["sessions"][0]["state"] == "idle"
-
-
-class TestEventStreaming:
-    """Tests for streaming events to subscribed clients."""
-
-    @pytest.mark.asyncio
-    async def test_broadcast_sends_to_all_clients(
-        self,
-        event_persistence: EventPersistence,
-        session_persistence: SessionPersistence,
-    ) -> None:
-        daemon = WormholeDaemon(
-            port=7117,
-            event_persistence=event_persistence,
-            session_persistence=session_persistence,
-        )
-
-        # Add mock clients
-        ws1 = MockWebSocket()
-        ws2 = MockWebSocket()
-        daemon._clients.add(ws1)
-        daemon._clients.add(ws2)
-
-        # Create an event message
-        from datetime import datetime
-
-        event = EventMessage(
-            session="test",
-            sequence=1,
-            timestamp=datetime.now(),
-            message={"type": "test"},
-        )
-
-        await daemon._broadcast(event)
-
-        # Both clients should have received the message
-        assert len(ws1.sent_messages) == 1
-        assert len(ws2.sent_messages) == 1
-
-    @pytest.mark.asyncio
-    async def test_broadcast_handles_disconnected_clients(
-        self,
-        event_persistence: EventPersistence,
-        session_persistence: SessionPersistence,
-    ) -> None:
-        daemon = WormholeDaemon(
-            port=7117,
-            event_persistence=event_persistence,
-            session_persistence=session_persistence,
-        )
-
-        ws1 = MockWebSocket()
-        ws2 = MockWebSocket()
-        ws2._closed = True  # Simulate disconnected client
-
-        daemon._clients.add(ws1)
-        daemon._clients.add(ws2)
-
-        from datetime import datetime
-
-        event = EventMessage(
-            session="test",
-            sequence=1,
-            timestamp=datetime.now(),
-            message={"type": "test"},
-        )
-
-        # Should not raise
-        await daemon._broadcast(event)
-
-        assert len(ws1.sent_messages) == 1
-
-
-class TestSubscriptions:
-    """Tests for session subscription handling."""
-
-    @pytest.mark.asyncio
-    async def test_subscribe_to_specific_sessions(
-        self,
-        tmp_path: Path,
-        event_persistence: EventPersistence,
-        session_persistence: SessionPersistence,
-    ) -> None:
-        daemon = WormholeDaemon(
-            port=7117,
-            event_persistence=event_persistence,
-            session_persistence=session_persistence,
-        )
-        daemon.create_session("session-a", tmp_path / "a")
-        daemon.create_session("session-b", tmp_path / "b")
-
-        ws = MockWebSocket()
-        subscribed: set[str] = set()
-
-        # Test subscribe to specific session
-        msg = SubscribeMessage(sessions=["session-a"])
-        await daemon._handle_message(ws, msg, subscribed)
-
-        assert "session-a" in subscribed
-        assert "session-b" not in subscribed
-
-    @pytest.mark.asyncio
-    async def test_subscribe_to_all_sessions(
-        self,
-        tmp_path: Path,
-        event_persistence: EventPersistence,
-        session_persistence: SessionPersistence,
-    ) -> None:
-        daemon = WormholeDaemon(
-            port=7117,
-            event_persistence=event_persistence,
-            session_persistence=session_persistence,
-        )
-        daemon.create_session("session-a", tmp_path / "a")
-        daemon.create_session("session-b", tmp_path / "b")
-
-        ws = MockWebSocket()
-        subscribed: set[str] = set()
-
-        msg = SubscribeMessage(sessions="*")
-        await daemon._handle_message(ws, msg, subscribed)
-
-        assert "session-a" in subscribed
-        assert "session-b" in subscribed
-
-
-class TestPermissionResponseRouting:
-    """Tests for routing permission responses to sessions."""
-
-    @pytest.mark.asyncio
-    async def test_permission_response_routes_to_correct_session(
-        self,
-        tmp_path: Path,
-        event_persistence: EventPersistence,
-        session_persistence: SessionPersistence,
-    ) -> None:
-        daemon = WormholeDaemon(
-            port=7117,
-            event_persistence=event_persistence,
-            session_persistence=session_persistence,
-        )
-        session = daemon.create_session("test", tmp_path)
-
-        # Create a pending permission in the session
-        future: asyncio.Future[str] = asyncio.get_event_loop().create_future()
-        request_id = "test-request-123"
-        session._pending_permissions[request_id] = future
-
-        ws = MockWebSocket()
-        subscribed: set[str] = set()
-
-        # Send permission response
-        msg = PermissionResponseMessage(
+def _connect(daemon: WormholeDaemon, *clients: MockWebSocket) -> None:
+    """Register clients as connected and subscribed to every session."""
+    for ws in clients:
+        daemon._register_client(ws)
+        daemon._wildcard_subscribers.add(ws)
+
+
+# Tests for WebSocket handshake (hello/welcome).
+@pytest.mark.asyncio
+async def test_hello_receives_welcome(daemon: WormholeDaemon) -> None:
+    ws = MockWebSocket()
+
+    # Queue hello message
+    hello = HelloMessage(client_version="1.0.0", device_name="Test iPhone")
+    ws.queue_message(hello.model_dump_json())
+
+    # Handle connection (runs until no more messages)
+    await daemon._handle_connection(ws)
+
+    # Verify welcome was sent
+    assert len(ws.sent_messages) == 1
+    welcome = json.loads(ws.sent_messages[0])
+    assert welcome["type"] == "welcome"
+    assert welcome["server_version"] == "0.1.0"
+    assert "machine_name" in welcome
+    assert "sessions" in welcome
+
+
+@pytest.mark.asyncio
+async def test_welcome_includes_session_list(
+    tmp_path: Path,
+    daemon: WormholeDaemon,
+) -> None:
+    # Create a session
+    daemon.create_session("test-session", tmp_path)
+
+    ws = MockWebSocket()
+    hello = HelloMessage(client_version="1.0.0", device_name="Test iPhone")
+    ws.queue_message(hello.model_dump_json())
+
+    await daemon._handle_connection(ws)
+
+    welcome = json.loads(ws.sent_messages[0])
+    assert len(welcome["sessions"]) == 1
+    assert welcome["sessions"][0]["name"] == "test-session"
+    assert welcome["sessions"][0]["state"] == "idle"
+
+
+def test_welcome_frame_reused_until_a_session_changes(
+    tmp_path: Path,
+    daemon: WormholeDaemon,
+) -> None:
+    session = daemon.create_session("test-session", tmp_path)
+
+    first = daemon._welcome_frame()
+    assert daemon._welcome_frame() is first
+
+    session.state = SessionState.WORKING
+    changed = daemon._welcome_frame()
+    assert changed is not first
+    assert json.loads(changed)["sessions"][0]["state"] == "working"
+
+
+@pytest.mark.asyncio
+async def test_welcome_frame_rebuilt_after_permission_cost_and_close(
+    tmp_path: Path,
+    daemon: WormholeDaemon,
+) -> None:
+    session = daemon.create_session("test-session", tmp_path)
+    requests: asyncio.Queue[PermissionRequestMessage] = asyncio.Queue()
+    session.set_broadcast_callback(requests.put)
+
+    task = asyncio.create_task(session._permission_handler("Bash", {"cmd": "ls"}, MagicMock()))
+    request = await requests.get()
+    (info,) = json.loads(daemon._welcome_frame())["sessions"][0]["pending_permissions"]
+    assert info["request_id"] == request.request_id
+
+    session.respond_to_permission(request.request_id, "allow")
+    await task
+    assert json.loads(daemon._welcome_frame())["sessions"][0]["pending_permissions"] == []
+
+    await session._handle_sdk_message({"type": "result", "total_cost_usd": 0.25})
+    assert json.loads(daemon._welcome_frame())["sessions"][0]["cost_usd"] == 0.25
+
+    await daemon.close_session("test-session")
+    assert json.loads(daemon._welcome_frame())["sessions"] == []
+
+
+# Tests for streaming events to subscribed clients.
+@pytest.mark.asyncio
+async def test_broadcast_sends_to_all_clients(daemon: WormholeDaemon) -> None:
+    # Add mock clients
+    ws1 = MockWebSocket()
+    ws2 = MockWebSocket()
+    _connect(daemon, ws1, ws2)
+
+    # Create an event message
+    event = EventMessage(
+        session="test",
+        sequence=1,
+        timestamp=time.time_ns(),
+        message={"type": "test"},
+    )
+
+    await daemon._broadcast(event)
+    await asyncio.sleep(0)  # Let the per-client send tasks run
+
+    # Both clients should have received the message
+    assert len(ws1.sent_messages) == 1
+    assert len(ws2.sent_messages) == 1
+
+
+@pytest.mark.asyncio
+async def test_broadcast_handles_disconnected_clients(daemon: WormholeDaemon) -> None:
+    ws1 = MockWebSocket()
+    ws2 = MockWebSocket()
+    ws2._closed = True  # Simulate disconnected client
+
+    _connect(daemon, ws1, ws2)
+
+    event = EventMessage(
+        session="test",
+        sequence=1,
+        timestamp=time.time_ns(),
+        message={"type": "test"},
+    )
+
+    # Should not raise
+    await daemon._broadcast(event)
+    await asyncio.sleep(0)
+
+    assert len(ws1.sent_messages) == 1
+    assert daemon._clients == {ws1}
+    assert ws2 not in daemon._wildcard_subscribers
+
+
+@pytest.mark.asyncio
+async def test_broadcast_drops_clients_whose_connection_closed(daemon: WormholeDaemon) -> None:
+    ws1 = MockWebSocket()
+    ws2 = MockWebSocket()
+    ws2.send = AsyncMock(side_effect=ConnectionClosed(None, None))  # type: ignore[method-assign]
+
+    _connect(daemon, ws1, ws2)
+
+    event = EventMessage(
+        session="test",
+        sequence=1,
+        timestamp=time.time_ns(),
+        message={"type": "test"},
+    )
+
+    await daemon._broadcast(event)
+    await asyncio.sleep(0)
+
+    assert len(ws1.sent_messages) == 1
+    assert daemon._clients == {ws1}
+
+
+@pytest.mark.asyncio
+async def test_broadcast_with_backpressure_awaits_sends(daemon: WormholeDaemon) -> None:
+    ws1 = MockWebSocket()
+    ws2 = MockWebSocket()
+    ws2.send = AsyncMock(side_effect=ConnectionClosed(None, None))  # type: ignore[method-assign]
+
+    _connect(daemon, ws1, ws2)
+
+    event = EventMessage(
+        session="test",
+        sequence=1,
+        timestamp=time.time_ns(),
+        message={"type": "test"},
+    )
+
+    await daemon._broadcast(event, backpressure=True)
+
+    # Delivered before returning, without yielding to send tasks
+    assert len(ws1.sent_messages) == 1
+    assert daemon._clients == {ws1}
+
+
+@pytest.mark.asyncio
+async def test_outbox_overflow_closes_client(daemon: WormholeDaemon) -> None:
+    ws = MockWebSocket()
+    daemon._register_client(ws)
+    outbox, task = daemon._outboxes[ws]
+    outbox.maxsize = 2
+
+    # The writer task has not run yet, so the third frame overflows the queue
+    for i in range(3):
+        outbox.put(f"event-{i}".encode())
+    await task
+
+    assert ws.sent_messages == []
+    assert ws.close_code == 1013
+    assert ws not in daemon._clients
+    assert ws not in daemon._outboxes
+
+
+# Tests for session subscription handling.
+@pytest.mark.asyncio
+async def test_subscribe_to_specific_sessions(
+    tmp_path: Path,
+    daemon: WormholeDaemon,
+) -> None:
+    daemon.create_session("session-a", tmp_path / "a")
+    daemon.create_session("session-b", tmp_path / "b")
+
+    ws = MockWebSocket()
+    subscribed: set[str] = set()
+
+    # Test subscribe to specific session
+    msg = SubscribeMessage(sessions=["session-a"])
+    await daemon._handle_message(ws, msg, subscribed)
+
+    assert "session-a" in subscribed
+    assert "session-b" not in subscribed
+
+
+@pytest.mark.asyncio
+async def test_subscribe_to_all_sessions(tmp_path: Path, daemon: WormholeDaemon) -> None:
+    daemon.create_session("session-a", tmp_path / "a")
+    daemon.create_session("session-b", tmp_path / "b")
+
+    ws = MockWebSocket()
+    subscribed: set[str] = set()
+
+    msg = SubscribeMessage(sessions="*")
+    await daemon._handle_message(ws, msg, subscribed)
+
+    assert "session-a" in subscribed
+    assert "session-b" in subscribed
+
+
+@pytest.mark.asyncio
+async def test_broadcast_only_reaches_session_subscribers(
+    two_subdirs: tuple[Path, Path], daemon: WormholeDaemon
+) -> None:
+    dir_a, dir_b = two_subdirs
+    session_a = daemon.create_session("session-a", dir_a)
+    session_b = daemon.create_session("session-b", dir_b)
+
+    ws_a = MockWebSocket()
+    ws_all = MockWebSocket()
+    daemon._register_client(ws_a)
+    daemon._register_client(ws_all)
+    await daemon._handle_message(ws_a, SubscribeMessage(sessions=["session-a"]), set())
+    await daemon._handle_message(ws_all, SubscribeMessage(sessions="*"), set())
+
+    await session_a._handle_sdk_message({"type": "from_a"})
+    await session_b._handle_sdk_message({"type": "from_b"})
+    await asyncio.sleep(0)
+
+    assert [json.loads(m)["session"] for m in ws_a.sent_messages] == ["session-a"]
+    assert [json.loads(m)["session"] for m in ws_all.sent_messages] == [
+        "session-a",
+        "session-b",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_wildcard_subscription_covers_later_sessions(
+    tmp_path: Path, daemon: WormholeDaemon
+) -> None:
+    ws = MockWebSocket()
+    daemon._register_client(ws)
+    await daemon._handle_message(ws, SubscribeMessage(sessions="*"), set())
+
+    session = daemon.create_session("late", tmp_path)
+    await session._handle_sdk_message({"type": "test"})
+    await asyncio.sleep(0)
+
+    assert len(ws.sent_messages) == 1
+
+
+@pytest.mark.asyncio
+async def test_disconnect_clears_subscriptions(daemon: WormholeDaemon) -> None:
+    ws = MockWebSocket()
+    ws.queue_message(SubscribeMessage(sessions=["session-a"]).model_dump_json())
+    ws.queue_message(SubscribeMessage(sessions="*").model_dump_json())
+
+    await daemon._handle_connection(ws)
+
+    assert ws not in daemon._clients
+    assert ws not in daemon._outboxes
+    assert ws not in daemon._wildcard_subscribers
+    assert "session-a" not in daemon._session_subscribers
+
+
+# Tests for routing permission responses to sessions.
+@pytest.mark.asyncio
+async def test_permission_response_routes_to_correct_session(
+    tmp_path: Path,
+    daemon: WormholeDaemon,
+) -> None:
+    session = daemon.create_session("test", tmp_path)
+
+    # Create a pending permission in the session
+    future: asyncio.Future[str] = asyncio.get_running_loop().create_future()
+    request_id = "test-request-123"
+    session._pending_permissions[request_id] = _PermissionSlot(
+        future,
+        PendingPermission(
             request_id=request_id,
-            decision="allow",
-        )
-        await daemon._handle_message(ws, msg, subscribed)
-
-        # Future should be resolved
-        assert future.done()
-        assert future.result() == "allow"
-
-
-class TestInputHandling:
-    """Tests for handling input messages from phone."""
-
-    @pytest.mark.asyncio
-    async def test_input_message_calls_session_query(
-        self,
-        tmp_path: Path,
-        event_persistence: EventPersistence,
-        session_persistence: SessionPersistence,
-    ) -> None:
-        daemon = WormholeDaemon(
-            port=7117,
-            event_persistence=event_persistence,
-            session_persistence=session_persistence,
-        )
-        session = daemon.create_session("test", tmp_path)
-
-        # Mock the client
-        mock_client = AsyncMock()
-        mock_client.query = AsyncMock()
-        mock_client.receive_response = MagicMock(return_value=iter([]))
-        session._client = mock_client
-
-        ws = MockWebSocket()
-        subscribed: set[str] = set()
-
-        msg = InputMessage(session="test", text="Hello Claude")
-        await daemon._handle_message(ws, msg, subscribed)
-
-        mock_client.query.assert_called_once_with("Hello Claude")
-
-
-class TestControlMessages:
-    """Tests for control message handling."""
-
-    @pytest.mark.asyncio
-    async def test_interrupt_calls_session_interrupt(
-        self,
-        tmp_path: Path,
-        event_persistence: EventPersistence,
-        session_persistence: SessionPersistence,
-    ) -> None:
-        daemon = WormholeDaemon(
-            port=7117,
-            event_persistence=event_persistence,
-            session_persistence=session_persistence,
-        )
-        session = daemon.create_session("test", tmp_path)
-
-        mock_client = AsyncMock()
-        session._client = mock_client
-
-        ws = MockWebSocket()
-        subscribed: set[str] = set()
-
-        from wormhole.protocol import ControlMessage
-
-        msg = ControlMessage(session="test", action="interrupt")
-        await daemon._handle_message(ws, msg, subscribed)
-
-        mock_client.interrupt.assert_called_once()
-
-
-class TestSyncMessages:
-    """Tests for sync message handling."""
-
-    @pytest.mark.asyncio
-    async def test_sync_returns_events_since_sequence(
-        self,
-        tmp_path: Path,
-        event_persistence: EventPersistence,
-        session_persistence: SessionPersistence,
-    ) -> None:
-        daemon = WormholeDaemon(
-            port=7117,
-            event_persistence=event_persistence,
-            session_persistence=session_persistence,
-        )
-        session = daemon.create_session("test", tmp_path)
-
-        # Add some events to the session
-        for i in range(5):
-            await session._handle_sdk_message({"type": "test", "index": i})
-
-        ws = MockWebSocket()
-        subscribed: set[str] = set()
-
-        msg = SyncMessage(session="test", last_seen_sequence=3)
-        await daemon._handle_message(ws, msg, subscribed)
-
-        assert len(ws.sent_messages) == 1
-        response = json.loads(ws.sent_messages[0])
-        assert response["type"] == "sync_response"
-        assert response["session"] == "test"
-        assert len(response["events"]) == 2  # Events 4 and 5
-
-
-class TestErrorHandling:
-    """Tests for error handling in WebSocket messages."""
-
-    @pytest.mark.asyncio
-    async def test_invalid_message_returns_error(
-        self,
-        event_persistence: EventPersistence,
-        session_persistence: SessionPersistence,
-    ) -> None:
-        daemon = WormholeDaemon(
-            port=7117,
-            event_persistence=event_persistence,
-            session_persistence=session_persistence,
-        )
-        ws = MockWebSocket()
-
-        # Queue invalid JSON
-        ws.queue_message("not valid json")
-
-        await daemon._handle_connection(ws)
-
-        # Should have received error message
-        assert len(ws.sent_messages) == 1
-        error = json.loads(ws.sent_messages[0])
-        assert error["type"] == "error"
-        assert error["code"] == "INVALID_MESSAGE"
-
-    @pytest.mark.asyncio
-    async def test_unknown_message_type_returns_error(
-        self,
-        event_persistence: EventPersistence,
-        session_persistence: SessionPersistence,
-    ) -> None:
-        daemon = WormholeDaemon(
-            port=7117,
-            event_persistence=event_persistence,
-            session_persistence=session_persistence,
-        )
-        ws = MockWebSocket()
-
-        # Queue unknown message type
-        ws.queue_message(json.dumps({"type": "unknown_type"}))
-
-        await daemon._handle_connection(ws)
-
-        assert len(ws.sent_messages) == 1
-        error = json.loads(ws.sent_messages[0])
-        assert error["type"] == "error"
-        assert "Unknown message type" in error["message"]
+            tool_name="Bash",
+            tool_input={},
+            created_at=datetime.now(),
+        ),
+    )
+
+    ws = MockWebSocket()
+    subscribed: set[str] = set()
+
+    # Send permission response
+    msg = PermissionResponseMessage(
+        request_id=request_id,
+        decision="allow",
+    )
+    await daemon._handle_message(ws, msg, subscribed)
+
+    # Future should be resolved
+    assert future.done()
+    assert future.result() == "allow"
+
+
+@pytest.mark.asyncio
+async def test_permission_response_routed_by_request_id(
+    tmp_path: Path,
+    daemon: WormholeDaemon,
+) -> None:
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    daemon.create_session("a", tmp_path / "a")
+    session = daemon.create_session("b", tmp_path / "b")
+    requests: asyncio.Queue[PermissionRequestMessage] = asyncio.Queue()
+    session.set_broadcast_callback(requests.put)
+
+    task = asyncio.create_task(session._permission_handler("Bash", {}, MagicMock()))
+    request = await requests.get()
+    assert daemon._permission_sessions[request.request_id] == "b"
+
+    msg = PermissionResponseMessage(request_id=request.request_id, decision="deny")
+    await daemon._handle_message(MockWebSocket(), msg, set())
+
+    assert (await task).behavior == "deny"
+    assert request.request_id not in daemon._permission_sessions
+
+
+@pytest.mark.asyncio
+async def test_cancelled_permission_request_unregistered(
+    tmp_path: Path,
+    daemon: WormholeDaemon,
+) -> None:
+    session = daemon.create_session("test-session", tmp_path)
+    requests: asyncio.Queue[PermissionRequestMessage] = asyncio.Queue()
+    session.set_broadcast_callback(requests.put)
+
+    task = asyncio.create_task(session._permission_handler("Bash", {}, MagicMock()))
+    request = await requests.get()
+    assert request.request_id in daemon._permission_sessions
+
+    # The SDK cancels the callback, e.g. when the turn is interrupted
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert daemon._permission_sessions == {}
+    assert session.get_pending_permissions() == []
+
+
+# Tests for handling input messages from phone.
+@pytest.mark.asyncio
+async def test_input_message_calls_session_query(
+    tmp_path: Path,
+    daemon: WormholeDaemon,
+) -> None:
+    session = daemon.create_session("test", tmp_path)
+
+    # Mock the client
+    mock_client = AsyncMock()
+    mock_client.query = AsyncMock()
+    mock_client.receive_response = MagicMock(return_value=iter([]))
+    session._client = mock_client
+
+    ws = MockWebSocket()
+    subscribed: set[str] = set()
+
+    msg = InputMessage(session="test", text="Hello Claude")
+    await daemon._handle_message(ws, msg, subscribed)
+
+    mock_client.query.assert_called_once_with("Hello Claude")
+
+
+# Tests for control message handling.
+@pytest.mark.asyncio
+async def test_interrupt_calls_session_interrupt(
+    tmp_path: Path,
+    daemon: WormholeDaemon,
+) -> None:
+    session = daemon.create_session("test", tmp_path)
+
+    mock_client = AsyncMock()
+    session._client = mock_client
+
+    ws = MockWebSocket()
+    subscribed: set[str] = set()
+
+    msg = ControlMessage(session="test", action="interrupt")
+    await daemon._handle_message(ws, msg, subscribed)
+
+    mock_client.interrupt.assert_called_once()
+
+
+# Tests for sync message handling.
+@pytest.mark.asyncio
+async def test_sync_returns_events_since_sequence(
+    tmp_path: Path,
+    daemon: WormholeDaemon,
+) -> None:
+    session = daemon.create_session("test", tmp_path)
+
+    # Add some events to the session
+    for i in range(5):
+        await session._handle_sdk_message({"type": "test", "index": i})
+
+    ws = MockWebSocket()
+    subscribed: set[str] = set()
+
+    msg = SyncMessage(session="test", last_seen_sequence=3)
+    await daemon._handle_message(ws, msg, subscribed)
+
+    assert len(ws.sent_messages) == 1
+    assert isinstance(ws.sent_messages[0], bytes)
+    response = json.loads(ws.sent_messages[0])
+    assert response["type"] == "sync_response"
+    assert response["session"] == "test"
+    assert len(response["events"]) == 2  # Events 4 and 5
+    first = response["events"][0]
+    assert first["type"] == "event"
+    assert first["session"] == "test"
+    assert first["sequence"] == 4
+    assert first["message"] == {"type": "test", "index": 3}
+    assert isinstance(first["timestamp"], int)
+
+
+# Tests for error handling in WebSocket messages.
+@pytest.mark.asyncio
+async def test_invalid_message_returns_error(daemon: WormholeDaemon) -> None:
+    ws = MockWebSocket()
+
+    # Queue invalid JSON
+    ws.queue_message("not valid json")
+
+    await daemon._handle_connection(ws)
+
+    # Should have received error message
+    assert len(ws.sent_messages) == 1
+    error = json.loads(ws.sent_messages[0])
+    assert error["type"] == "error"
+    assert error["code"] == "INVALID_MESSAGE"
+
+
+@pytest.mark.asyncio
+async def test_unknown_message_type_returns_error(daemon: WormholeDaemon) -> None:
+    ws = MockWebSocket()
+
+    # Queue unknown message type
+    ws.queue_message(json.dumps({"type": "unknown_type"}))
+
+    await daemon._handle_connection(ws)
+
+    assert len(ws.sent_messages) == 1
+    error = json.loads(ws.sent_messages[0])
+    assert error["type"] == "error"
+    assert "Unknown message type" in error["message"]
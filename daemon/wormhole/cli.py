@@ -1,28 +1,50 @@
 """CLI commands for Wormhole."""
 
 import asyncio
+import fcntl
+import functools
+import hashlib
+import mmap
 import os
+import select
+import shutil
 import signal
 import subprocess
 import sys
 import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
 from pathlib import Path
+from typing import Any
 
 import click
 
 from wormhole.control import (
     CloseSessionRequest,
+    ControlRequest,
+    ControlResponse,
     ErrorResponse,
+    GetSessionInfoRequest,
     GetStatusRequest,
     ListSessionsRequest,
     OpenSessionRequest,
+    SessionDetailResponse,
+    SessionListResponse,
+    StatusResponse,
+    close_control_connections,
+    daemon_accepting_connections,
     get_socket_path,
     send_control_request_sync,
+    send_control_requests_sync,
 )
 
 
+@functools.cache
 def get_daemon_paths() -> tuple[Path, Path, Path]:
-    """Get paths for daemon files (data_dir, pid_file, log_file)."""
+    """Get paths for daemon files (data_dir, pid_file, log_file).
+
+    Cached, so the data directory is created at most once per process.
+    """
     data_dir = Path.home() / ".local/share/wormhole"
     data_dir.mkdir(parents=True, exist_ok=True)
     return data_dir, data_dir / "daemon.pid", data_dir / "daemon.log"
@@ -30,76 +52,125 @@ def get_daemon_paths() -> tuple[Path, Path, Path]:
 
 def kill_process_on_port(port: int) -> bool:
     """Kill any process using the specified port. Returns True if a process was killed."""
-    import platform
+    pids = find_pids_on_port(port)
+    if not pids:
+        return False
+
+    for pid in pids:
+        try:
+            os.kill(pid, signal.SIGTERM)
+            click.echo(f"Killed existing process {pid} on port {port}")
+        except ProcessLookupError:
+            pass
+    # Give them up to half a second to die, returning once the last one has
+    deadline = time.monotonic() + 0.5
+    for pid in pids:
+        if not _wait_for_exit(pid, timeout=max(deadline - time.monotonic(), 0)):
+            break
+    return True
+
+
+def find_pids_on_port(port: int) -> list[int]:
+    """Find the PIDs of processes listening on a TCP port."""
+    if sys.platform == "linux":
+        inodes = _listening_socket_inodes(port)
+        return _pids_owning_sockets(inodes) if inodes else []
 
+    # macOS: use lsof to find process
     try:
-        if platform.system() == "Darwin":
-            # macOS: use lsof to find process
-            result = subprocess.run(
-                ["lsof", "-ti", f":{port}"],
-                capture_output=True,
-                text=True,
-            )
-            if result.returncode == 0 and result.stdout.strip():
-                pids = result.stdout.strip().split("\n")
-                for pid_str in pids:
-                    try:
-                        pid = int(pid_str.strip())
-                        os.kill(pid, signal.SIGTERM)
-                        click.echo(f"Killed existing process {pid} on port {port}")
-                    except (ValueError, ProcessLookupError):
-                        pass
-                # Give it a moment to die
-                time.sleep(0.5)
-                return True
-        else:
-            # Linux: use ss or netstat
-            result = subprocess.run(
-                ["ss", "-tlnp", f"sport = :{port}"],
-                capture_output=True,
-                text=True,
-            )
-            if result.returncode == 0:
-                # Parse output to find PIDs
-                import re
-                for line in result.stdout.split("\n"):
-                    match = re.search(r"pid=(\d+)", line)
-                    if match:
-                        try:
-                            pid = int(match.group(1))
-                            os.kill(pid, signal.SIGTERM)
-                            click.echo(f"Killed existing process {pid} on port {port}")
-                        except (ValueError, ProcessLookupError):
-                            pass
-                time.sleep(0.5)
-                return True
+        result = _run_probe(["lsof", "-ti", f":{port}"], capture_output=True)
     except FileNotFoundError:
-        # lsof or ss not available
-        pass
+        # lsof not available
+        return []
+    if result.returncode != 0:
+        return []
+    return [int(pid) for pid in result.stdout.split() if pid.isdigit()]
 
-    return False
+
+def _run_probe(args: list[str], **kwargs: Any) -> subprocess.CompletedProcess[Any]:
+    """Run a short helper command, letting CPython use posix_spawn for it.
+
+    CPython only takes its posix_spawn path when close_fds is off and the
+    executable includes a directory. Python's own fds are non-inheritable
+    (PEP 446), so leaving close_fds off leaks nothing into the child.
+    """
+    executable = shutil.which(args[0]) or args[0]
+    return subprocess.run([executable, *args[1:]], close_fds=False, **kwargs)
+
+
+def _listening_socket_inodes(port: int) -> set[str]:
+    """Read /proc/net/tcp{,6} for the inodes of sockets listening on port."""
+    inodes: set[str] = set()
+    for table in ("/proc/net/tcp", "/proc/net/tcp6"):
+        try:
+            with open(table) as f:
+                next(f, None)  # Header
+                for line in f:
+                    fields = line.split()
+                    # fields: sl, local_address, rem_address, st, ..., inode at index 9
+                    if fields[3] == "0A" and int(fields[1].rsplit(":", 1)[1], 16) == port:
+                        inodes.add(fields[9])
+        except OSError:
+            continue
+    return inodes
+
+
+def _pids_owning_sockets(inodes: set[str]) -> list[int]:
+    """Scan /proc/*/fd for processes holding any of the given socket inodes."""
+    targets = {f"socket:[{inode}]" for inode in inodes}
+    pids: list[int] = []
+    for entry in os.scandir("/proc"):
+        if not entry.name.isdigit():
+            continue
+        try:
+            fds = os.scandir(f"/proc/{entry.name}/fd")
+        except OSError:
+            continue  # Exited, or not ours to inspect
+        with fds:
+            for fd in fds:
+                try:
+                    if os.readlink(fd.path) in targets:
+                        pids.append(int(entry.name))
+                        break
+                except OSError:
+                    continue
+    return pids
+
+
+# Set once the daemon has answered a status probe. A CLI invocation is a
+# short-lived process, so later checks reuse the answer instead of reconnecting.
+_daemon_alive = False
 
 
 def is_daemon_running() -> bool:
     """Check if daemon is running."""
-    socket_path = get_socket_path()
-    if not socket_path.exists():
-        return False
+    global _daemon_alive
+    if _daemon_alive:
+        return True
 
-    # Socket exists, try to connect
-    from wormhole.control import StatusResponse
-    response = send_control_request_sync(GetStatusRequest())
-    return isinstance(response, StatusResponse)
+    _daemon_alive = daemon_accepting_connections()
+    return _daemon_alive
+
+
+def send_request(request: ControlRequest) -> ControlResponse:
+    """Send a control request, forgetting a cached live daemon if it cannot be reached."""
+    global _daemon_alive
+    response = send_control_request_sync(request)
+    if isinstance(response, ErrorResponse) and response.code in (
+        "DAEMON_NOT_RUNNING",
+        "CONNECTION_ERROR",
+    ):
+        _daemon_alive = False
+    return response
 
 
 def start_daemon_background() -> bool:
     """Start daemon as a background process. Returns True if started successfully."""
-    _, pid_file, log_file = get_daemon_paths()
+    _, _, log_file = get_daemon_paths()
 
     # Find the wormhole executable
     wormhole_cmd = sys.argv[0]
     if not os.path.isabs(wormhole_cmd):
-        import shutil
         wormhole_cmd = shutil.which("wormhole") or sys.executable
 
     # Build command - if we're running via python -m, use that
@@ -108,27 +179,135 @@ def start_daemon_background() -> bool:
     else:
         cmd = [sys.executable, "-m", "wormhole", "daemon"]
 
-    # Start daemon with output redirected to log file
-    with open(log_file, "a") as log:
-        process = subprocess.Popen(
+    # Start daemon with output redirected to log file; it writes its own PID file
+    _spawn_detached(cmd, log_file)
+
+    # Wait for socket to appear (up to 30 seconds - session restoration can be slow)
+    return wait_for_socket(get_socket_path(), timeout=30.0)
+
+
+def _spawn_detached(cmd: list[str], log_file: Path) -> int:
+    """Start cmd in a new session with output appended to log_file. Returns its PID.
+
+    posix_spawn lets the OS use vfork-style process creation, avoiding a copy of
+    the CLI's page tables just to exec the daemon.
+    """
+    append_flags = os.O_WRONLY | os.O_APPEND | os.O_CREAT
+    try:
+        return os.posix_spawn(
+            cmd[0],
             cmd,
-            stdout=log,
-            stderr=log,
-            stdin=subprocess.DEVNULL,
-            start_new_session=True,  # Detach from terminal
+            os.environ,
+            file_actions=[
+                (os.POSIX_SPAWN_OPEN, 0, os.devnull, os.O_RDONLY, 0),
+                (os.POSIX_SPAWN_OPEN, 1, str(log_file), append_flags, 0o644),
+                (os.POSIX_SPAWN_DUP2, 1, 2),
+            ],
+            setsid=True,  # Detach from terminal
         )
+    except (AttributeError, NotImplementedError):
+        # No posix_spawn, or no setsid support for it on this platform
+        with open(log_file, "a") as log:
+            return subprocess.Popen(
+                cmd,
+                stdout=log,
+                stderr=log,
+                stdin=subprocess.DEVNULL,
+                start_new_session=True,
+            ).pid
+
+
+def wait_for_socket(socket_path: Path, timeout: float = 30.0) -> bool:
+    """Wait until the daemon answers on socket_path. Returns False on timeout.
+
+    Sleeps on a kernel notification for the socket's directory rather than
+    polling. Once the socket file exists but the daemon is not yet accepting
+    connections, it re-probes with a backoff from 5 ms up to 200 ms, since the
+    daemon usually starts listening right after creating the socket.
+    """
+    deadline = time.monotonic() + timeout
+    backoff = _backoff_delays()
+    with _watch_directory(socket_path.parent) as wait:
+        while True:
+            exists = socket_path.exists()
+            if exists and is_daemon_running():
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            wait(min(remaining, next(backoff)) if exists else remaining)
 
-    # Write PID file
-    pid_file.write_text(str(process.pid))
 
-    # Wait for socket to appear (up to 30 seconds - session restoration can be slow)
-    socket_path = get_socket_path()
-    for _ in range(300):
-        if socket_path.exists() and is_daemon_running():
-            return True
-        time.sleep(0.1)
+def _backoff_delays(first: float = 0.005, cap: float = 0.2) -> Iterator[float]:
+    """Yield poll delays growing by half each time, from first up to cap."""
+    delay = first
+    while True:
+        yield delay
+        delay = min(delay * 1.5, cap)
 
-    return False
+
+@contextmanager
+def _watch_directory(directory: Path) -> Iterator[Callable[[float], None]]:
+    """Yield a wait(timeout) that returns early when an entry in directory changes.
+
+    Uses inotify on Linux and kqueue on macOS, falling back to sleeping with
+    a growing backoff where neither is available.
+    """
+    if sys.platform == "linux":
+        fd = _inotify_watch(directory)
+        if fd is not None:
+            def wait_inotify(timeout: float) -> None:
+                ready, _, _ = select.select([fd], [], [], timeout)
+                if ready:
+                    os.read(fd, 4096)  # Drain; the caller re-checks the path
+
+            try:
+                yield wait_inotify
+            finally:
+                os.close(fd)
+            return
+
+    if hasattr(select, "kqueue"):
+        dir_fd = os.open(directory, getattr(os, "O_EVTONLY", os.O_RDONLY))
+        kq = select.kqueue()
+        kq.control(
+            [
+                select.kevent(
+                    dir_fd,
+                    filter=select.KQ_FILTER_VNODE,
+                    flags=select.KQ_EV_ADD | select.KQ_EV_CLEAR,
+                    fflags=select.KQ_NOTE_WRITE,
+                )
+            ],
+            0,
+        )
+        try:
+            yield lambda timeout: kq.control(None, 1, timeout)
+        finally:
+            kq.close()
+            os.close(dir_fd)
+        return
+
+    backoff = _backoff_delays()
+    yield lambda timeout: time.sleep(min(timeout, next(backoff)))
+
+
+def _inotify_watch(directory: Path) -> int | None:
+    """Return an inotify fd watching directory for new entries, or None if unavailable."""
+    import ctypes
+
+    in_create, in_moved_to = 0x100, 0x80
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+    except (OSError, AttributeError):
+        return None
+    if fd < 0:
+        return None
+    if libc.inotify_add_watch(fd, os.fsencode(directory), in_create | in_moved_to) < 0:
+        os.close(fd)
+        return None
+    return fd
 
 
 def ensure_daemon_running(silent: bool = False) -> bool:
@@ -155,39 +334,162 @@ def stop_daemon() -> bool:
     """Stop the daemon if running. Returns True if stopped."""
     _, pid_file, _ = get_daemon_paths()
 
+    global _daemon_alive
     if not is_daemon_running():
         return True
+    _daemon_alive = False
+    close_control_connections()
 
     # Try to get PID from file
-    if pid_file.exists():
+    pid = read_pid_file(pid_file)
+    if pid is not None:
         try:
-            pid = int(pid_file.read_text().strip())
             os.kill(pid, signal.SIGTERM)
             # Wait for it to stop
-            for _ in range(30):
-                try:
-                    os.kill(pid, 0)  # Check if still running
-                    time.sleep(0.1)
-                except ProcessLookupError:
-                    pid_file.unlink(missing_ok=True)
-                    return True
-        except (ValueError, ProcessLookupError):
+            if _wait_for_exit(pid, timeout=3.0):
+                pid_file.unlink(missing_ok=True)
+                return True
+        except ProcessLookupError:
             pass
 
     # Fallback: can't stop cleanly
     return False
 
 
+# Held open for the daemon's lifetime; its lock marks the PID file as live
+_pid_file_fd: int | None = None
+
+# How long a starting daemon waits for the previous one to release the PID file
+_PID_LOCK_TIMEOUT = 10.0
+
+
+def write_pid_file(pid_file: Path, timeout: float = 0.0) -> bool:
+    """Record this process's PID, holding an exclusive lock on the file until exit.
+
+    Waits up to timeout seconds for a previous daemon that is still shutting
+    down to release the file. Returns False if another daemon still holds it.
+    """
+    global _pid_file_fd
+    fd = os.open(pid_file, os.O_RDWR | os.O_CREAT | os.O_CLOEXEC, 0o644)
+    deadline = time.monotonic() + timeout
+    backoff = _backoff_delays()
+    while True:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            break
+        except BlockingIOError:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                os.close(fd)
+                return False
+            time.sleep(min(remaining, next(backoff)))
+    os.ftruncate(fd, 0)
+    os.write(fd, str(os.getpid()).encode())
+    _pid_file_fd = fd
+    return True
+
+
+def read_pid_file(pid_file: Path) -> int | None:
+    """Return the PID of the running daemon recorded in pid_file, or None if there is none."""
+    try:
+        fd = os.open(pid_file, os.O_RDONLY | os.O_CLOEXEC)
+    except FileNotFoundError:
+        return None
+    try:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_SH | fcntl.LOCK_NB)
+            locked = False
+        except BlockingIOError:
+            locked = True
+        pid = int(os.read(fd, 32))
+    except ValueError:
+        return None  # Not yet written
+    finally:
+        os.close(fd)
+
+    if locked:
+        # The daemon that wrote it is still running
+        return pid
+    # Unlocked is normally stale, but daemons started by older versions never
+    # locked the file, so trust the PID if that process is alive
+    try:
+        os.kill(pid, 0)
+    except (ProcessLookupError, PermissionError):
+        return None
+    return pid
+
+
+def _wait_for_exit(pid: int, timeout: float) -> bool:
+    """Wait up to timeout seconds for a process to exit. Returns True if it did.
+
+    Blocks on a pidfd (Linux) or a kqueue exit filter (macOS) so the wait ends
+    as soon as the process does, falling back to polling with kill(pid, 0).
+    """
+    if hasattr(os, "pidfd_open"):
+        try:
+            pidfd = os.pidfd_open(pid)
+        except ProcessLookupError:
+            return True
+        except OSError:
+            pass  # Kernel without pidfd support
+        else:
+            try:
+                ready, _, _ = select.select([pidfd], [], [], timeout)
+                return bool(ready)
+            finally:
+                os.close(pidfd)
+    elif hasattr(select, "kqueue"):
+        kq = select.kqueue()
+        exit_filter = select.kevent(
+            pid,
+            filter=select.KQ_FILTER_PROC,
+            flags=select.KQ_EV_ADD | select.KQ_EV_ONESHOT,
+            fflags=select.KQ_NOTE_EXIT,
+        )
+        try:
+            kq.control([exit_filter], 0)
+            return bool(kq.control(None, 1, timeout))
+        except ProcessLookupError:
+            return True
+        finally:
+            kq.close()
+
+    deadline = time.monotonic() + timeout
+    backoff = _backoff_delays()
+    while True:
+        try:
+            os.kill(pid, 0)  # Check if still running
+        except ProcessLookupError:
+            return True
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        time.sleep(min(remaining, next(backoff)))
+
+
 def generate_session_name(directory: Path) -> str:
     """Generate a session name from directory."""
-    import hashlib
-
     name = directory.name
     # Add short hash to avoid conflicts
-    hash_suffix = hashlib.sha256(str(directory).encode()).hexdigest()[:4]
+    hash_suffix = hashlib.sha256(os.fsencode(directory)).hexdigest()[:4]
     return f"{name}-{hash_suffix}"
 
 
+def claude_args_to_options(claude_args: tuple[str, ...]) -> dict[str, str | list[str] | None]:
+    """Convert pass-through Claude CLI args to an options dict.
+
+    Each --flag maps to the argument after it, or None when the next argument is
+    another flag or there is none. Other positional arguments are ignored.
+    """
+    return {
+        arg[2:].replace("-", "_"): (
+            value if value is not None and not value.startswith("--") else None
+        )
+        for arg, value in zip(claude_args, (*claude_args[1:], None), strict=False)
+        if arg.startswith("--")
+    }
+
+
 @click.group()
 @click.version_option()
 def main() -> None:
@@ -210,9 +512,25 @@ def daemon(port: int, no_discovery: bool, log_level: str, log_json: bool) -> Non
     # Kill any existing process using this port
     kill_process_on_port(port)
 
+    _, pid_file, _ = get_daemon_paths()
+    # The daemon just signalled may still be persisting sessions and unregistering mDNS
+    if not write_pid_file(pid_file, timeout=_PID_LOCK_TIMEOUT):
+        click.secho(f"Another daemon still holds {pid_file}", fg="red", err=True)
+        sys.exit(1)
+
     click.echo(f"Starting Wormhole daemon on port {port}...")
     d = WormholeDaemon(port=port, enable_discovery=not no_discovery)
-    asyncio.run(d.run())
+    with asyncio.Runner(loop_factory=_event_loop_factory()) as runner:
+        runner.run(d.run())
+
+
+def _event_loop_factory() -> Callable[[], asyncio.AbstractEventLoop] | None:
+    """Use uvloop (the "fast" extra) when it is installed, else asyncio's default loop."""
+    try:
+        import uvloop  # pyright: ignore[reportMissingImports]
+    except ImportError:
+        return None
+    return uvloop.new_event_loop
 
 
 @main.command("open")
@@ -232,22 +550,7 @@ def open_session(name: str | None, claude_args: tuple[str, ...]) -> None:
     if name is None:
         name = generate_session_name(cwd)
 
-    # Convert claude args to options dict
-    options: dict[str, str | list[str] | None] = {}
-    i = 0
-    while i < len(claude_args):
-        arg = claude_args[i]
-        if arg.startswith("--"):
-            key = arg[2:].replace("-", "_")
-            # Check if next arg is a value or another flag
-            if i + 1 < len(claude_args) and not claude_args[i + 1].startswith("--"):
-                options[key] = claude_args[i + 1]
-                i += 2
-            else:
-                options[key] = None
-                i += 1
-        else:
-            i += 1
+    options = claude_args_to_options(claude_args)
 
     request = OpenSessionRequest(
         name=name,
@@ -255,7 +558,7 @@ def open_session(name: str | None, claude_args: tuple[str, ...]) -> None:
         options=options if options else None,
     )
 
-    response = send_control_request_sync(request)
+    response = send_request(request)
 
     if isinstance(response, ErrorResponse):
         click.secho(f"Error: {response.message}", fg="red", err=True)
@@ -267,17 +570,25 @@ def open_session(name: str | None, claude_args: tuple[str, ...]) -> None:
             click.echo(f"  Claude args: {' '.join(claude_args)}")
 
 
+_STATE_COLORS = {
+    "idle": "blue",
+    "working": "yellow",
+    "awaiting_approval": "magenta",
+    "error": "red",
+}
+# click.style builds the ANSI escapes on every call; do it once per state
+_STYLED_STATES = {state: click.style(state, fg=color) for state, color in _STATE_COLORS.items()}
+
+
 @main.command("list")
 def list_sessions() -> None:
     """List active sessions."""
-    from wormhole.control import SessionListResponse
-
     # Auto-start daemon if needed
     if not ensure_daemon_running():
         sys.exit(1)
 
     request = ListSessionsRequest()
-    response = send_control_request_sync(request)
+    response = send_request(request)
 
     if isinstance(response, ErrorResponse):
         click.secho(f"Error: {response.message}", fg="red", err=True)
@@ -293,18 +604,8 @@ def list_sessions() -> None:
 
     click.echo("Active sessions:")
     for session in response.sessions:
-        state_colors = {
-            "idle": "blue",
-            "working": "yellow",
-            "awaiting_approval": "magenta",
-            "error": "red",
-        }
-        state_color = state_colors.get(session.state, "white")
-        click.echo(
-            f"  {session.name} "
-            f"[{click.style(session.state, fg=state_color)}] "
-            f"- {session.directory}"
-        )
+        styled_state = _STYLED_STATES.get(session.state) or click.style(session.state, fg="white")
+        click.echo(f"  {session.name} [{styled_state}] - {session.directory}")
         if session.cost_usd > 0:
             click.echo(f"    Cost: ${session.cost_usd:.4f}")
 
@@ -320,39 +621,33 @@ def attach(session_name: str, use_screen: bool) -> None:
 
     Use --screen to run in a detachable screen session.
     """
-    from wormhole.control import SessionInfoResponse, SessionListResponse
+    global _daemon_alive
 
-    # Auto-start daemon if needed
-    if not ensure_daemon_running():
-        sys.exit(1)
-
-    # First, get the session info
-    list_request = ListSessionsRequest()
-    list_response = send_control_request_sync(list_request)
+    # Probe the daemon and look up the session over a single connection
+    status_response, info_response = send_control_requests_sync(
+        [GetStatusRequest(), GetSessionInfoRequest(name=session_name)]
+    )
+    if isinstance(status_response, StatusResponse):
+        _daemon_alive = True
+    else:
+        # Auto-start daemon if needed
+        if not ensure_daemon_running():
+            sys.exit(1)
+        info_response = send_request(GetSessionInfoRequest(name=session_name))
 
-    if isinstance(list_response, ErrorResponse):
-        click.secho(f"Error: {list_response.message}", fg="red", err=True)
+    if isinstance(info_response, ErrorResponse):
+        click.secho(f"Error: {info_response.message}", fg="red", err=True)
         sys.exit(1)
 
-    if not isinstance(list_response, SessionListResponse):
+    if not isinstance(info_response, SessionDetailResponse):
         click.secho("Unexpected response type", fg="red", err=True)
         sys.exit(1)
 
-    # Find the session
-    session: SessionInfoResponse | None = None
-    for s in list_response.sessions:
-        if s.name == session_name:
-            session = s
-            break
-
-    if not session:
-        click.secho(f"Error: Session not found: {session_name}", fg="red", err=True)
-        sys.exit(1)
+    session = info_response.session
 
     if not session.claude_session_id:
         click.secho(
-            "Error: Session has no Claude session ID yet. "
-            "Send a query first to initialize.",
+            "Error: Session has no Claude session ID yet. Send a query first to initialize.",
             fg="red",
             err=True,
         )
@@ -369,13 +664,7 @@ def attach(session_name: str, use_screen: bool) -> None:
         screen_name = f"wormhole-{session_name}"
 
         # Check if screen session already exists
-        result = subprocess.run(
-            ["screen", "-list", screen_name],
-            capture_output=True,
-            text=True,
-        )
-
-        if screen_name in result.stdout:
+        if _screen_session_exists(screen_name):
             click.echo(f"Attaching to existing screen session '{screen_name}'...")
             os.execvp("screen", ["screen", "-r", screen_name])
         else:
@@ -385,17 +674,43 @@ def attach(session_name: str, use_screen: bool) -> None:
                 ["screen", "-S", screen_name, "claude", "--resume", claude_session_id],
             )
     else:
-        # Direct attach - run Claude CLI as subprocess
-        # Using subprocess.run instead of os.execvp so the wormhole session
-        # stays alive in the daemon when Claude exits
+        # Direct attach - replace the CLI with Claude. The wormhole session lives
+        # in the daemon, so it stays alive when Claude exits; nothing needs to
+        # wait around in this process.
         click.echo(f"Attaching to session '{session_name}' in {session_dir}")
         click.echo(f"Session ID: {claude_session_id}")
+        click.echo(f"Session '{session_name}' remains active in the daemon after Claude exits.")
         click.echo("─" * 50)
-        result = subprocess.run(["claude", "--resume", claude_session_id])
-        click.echo("─" * 50)
-        click.echo(
-            f"Claude exited (code {result.returncode}). Session '{session_name}' remains active."
-        )
+        os.execvp("claude", ["claude", "--resume", claude_session_id])
+
+
+def _screen_session_exists(screen_name: str) -> bool:
+    """Check for a running screen session by looking in screen's socket directory.
+
+    Sockets are named "<pid>.<session name>". Falls back to `screen -list` when
+    the socket directory is not in one of the usual places.
+    """
+    user = os.environ.get("USER", "")
+    candidates = [
+        os.environ.get("SCREENDIR"),
+        f"/run/screen/S-{user}",
+        f"/var/run/screen/S-{user}",
+        f"/tmp/screens/S-{user}",
+        f"/tmp/uscreens/S-{user}",
+    ]
+    for screen_dir in filter(None, candidates):
+        try:
+            with os.scandir(screen_dir) as entries:
+                return any(e.name.partition(".")[2] == screen_name for e in entries)
+        except OSError:
+            continue
+
+    result = _run_probe(
+        ["screen", "-list", screen_name],
+        capture_output=True,
+        text=True,
+    )
+    return screen_name in result.stdout
 
 
 @main.command()
@@ -407,7 +722,7 @@ def close(session_name: str) -> None:
         sys.exit(1)
 
     request = CloseSessionRequest(name=session_name)
-    response = send_control_request_sync(request)
+    response = send_request(request)
 
     if isinstance(response, ErrorResponse):
         click.secho(f"Error: {response.message}", fg="red", err=True)
@@ -419,10 +734,8 @@ def close(session_name: str) -> None:
 @main.command()
 def status() -> None:
     """Show daemon status and connection info."""
-    from wormhole.control import StatusResponse
-
     request = GetStatusRequest()
-    response = send_control_request_sync(request)
+    response = send_request(request)
 
     if isinstance(response, ErrorResponse):
         click.secho("Daemon: not running", fg="red")
@@ -477,16 +790,14 @@ def completion(shell: str | None, install: bool) -> None:
         else:
             shell = "bash"
 
-    # Generate completion script using Click's built-in support
-    env = {**os.environ, "_WORMHOLE_COMPLETE": f"{shell}_source"}
-    result = subprocess.run(
-        ["wormhole"],
-        env=env,
-        capture_output=True,
-        text=True,
-    )
+    # Generate completion script in-process using Click's built-in support
+    from click.shell_completion import get_completion_class
 
-    completion_script = result.stdout
+    comp_cls = get_completion_class(shell)
+    if comp_cls is None:
+        click.secho(f"Unsupported shell: {shell}", fg="red", err=True)
+        sys.exit(1)
+    completion_script = comp_cls(main, {}, "wormhole", "_WORMHOLE_COMPLETE").source()
 
     # For zsh, wrap with compinit check to ensure completion system is loaded
     if shell == "zsh":
@@ -528,13 +839,17 @@ fi
 
         # Add source line to config if needed (not needed for fish)
         if source_line and config_file:
-            config_content = config_file.read_text() if config_file.exists() else ""
-            if str(completion_file) not in config_content:
-                with open(config_file, "a") as f:
+            wanted = source_line.strip()
+            with open(config_file, "a+", errors="ignore") as f:
+                # Stream the existing config, stopping at the first matching line
+                f.seek(0)
+                already_sourced = any(line.strip() == wanted for line in f)
+                if not already_sourced:
                     f.write(f"\n# Wormhole CLI completion\n{source_line}")
-                click.echo(f"Added source line to {config_file}")
-            else:
+            if already_sourced:
                 click.echo(f"Source line already in {config_file}")
+            else:
+                click.echo(f"Added source line to {config_file}")
 
         click.secho(f"\n✓ Completion installed for {shell}!", fg="green")
         click.echo("  Restart your shell or run:")
@@ -763,12 +1078,24 @@ def service_logs(follow: bool, lines: int) -> None:
     if follow:
         os.execvp("tail", ["tail", "-f", str(log_file)])
     else:
-        result = subprocess.run(
-            ["tail", f"-{lines}", str(log_file)],
-            capture_output=True,
-            text=True,
-        )
-        click.echo(result.stdout)
+        click.echo(_tail_lines(log_file, lines), nl=False)
+
+
+def _tail_lines(path: Path, lines: int) -> bytes:
+    """Return the last `lines` lines of a file, scanning backwards from its end."""
+    with open(path, "rb") as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return b""  # Empty file
+        with mm:
+            # A trailing newline ends the last line rather than starting a new one
+            pos = len(mm) - 1 if mm[-1:] == b"\n" else len(mm)
+            for _ in range(lines):
+                pos = mm.rfind(b"\n", 0, pos)
+                if pos < 0:
+                    break
+            return mm[pos + 1 :]
 
 
 @service.command("status")
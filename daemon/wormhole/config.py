@@ -3,47 +3,61 @@
 from __future__ import annotations
 
 import os
+import tomllib
 from pathlib import Path
 from typing import Any
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
+
+# Relative to the home directory, which is looked up on every load so that a
+# HOME set after import is honoured
+_CONFIG_PATH = Path(".config", "wormhole", "config.toml")
 
 
 class DaemonConfig(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     port: int = 7117
     buffer_size: int = 1000
 
 
 class DiscoveryConfig(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     enabled: bool = True
     service_name: str = "wormhole"
 
 
 class DefaultsConfig(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     model: str = "claude-sonnet-4-5"
     permission_mode: str = "default"
 
 
 class Config(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     daemon: DaemonConfig = DaemonConfig()
     discovery: DiscoveryConfig = DiscoveryConfig()
     defaults: DefaultsConfig = DefaultsConfig()
 
 
+# Shared result when there is nothing to override; the models are frozen so no
+# caller can change it for the others
+_DEFAULT_CONFIG = Config()
+
+
 def load_config() -> Config:
     """Load configuration from file and environment."""
-    config_path = Path.home() / ".config" / "wormhole" / "config.toml"
-
     config_dict: dict[str, Any] = {}
 
-    if config_path.exists():
-        try:
-            import tomllib
-        except ImportError:
-            import tomli as tomllib  # type: ignore
-
-        with open(config_path, "rb") as f:
+    # Open directly rather than checking exists() first: one syscall, no race
+    try:
+        with open(Path.home() / _CONFIG_PATH, "rb") as f:
             config_dict = tomllib.load(f)
+    except FileNotFoundError:
+        pass
 
     # Environment overrides
     if port := os.environ.get("WORMHOLE_PORT"):
@@ -51,4 +65,6 @@ def load_config() -> Config:
     if buffer_size := os.environ.get("WORMHOLE_BUFFER_SIZE"):
         config_dict.setdefault("daemon", {})["buffer_size"] = int(buffer_size)
 
+    if not config_dict:
+        return _DEFAULT_CONFIG
     return Config.model_validate(config_dict)
@@ -3,12 +3,16 @@
 from __future__ import annotations
 
 import asyncio
-import json
+import atexit
 import os
+import queue
+import socket
+import struct
+import threading
 from pathlib import Path
-from typing import Any, Literal
+from typing import Annotated, Any, BinaryIO, Literal
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
 
 
 def get_socket_path() -> Path:
@@ -40,6 +44,11 @@ class GetStatusRequest(BaseModel):
     type: Literal["get_status"] = "get_status"
 
 
+class GetSessionInfoRequest(BaseModel):
+    type: Literal["get_session_info"] = "get_session_info"
+    name: str
+
+
 class QuerySessionRequest(BaseModel):
     type: Literal["query_session"] = "query_session"
     name: str
@@ -51,6 +60,7 @@ ControlRequest = (
     | CloseSessionRequest
     | ListSessionsRequest
     | GetStatusRequest
+    | GetSessionInfoRequest
     | QuerySessionRequest
 )
 
@@ -80,6 +90,11 @@ class SessionListResponse(BaseModel):
     sessions: list[SessionInfoResponse]
 
 
+class SessionDetailResponse(BaseModel):
+    type: Literal["session_info"] = "session_info"
+    session: SessionInfoResponse
+
+
 class StatusResponse(BaseModel):
     type: Literal["status"] = "status"
     running: bool = True
@@ -89,27 +104,78 @@ class StatusResponse(BaseModel):
     connected_clients: int
 
 
-ControlResponse = SuccessResponse | ErrorResponse | SessionListResponse | StatusResponse
+ControlResponse = (
+    SuccessResponse | ErrorResponse | SessionListResponse | SessionDetailResponse | StatusResponse
+)
+
+
+# Discriminated on "type", like the WebSocket protocol's adapters
+_CONTROL_REQUEST_ADAPTER: TypeAdapter[ControlRequest] = TypeAdapter(
+    Annotated[ControlRequest, Field(discriminator="type")]
+)
+_CONTROL_RESPONSE_ADAPTER: TypeAdapter[ControlResponse] = TypeAdapter(
+    Annotated[ControlResponse, Field(discriminator="type")]
+)
+
 
+def _unknown_type(e: ValidationError) -> str | None:
+    """Return the message type if validation failed on an unknown tag, else raise."""
+    error = e.errors()[0]
+    if error["type"] not in ("union_tag_invalid", "union_tag_not_found"):
+        raise e
+    return error["input"].get("type") if isinstance(error["input"], dict) else None
 
-def parse_control_request(raw: str) -> ControlRequest:
+
+def parse_control_request(raw: str | bytes) -> ControlRequest:
     """Parse incoming control request."""
-    data = json.loads(raw)
-    msg_type = data.get("type")
-
-    match msg_type:
-        case "open_session":
-            return OpenSessionRequest.model_validate(data)
-        case "close_session":
-            return CloseSessionRequest.model_validate(data)
-        case "list_sessions":
-            return ListSessionsRequest.model_validate(data)
-        case "get_status":
-            return GetStatusRequest.model_validate(data)
-        case "query_session":
-            return QuerySessionRequest.model_validate(data)
-        case _:
-            raise ValueError(f"Unknown control message type: {msg_type}")
+    # Status pings and list polls carry no fields; the CLI always encodes them
+    # the same way, so answer those from a table without running validation.
+    if (request := _FIELDLESS_REQUESTS.get(raw)) is not None:
+        return request
+    try:
+        return _CONTROL_REQUEST_ADAPTER.validate_json(raw)
+    except ValidationError as e:
+        raise ValueError(f"Unknown control message type: {_unknown_type(e)}") from None
+
+
+# Each message on the control socket is a JSON document behind a 4-byte
+# little-endian length, so readers never scan for delimiters or hit the
+# StreamReader line limit on a large session list.
+_FRAME_HEADER = struct.Struct("<I")
+
+
+def encode_control_frame(message: ControlRequest | ControlResponse) -> bytes:
+    """Serialize a control message to one length-prefixed frame."""
+    payload = message.__pydantic_serializer__.to_json(message)
+    return _FRAME_HEADER.pack(len(payload)) + payload
+
+
+_FIELDLESS_REQUESTS: dict[str | bytes, ControlRequest] = {
+    encode_control_frame(r)[_FRAME_HEADER.size :]: r
+    for r in (ListSessionsRequest(), GetStatusRequest())
+}
+
+
+async def read_control_frame(reader: asyncio.StreamReader) -> bytes | None:
+    """Read one frame's payload, or None if the peer closed between frames."""
+    try:
+        header = await reader.readexactly(_FRAME_HEADER.size)
+    except asyncio.IncompleteReadError as e:
+        if e.partial:
+            raise
+        return None
+    (length,) = _FRAME_HEADER.unpack(header)
+    return await reader.readexactly(length)
+
+
+def _read_frame(reader: BinaryIO) -> bytes:
+    """Blocking counterpart of read_control_frame; returns b"" if the peer closed."""
+    header = reader.read(_FRAME_HEADER.size)
+    if len(header) < _FRAME_HEADER.size:
+        return b""
+    (length,) = _FRAME_HEADER.unpack(header)
+    payload = reader.read(length)
+    return payload if len(payload) == length else b""
 
 
 # === Client Functions ===
@@ -117,58 +183,247 @@ def parse_control_request(raw: str) -> ControlRequest:
 
 async def send_control_request(request: ControlRequest) -> ControlResponse:
     """Send a control request to the daemon and get response."""
+    (response,) = await send_control_requests([request])
+    return response
+
+
+async def send_control_requests(requests: list[ControlRequest]) -> list[ControlResponse]:
+    """Send several control requests over one connection and get their responses in order."""
     socket_path = get_socket_path()
 
     if not socket_path.exists():
-        return ErrorResponse(
-            code="DAEMON_NOT_RUNNING",
-            message="Wormhole daemon is not running. Start it with: wormhole daemon",
-        )
+        return [_daemon_not_running()] * len(requests)
 
     try:
         reader, writer = await asyncio.open_unix_connection(str(socket_path))
 
-        # Send request
-        request_data = request.model_dump_json() + "\n"
-        writer.write(request_data.encode())
+        # Send all requests before reading any response
+        writer.write(b"".join(map(encode_control_frame, requests)))
         await writer.drain()
 
-        # Read response
-        response_data = await reader.readline()
+        responses = []
+        for _ in requests:
+            frame = await read_control_frame(reader)
+            if frame is None:
+                raise ConnectionError("Daemon closed the connection")
+            responses.append(_parse_control_response(frame))
         writer.close()
         await writer.wait_closed()
-
-        # Parse response
-        response_dict = json.loads(response_data.decode())
-        response_type = response_dict.get("type")
-
-        match response_type:
-            case "success":
-                return SuccessResponse.model_validate(response_dict)
-            case "error":
-                return ErrorResponse.model_validate(response_dict)
-            case "session_list":
-                return SessionListResponse.model_validate(response_dict)
-            case "status":
-                return StatusResponse.model_validate(response_dict)
-            case _:
-                return ErrorResponse(
-                    code="INVALID_RESPONSE",
-                    message=f"Unknown response type: {response_type}",
-                )
+        return responses
 
     except ConnectionRefusedError:
-        return ErrorResponse(
-            code="DAEMON_NOT_RUNNING",
-            message="Wormhole daemon is not running. Start it with: wormhole daemon",
-        )
+        return [_daemon_not_running()] * len(requests)
     except Exception as e:
-        return ErrorResponse(
+        error = ErrorResponse(
             code="CONNECTION_ERROR",
             message=f"Failed to connect to daemon: {e}",
         )
+        return [error] * len(requests)
+
+
+def _daemon_not_running() -> ErrorResponse:
+    return ErrorResponse(
+        code="DAEMON_NOT_RUNNING",
+        message="Wormhole daemon is not running. Start it with: wormhole daemon",
+    )
+
+
+def _parse_control_response(response_data: bytes) -> ControlResponse:
+    """Parse one response frame from the daemon."""
+    try:
+        return _CONTROL_RESPONSE_ADAPTER.validate_json(response_data)
+    except ValidationError as e:
+        return ErrorResponse(
+            code="INVALID_RESPONSE",
+            message=f"Unknown response type: {_unknown_type(e)}",
+        )
 
 
 def send_control_request_sync(request: ControlRequest) -> ControlResponse:
-    """Synchronous wrapper for send_control_request."""
-    return asyncio.run(send_control_request(request))
+    """Synchronous counterpart of send_control_request."""
+    return _client.call(request)
+
+
+def send_control_requests_sync(requests: list[ControlRequest]) -> list[ControlResponse]:
+    """Synchronous counterpart of send_control_requests."""
+    return _client.call_many(requests)
+
+
+def daemon_accepting_connections() -> bool:
+    """Check that a daemon is accepting on the control socket, without a request round trip."""
+    return _client.probe()
+
+
+def close_control_connections() -> None:
+    """Close the process-wide control connections, e.g. once the daemon is stopped."""
+    _client.close()
+
+
+# Read-only requests the daemon can safely answer twice
+_RESENDABLE_REQUESTS = (GetStatusRequest, ListSessionsRequest, GetSessionInfoRequest)
+
+
+class _Connection:
+    """One open control socket and its buffered reader."""
+
+    __slots__ = ("sock", "reader")
+
+    def __init__(self, sock: socket.socket) -> None:
+        self.sock = sock
+        self.reader: BinaryIO = sock.makefile("rb")
+
+    def close(self) -> None:
+        self.reader.close()
+        self.sock.close()
+
+
+class ControlClient:
+    """Blocking control socket client that reuses a small pool of connections.
+
+    Each call checks a connection out of the pool, so several threads can talk
+    to the daemon at once while every connection is kept open for reuse. The
+    daemon answers the requests on a connection in order, so a batch can be
+    written in one go and its responses read back in sequence.
+    """
+
+    def __init__(self, size: int = 4) -> None:
+        self._size = size
+        self._idle: queue.SimpleQueue[_Connection] = queue.SimpleQueue()
+        self._open = 0
+        self._lock = threading.Lock()
+
+    def call(self, request: ControlRequest) -> ControlResponse:
+        """Send one request and return its response."""
+        (response,) = self.call_many([request])
+        return response
+
+    def call_many(self, requests: list[ControlRequest]) -> list[ControlResponse]:
+        """Send several requests over one connection and return their responses in order."""
+        if not get_socket_path().exists():
+            self.close()
+            return [_daemon_not_running()] * len(requests)
+
+        payload = b"".join(map(encode_control_frame, requests))
+        resendable = all(isinstance(r, _RESENDABLE_REQUESTS) for r in requests)
+        try:
+            frames = self._exchange(payload, len(requests), resendable)
+            return [_parse_control_response(frame) for frame in frames]
+        except (FileNotFoundError, ConnectionRefusedError):
+            return [_daemon_not_running()] * len(requests)
+        except Exception as e:
+            error = ErrorResponse(
+                code="CONNECTION_ERROR",
+                message=f"Failed to connect to daemon: {e}",
+            )
+            return [error] * len(requests)
+
+    def probe(self) -> bool:
+        """Check that the daemon accepts a connection, keeping it pooled for the next call."""
+        if not get_socket_path().exists():
+            return False
+        try:
+            conn, _ = self._checkout()
+        except OSError:
+            return False
+        try:
+            if hasattr(socket, "SO_PEERCRED"):
+                # Linux: the kernel reports the listening process's credentials
+                creds = conn.sock.getsockopt(
+                    socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i")
+                )
+                pid, _, _ = struct.unpack("3i", creds)
+                return pid > 0
+            return True
+        finally:
+            self._idle.put(conn)
+
+    def close(self) -> None:
+        """Close every idle connection."""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._discard(conn)
+
+    def _exchange(self, payload: bytes, count: int, resendable: bool) -> list[bytes]:
+        """Write payload on a pooled connection and read count response frames.
+
+        A reused connection that turns out to be stale (e.g. the daemon
+        restarted) is dropped and the payload sent again, but only when the
+        daemon cannot have acted on it: the first write was refused, or the
+        requests are resendable and the connection closed before any response
+        arrived. Any other failure, or one on a freshly opened connection, is raised.
+        """
+        while True:
+            conn, fresh = self._checkout()
+            try:
+                # A stale connection refuses the first write before accepting any bytes
+                sent = conn.sock.send(payload)
+            except OSError:
+                self._discard(conn)
+                if fresh:
+                    raise
+                continue
+
+            try:
+                if sent < len(payload):
+                    conn.sock.sendall(memoryview(payload)[sent:])
+                first = _read_frame(conn.reader)
+            except (BrokenPipeError, ConnectionResetError):
+                first = b""
+            except OSError:
+                self._discard(conn)
+                raise
+            if not first:
+                self._discard(conn)
+                if fresh or not resendable:
+                    raise ConnectionError("Daemon closed the connection")
+                continue
+
+            try:
+                frames = [first, *(_read_frame(conn.reader) for _ in range(count - 1))]
+            except OSError:
+                self._discard(conn)
+                raise
+            if all(frames):
+                self._idle.put(conn)
+                return frames
+            self._discard(conn)
+            raise ConnectionError("Daemon closed the connection")
+
+    def _checkout(self) -> tuple[_Connection, bool]:
+        """Take an idle connection, opening one if the pool has room, else wait for one.
+
+        Returns the connection and whether it was just opened.
+        """
+        try:
+            return self._idle.get_nowait(), False
+        except queue.Empty:
+            pass
+        with self._lock:
+            can_open = self._open < self._size
+            if can_open:
+                self._open += 1
+        if not can_open:
+            return self._idle.get(), False
+
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(str(get_socket_path()))
+        except OSError:
+            sock.close()
+            with self._lock:
+                self._open -= 1
+            raise
+        return _Connection(sock), True
+
+    def _discard(self, conn: _Connection) -> None:
+        conn.close()
+        with self._lock:
+            self._open -= 1
+
+
+# Shared by the module-level sync helpers for the life of the process
+_client = ControlClient()
+atexit.register(_client.close)
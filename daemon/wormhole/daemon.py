@@ -6,25 +6,32 @@ import asyncio
 import logging
 import os
 import socket
+from collections import deque
+from collections.abc import Awaitable, Callable
 from pathlib import Path
 from typing import Any
 
+import websockets
 import websockets.exceptions
 
 from wormhole.control import (
     CloseSessionRequest,
     ControlRequest,
     ErrorResponse,
+    GetSessionInfoRequest,
     GetStatusRequest,
     ListSessionsRequest,
     OpenSessionRequest,
     QuerySessionRequest,
+    SessionDetailResponse,
     SessionInfoResponse,
     SessionListResponse,
     StatusResponse,
     SuccessResponse,
+    encode_control_frame,
     get_socket_path,
     parse_control_request,
+    read_control_frame,
 )
 from wormhole.discovery import DiscoveryAdvertiser
 from wormhole.persistence import (
@@ -34,18 +41,91 @@ from wormhole.persistence import (
 )
 from wormhole.protocol import (
     ClientMessage,
+    ControlMessage,
     ErrorMessage,
     EventMessage,
-    PendingPermissionInfo,
+    HelloMessage,
+    InputMessage,
+    PermissionRequestMessage,
+    PermissionResponseMessage,
     ServerMessage,
     SessionInfo,
-    WelcomeMessage,
+    SubscribeMessage,
+    SyncMessage,
+    SyncResponseMessage,
+    encode_event,
+    encode_message,
+    encode_session_infos,
+    encode_welcome_prefix,
     parse_client_message,
 )
 from wormhole.session import WormholeSession
 
 logger = logging.getLogger(__name__)
 
+# Frames a slow client may have queued before it is disconnected
+CLIENT_QUEUE_SIZE = 1024
+
+# "Try again later": the client fell behind and should reconnect
+_CLOSE_CODE_OVERFLOW = 1013
+
+
+class ClientOutbox:
+    """Bounded per-client send queue, drained by the client's own writer task.
+
+    A client whose queue fills up is closed rather than having frames dropped:
+    the phone only syncs when it connects, so a dropped event would leave a
+    permanent hole in its transcript. On reconnect it syncs what it missed.
+    """
+
+    __slots__ = ("websocket", "maxsize", "overflowed", "_frames", "_ready")
+
+    def __init__(self, websocket: Any, maxsize: int = CLIENT_QUEUE_SIZE) -> None:
+        self.websocket = websocket
+        self.maxsize = maxsize
+        self.overflowed = False
+        self._frames: deque[bytes] = deque()
+        self._ready = asyncio.Event()
+
+    def put(self, data: bytes) -> None:
+        """Queue a frame without waiting for the client."""
+        if self.overflowed:
+            return
+        if len(self._frames) >= self.maxsize:
+            self.overflowed = True
+            self._frames.clear()
+        else:
+            self._frames.append(data)
+        self._ready.set()
+
+    async def run(self) -> None:
+        """Send queued frames in order until the queue overflows, then close the client.
+
+        Returns after closing; a failed send raises.
+        """
+        while True:
+            await self._ready.wait()
+            self._ready.clear()
+            while self._frames:
+                await self.websocket.send(self._frames.popleft())
+            if self.overflowed:
+                logger.warning(
+                    f"Client fell {self.maxsize} frames behind; closing it so it resyncs"
+                )
+                await self.websocket.close(_CLOSE_CODE_OVERFLOW, "Client too slow")
+                return
+
+
+def _session_info_response(session: WormholeSession) -> SessionInfoResponse:
+    """Summarize a session for the control socket."""
+    return SessionInfoResponse(
+        name=session.name,
+        directory=str(session.directory),
+        state=session.state.value,
+        claude_session_id=session.claude_session_id,
+        cost_usd=session.cost_usd,
+    )
+
 
 class WormholeDaemon:
     """Main daemon managing sessions and WebSocket connections."""
@@ -62,15 +142,45 @@ class WormholeDaemon:
         self.sessions: dict[str, WormholeSession] = {}
         self.directory_to_session: dict[Path, str] = {}
         self._clients: set[Any] = set()  # WebSocket connections
+        # Per-client outbox and the writer task draining it
+        self._outboxes: dict[Any, tuple[ClientOutbox, asyncio.Task[None]]] = {}
+        # Subscription index: session name -> clients, plus clients subscribed to "*"
+        self._session_subscribers: dict[str, set[Any]] = {}
+        self._wildcard_subscribers: set[Any] = set()
+        # Everything in the welcome handshake except the session list is fixed
+        self._welcome_prefix = encode_welcome_prefix("0.1.0", socket.gethostname())
+        # Pending permission request_id -> name of the session that asked
+        self._permission_sessions: dict[str, str] = {}
+        # Last welcome frame sent; None once a session is added, removed or changed
+        self._welcome_cache: bytes | None = None
+        # Client message type -> handler, so dispatch is one dict lookup
+        self._message_handlers: dict[type, Callable[[Any, Any, set[str]], Awaitable[None]]] = {
+            HelloMessage: self._on_hello,
+            SubscribeMessage: self._on_subscribe,
+            InputMessage: self._on_input,
+            PermissionResponseMessage: self._on_permission_response,
+            ControlMessage: self._on_control,
+            SyncMessage: self._on_sync,
+        }
+        # Control request type -> handler, dispatched the same way
+        self._control_handlers: dict[type, Callable[[Any], Awaitable[Any]]] = {
+            OpenSessionRequest: self._handle_open_session,
+            CloseSessionRequest: self._handle_close_session,
+            ListSessionsRequest: self._handle_list_sessions,
+            GetStatusRequest: self._handle_get_status,
+            GetSessionInfoRequest: self._handle_get_session_info,
+            QuerySessionRequest: self._handle_query_session,
+        }
         self._control_server: asyncio.Server | None = None
         self._discovery: DiscoveryAdvertiser | None = None
         self._persistence = session_persistence or SessionPersistence()
         self._event_persistence = event_persistence or EventPersistence()
+        # Session updates waiting for the background flush, latest per name
+        self._pending_persists: dict[str, PersistedSession] = {}
+        self._persist_task: asyncio.Task[None] | None = None
 
     async def run(self) -> None:
         """Run the daemon."""
-        import websockets
-
         logger.info(
             "Starting Wormhole daemon",
             extra={"port": self.port, "discovery": self.enable_discovery},
@@ -94,6 +204,9 @@ class WormholeDaemon:
             self.port,
             ping_interval=30,  # Send ping every 30 seconds
             ping_timeout=60,   # Wait 60 seconds for pong before closing
+            compression=None,  # Events are small and frequent; deflate costs more than it saves
+            max_size=16 * 2**20,  # Phones may send large prompts or pasted files
+            write_limit=2**20,  # Let a burst of events buffer before send() waits
         ):
             logger.info(
                 "Wormhole daemon ready",
@@ -126,27 +239,57 @@ class WormholeDaemon:
                 directory = Path(p.directory)
                 if not directory.exists():
                     logger.warning(f"Skipping session {p.name}: directory does not exist")
-                    self._persistence.remove_session(p.name)
+                    await self._remove_persisted_session(p.name)
                     continue
 
                 session = self.create_session(name=p.name, directory=directory)
                 session.claude_session_id = p.claude_session_id
                 session.cost_usd = p.cost_usd
+                self._invalidate_welcome()
 
                 await session.start()
                 logger.info(f"Restored session: {p.name}")
             except Exception as e:
                 logger.warning(f"Failed to restore session {p.name}: {e}")
-                self._persistence.remove_session(p.name)
+                await self._remove_persisted_session(p.name)
 
     def _persist_session(self, session: WormholeSession) -> None:
-        """Persist a session to disk."""
-        self._persistence.add_session(PersistedSession(
+        """Persist a session to disk.
+
+        Inside the event loop the write is handed to a background flush, so
+        disk latency never stalls event handling; updates to the same session
+        that arrive before the flush runs are coalesced into one line.
+        """
+        self._pending_persists[session.name] = PersistedSession(
             name=session.name,
             directory=str(session.directory),
             claude_session_id=session.claude_session_id,
             cost_usd=session.cost_usd,
-        ))
+        )
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No loop (startup or sync callers): write straight away
+            batch = list(self._pending_persists.values())
+            self._pending_persists.clear()
+            self._persistence.append_updates(batch)
+            return
+        if self._persist_task is None or self._persist_task.done():
+            self._persist_task = loop.create_task(self._flush_persists())
+
+    async def _remove_persisted_session(self, name: str) -> None:
+        """Remove a session from persistence once no queued update can re-add it."""
+        self._pending_persists.pop(name, None)
+        if self._persist_task:
+            await self._persist_task
+        self._persistence.remove_session(name)
+
+    async def _flush_persists(self) -> None:
+        """Write queued session updates in a worker thread until none are left."""
+        while self._pending_persists:
+            batch = list(self._pending_persists.values())
+            self._pending_persists.clear()
+            await asyncio.to_thread(self._persistence.append_updates, batch)
 
     async def _start_control_socket(self) -> None:
         """Start the Unix control socket server."""
@@ -171,6 +314,9 @@ class WormholeDaemon:
         # Persist all sessions before shutdown (for restoration on restart)
         for session in self.sessions.values():
             self._persist_session(session)
+        if self._persist_task:
+            await self._persist_task
+        await asyncio.to_thread(self._persistence.compact)
         logger.info(f"Persisted {len(self.sessions)} sessions for restart")
 
         # Stop discovery
@@ -198,20 +344,21 @@ class WormholeDaemon:
         reader: asyncio.StreamReader,
         writer: asyncio.StreamWriter,
     ) -> None:
-        """Handle a control socket connection."""
-        try:
-            data = await reader.readline()
-            if not data:
-                return
+        """Handle a control socket connection.
 
-            request = parse_control_request(data.decode().strip())
-            response = await self._handle_control_request(request)
+        A client may pipeline several requests, one per frame; each gets its
+        response in order until the client closes its end.
+        """
+        try:
+            while (data := await read_control_frame(reader)) is not None:
+                request = parse_control_request(data)
+                response = await self._handle_control_request(request)
 
-            writer.write((response.model_dump_json() + "\n").encode())
-            await writer.drain()
+                writer.write(encode_control_frame(response))
+                await writer.drain()
         except Exception as e:
             error = ErrorResponse(code="INTERNAL_ERROR", message=str(e))
-            writer.write((error.model_dump_json() + "\n").encode())
+            writer.write(encode_control_frame(error))
             await writer.drain()
         finally:
             writer.close()
@@ -219,17 +366,7 @@ class WormholeDaemon:
 
     async def _handle_control_request(self, request: ControlRequest) -> Any:
         """Handle a parsed control request."""
-        match request:
-            case OpenSessionRequest():
-                return await self._handle_open_session(request)
-            case CloseSessionRequest():
-                return await self._handle_close_session(request)
-            case ListSessionsRequest():
-                return self._handle_list_sessions()
-            case GetStatusRequest():
-                return self._handle_get_status()
-            case QuerySessionRequest():
-                return await self._handle_query_session(request)
+        return await self._control_handlers[type(request)](request)
 
     async def _handle_open_session(
         self, request: OpenSessionRequest
@@ -269,21 +406,25 @@ class WormholeDaemon:
         await self.close_session(request.name)
         return SuccessResponse(message=f"Session '{request.name}' closed")
 
-    def _handle_list_sessions(self) -> SessionListResponse:
+    async def _handle_list_sessions(self, request: ListSessionsRequest) -> SessionListResponse:
         """Handle list sessions request."""
-        sessions = [
-            SessionInfoResponse(
-                name=s.name,
-                directory=str(s.directory),
-                state=s.state.value,
-                claude_session_id=s.claude_session_id,
-                cost_usd=s.cost_usd,
+        return SessionListResponse(
+            sessions=[_session_info_response(s) for s in self.sessions.values()]
+        )
+
+    async def _handle_get_session_info(
+        self, request: GetSessionInfoRequest
+    ) -> SessionDetailResponse | ErrorResponse:
+        """Handle get session info request."""
+        session = self.sessions.get(request.name)
+        if not session:
+            return ErrorResponse(
+                code="SESSION_NOT_FOUND",
+                message=f"Session not found: {request.name}",
             )
-            for s in self.sessions.values()
-        ]
-        return SessionListResponse(sessions=sessions)
+        return SessionDetailResponse(session=_session_info_response(session))
 
-    def _handle_get_status(self) -> StatusResponse:
+    async def _handle_get_status(self, request: GetStatusRequest) -> StatusResponse:
         """Handle get status request."""
         return StatusResponse(
             running=True,
@@ -336,9 +477,12 @@ class WormholeDaemon:
 
         # Set up persistence callback for session updates
         session.set_persistence_callback(self._persist_session)
+        session.set_change_callback(self._invalidate_welcome)
+        session.set_permission_callback(self._track_permission)
 
         self.sessions[name] = session
         self.directory_to_session[directory] = name
+        self._invalidate_welcome()
 
         # Persist immediately
         self._persist_session(session)
@@ -352,14 +496,18 @@ class WormholeDaemon:
             await session.stop()
             self.directory_to_session.pop(session.directory, None)
             self.sessions.pop(name, None)
+            self._invalidate_welcome()
+            self._permission_sessions = {
+                rid: owner for rid, owner in self._permission_sessions.items() if owner != name
+            }
             # Remove from persistence (user explicitly closed)
-            self._persistence.remove_session(name)
+            await self._remove_persisted_session(name)
             # Clear event history (user explicitly closed)
             self._event_persistence.clear_events(name)
 
     async def _handle_connection(self, websocket: Any) -> None:
         """Handle a new WebSocket connection."""
-        self._clients.add(websocket)
+        self._register_client(websocket)
         subscribed_sessions: set[str] = set()
         remote = getattr(websocket, 'remote_address', None)
         client_info = f"{remote}" if remote else "unknown"
@@ -372,7 +520,7 @@ class WormholeDaemon:
                     await self._handle_message(websocket, msg, subscribed_sessions)
                 except Exception as e:
                     error = ErrorMessage(code="INVALID_MESSAGE", message=str(e))
-                    await websocket.send(error.model_dump_json())
+                    await websocket.send(encode_message(error))
         except websockets.exceptions.ConnectionClosed as e:
             # Expected when clients disconnect (mobile going to background, network loss, etc.)
             logger.debug(
@@ -380,7 +528,36 @@ class WormholeDaemon:
                 extra={"client": client_info, "code": e.code, "reason": e.reason},
             )
         finally:
-            self._clients.discard(websocket)
+            self._drop_client(websocket)
+
+    def _register_client(self, websocket: Any) -> None:
+        """Track a client and start the writer task for its outbox."""
+        self._clients.add(websocket)
+        outbox = ClientOutbox(websocket)
+        self._outboxes[websocket] = (outbox, asyncio.create_task(self._run_outbox(outbox)))
+
+    async def _run_outbox(self, outbox: ClientOutbox) -> None:
+        """Drain a client's outbox, dropping the client once it fails or overflows."""
+        try:
+            await outbox.run()
+        except Exception as e:
+            if not isinstance(e, websockets.exceptions.ConnectionClosed):
+                logger.debug("Client send failed", exc_info=e)
+        # Unregister this writer first so _drop_client doesn't cancel it
+        self._outboxes.pop(outbox.websocket, None)
+        self._drop_client(outbox.websocket)
+
+    def _drop_client(self, websocket: Any) -> None:
+        """Forget a client and all of its subscriptions."""
+        self._clients.discard(websocket)
+        entry = self._outboxes.pop(websocket, None)
+        if entry:
+            entry[1].cancel()
+        self._wildcard_subscribers.discard(websocket)
+        for name, subscribers in list(self._session_subscribers.items()):
+            subscribers.discard(websocket)
+            if not subscribers:
+                del self._session_subscribers[name]
 
     async def _handle_message(
         self,
@@ -389,110 +566,176 @@ class WormholeDaemon:
         subscribed: set[str],
     ) -> None:
         """Handle a parsed client message."""
-        from wormhole.protocol import (
-            ControlMessage,
-            HelloMessage,
-            InputMessage,
-            PermissionResponseMessage,
-            SubscribeMessage,
-            SyncMessage,
-            SyncResponseMessage,
+        await self._message_handlers[type(msg)](websocket, msg, subscribed)
+
+    async def _on_hello(self, websocket: Any, msg: HelloMessage, subscribed: set[str]) -> None:
+        """Reply to a hello with the welcome handshake."""
+        await websocket.send(self._welcome_frame())
+
+    def _welcome_frame(self) -> bytes:
+        """Return the welcome frame, rebuilding it only after a session changed.
+
+        Sessions report changes through _invalidate_welcome, so phones
+        reconnecting in bursts all get the same cached bytes.
+        """
+        if self._welcome_cache is not None:
+            return self._welcome_cache
+
+        sessions = encode_session_infos(
+            [
+                SessionInfo(
+                    name=s.name,
+                    directory=str(s.directory),
+                    state=s.state.value,
+                    claude_session_id=s.claude_session_id,
+                    cost_usd=s.cost_usd,
+                    last_activity=s.last_activity,
+                    pending_permissions=s.get_pending_permission_infos(),
+                )
+                for s in self.sessions.values()
+            ]
         )
+        self._welcome_cache = self._welcome_prefix + sessions + b"}"
+        return self._welcome_cache
 
-        match msg:
-            case HelloMessage():
-                welcome = WelcomeMessage(
-                    server_version="0.1.0",
-                    machine_name=socket.gethostname(),
-                    sessions=[
-                        SessionInfo(
-                            name=s.name,
-                            directory=str(s.directory),
-                            state=s.state.value,
-                            claude_session_id=s.claude_session_id,
-                            cost_usd=s.cost_usd,
-                            last_activity=s.last_activity,
-                            pending_permissions=[
-                                PendingPermissionInfo(
-                                    request_id=p.request_id,
-                                    tool_name=p.tool_name,
-                                    tool_input=p.tool_input,
-                                    session_name=s.name,
-                                    created_at=p.created_at,
-                                )
-                                for p in s.get_pending_permissions()
-                            ],
-                        )
-                        for s in self.sessions.values()
-                    ],
-                )
-                await websocket.send(welcome.model_dump_json())
-
-            case SubscribeMessage():
-                if msg.sessions == "*":
-                    subscribed.update(self.sessions.keys())
-                else:
-                    subscribed.update(msg.sessions)
-
-            case InputMessage():
-                session = self.sessions.get(msg.session)
-                if session:
-                    await session.query(msg.text)
-
-            case PermissionResponseMessage():
-                for session in self.sessions.values():
-                    if session.respond_to_permission(msg.request_id, msg.decision):
-                        break
-
-            case ControlMessage():
-                session = self.sessions.get(msg.session)
-                if session:
-                    match msg.action:
-                        case "interrupt":
-                            await session.interrupt()
-                        case "compact":
-                            await session.query("/compact")
-                        case "clear":
-                            await session.query("/clear")
-                        case "plan":
-                            await session.query("/plan")
-
-            case SyncMessage():
-                session = self.sessions.get(msg.session)
-                if session:
-                    events = session.get_events_since(msg.last_seen_sequence)
-                    response = SyncResponseMessage(
+    def _invalidate_welcome(self) -> None:
+        self._welcome_cache = None
+
+    def _track_permission(self, session: WormholeSession, request_id: str, pending: bool) -> None:
+        """Keep the request_id -> session index in step with the session's pending permissions."""
+        if pending:
+            self._permission_sessions[request_id] = session.name
+        else:
+            self._permission_sessions.pop(request_id, None)
+
+    async def _on_subscribe(
+        self, websocket: Any, msg: SubscribeMessage, subscribed: set[str]
+    ) -> None:
+        """Record which sessions the client wants events for."""
+        if msg.sessions == "*":
+            subscribed.update(self.sessions.keys())
+            # Also covers sessions opened after this point
+            self._wildcard_subscribers.add(websocket)
+        else:
+            subscribed.update(msg.sessions)
+            for name in msg.sessions:
+                self._session_subscribers.setdefault(name, set()).add(websocket)
+
+    async def _on_input(self, websocket: Any, msg: InputMessage, subscribed: set[str]) -> None:
+        """Forward phone input to the session as a query."""
+        session = self.sessions.get(msg.session)
+        if session:
+            await session.query(msg.text)
+
+    async def _on_permission_response(
+        self, websocket: Any, msg: PermissionResponseMessage, subscribed: set[str]
+    ) -> None:
+        """Resolve the pending permission the response is for."""
+        name = self._permission_sessions.get(msg.request_id)
+        session = self.sessions.get(name) if name is not None else None
+        if session and session.respond_to_permission(msg.request_id, msg.decision):
+            return
+        # Not one we saw broadcast; fall back to asking every session
+        for session in self.sessions.values():
+            if session.respond_to_permission(msg.request_id, msg.decision):
+                break
+
+    async def _on_control(self, websocket: Any, msg: ControlMessage, subscribed: set[str]) -> None:
+        """Apply a control action to a session."""
+        session = self.sessions.get(msg.session)
+        if session:
+            match msg.action:
+                case "interrupt":
+                    await session.interrupt()
+                case "compact":
+                    await session.query("/compact")
+                case "clear":
+                    await session.query("/clear")
+                case "plan":
+                    await session.query("/plan")
+
+    async def _on_sync(self, websocket: Any, msg: SyncMessage, subscribed: set[str]) -> None:
+        """Send the events the client missed since its last seen sequence."""
+        session = self.sessions.get(msg.session)
+        if session:
+            events = session.get_events_since(msg.last_seen_sequence)
+            # Every field comes from the session's own buffer, already typed, so
+            # skip validation; a long resync would otherwise validate each event
+            response = SyncResponseMessage.model_construct(
+                session=msg.session,
+                events=[
+                    EventMessage.model_construct(
                         session=msg.session,
-                        events=[
-                            EventMessage(
-                                session=msg.session,
-                                sequence=e.sequence,
-                                timestamp=e.timestamp,
-                                message=e.message,
-                            )
-                            for e in events
-                        ],
-                        pending_permissions=[
-                            PendingPermissionInfo(
-                                request_id=p.request_id,
-                                tool_name=p.tool_name,
-                                tool_input=p.tool_input,
-                                session_name=session.name,
-                                created_at=p.created_at,
-                            )
-                            for p in session.get_pending_permissions()
-                        ],
-                        oldest_available_sequence=session.get_oldest_sequence(),
+                        sequence=e.sequence,
+                        timestamp=e.timestamp,
+                        message=e.message,
                     )
-                    await websocket.send(response.model_dump_json())
+                    for e in events
+                ],
+                pending_permissions=session.get_pending_permission_infos(),
+                oldest_available_sequence=session.get_oldest_sequence(),
+            )
+            await websocket.send(encode_message(response))
+
+    async def _broadcast(self, msg: ServerMessage, backpressure: bool = False) -> None:
+        """Broadcast a message to the clients subscribed to it.
+
+        The message is serialized once and queued on each client's outbox, so a
+        slow client never holds up the session that produced the event; one
+        that falls too far behind is disconnected so it resyncs.
+        With backpressure=True the sends are awaited together instead, and the
+        call returns once every client has taken the frame (or failed).
+        """
+        clients = self._broadcast_targets(msg)
+        if not clients:
+            return
+
+        # Drop sockets the library already reports as closed, so that only a
+        # connection lost mid-send has to surface as an exception
+        closed = [client for client in clients if client.closed]
+        if closed:
+            for client in closed:
+                self._drop_client(client)
+            clients = tuple(client for client in clients if not client.closed)
 
-    async def _broadcast(self, msg: ServerMessage) -> None:
-        """Broadcast a message to all connected clients."""
-        if not self._clients:
+        data = encode_event(msg) if isinstance(msg, EventMessage) else encode_message(msg)
+
+        if backpressure:
+            async with asyncio.TaskGroup() as tg:
+                for client in clients:
+                    tg.create_task(self._send_or_drop(client, data))
             return
 
-        data = msg.model_dump_json()
-        await asyncio.gather(
-            *[client.send(data) for client in self._clients],
-            return_exceptions=True,
-        )
+        for client in clients:
+            entry = self._outboxes.get(client)
+            if entry:
+                entry[0].put(data)
+
+    async def _send_or_drop(self, client: Any, data: bytes) -> None:
+        """Send a frame directly, dropping the client if its connection is gone."""
+        try:
+            await client.send(data)
+        except (websockets.exceptions.ConnectionClosed, OSError):
+            self._drop_client(client)
+
+    def _broadcast_targets(self, msg: ServerMessage) -> tuple[Any, ...]:
+        """Return the clients a broadcast should reach.
+
+        Session-scoped messages go only to that session's subscribers and to
+        "*" subscribers; anything else goes to every connected client.
+        """
+        match msg:
+            case EventMessage() | ErrorMessage():
+                session_name = msg.session
+            case PermissionRequestMessage():
+                session_name = msg.session_name
+            case _:
+                session_name = None
+
+        if session_name is None:
+            return tuple(self._clients)
+
+        subscribers = self._session_subscribers.get(session_name)
+        if not subscribers:
+            return tuple(self._wildcard_subscribers)
+        return tuple(self._wildcard_subscribers | subscribers)
@@ -3,8 +3,11 @@
 from __future__ import annotations
 
 import asyncio
+import fcntl
 import logging
 import socket
+import struct
+from concurrent.futures import ThreadPoolExecutor
 from typing import TYPE_CHECKING
 
 from wormhole.platform import check_mdns_support, is_linux
@@ -14,6 +17,9 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
+# zeroconf calls block on network timeouts; keep them off the default executor
+_ZEROCONF_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="zeroconf")
+
 
 class DiscoveryAdvertiser:
     """Advertise Wormhole service via mDNS/Bonjour."""
@@ -73,19 +79,11 @@ class DiscoveryAdvertiser:
                 },
             )
 
-            # Run registration in thread pool since zeroconf is blocking
-            await asyncio.get_event_loop().run_in_executor(
-                None, self._zeroconf.register_service, self._info
+            # zeroconf is blocking; register and verify in one trip to its thread
+            verified = await asyncio.get_running_loop().run_in_executor(
+                _ZEROCONF_EXECUTOR, _register_and_verify, self._zeroconf, self._info
             )
-
-            # Verify registration succeeded by querying for our own service
-            check_info = await asyncio.get_event_loop().run_in_executor(
-                None,
-                lambda: self._zeroconf.get_service_info(  # type: ignore[union-attr]
-                    self.SERVICE_TYPE, self._info.name  # type: ignore[union-attr]
-                )
-            )
-            if check_info:
+            if verified:
                 logger.info(
                     "mDNS advertisement started and verified",
                     extra={"service_name": self._info.name},
@@ -110,11 +108,8 @@ class DiscoveryAdvertiser:
 
         if self._zeroconf and self._info:
             try:
-                await asyncio.get_event_loop().run_in_executor(
-                    None, self._zeroconf.unregister_service, self._info
-                )
-                await asyncio.get_event_loop().run_in_executor(
-                    None, self._zeroconf.close
+                await asyncio.get_running_loop().run_in_executor(
+                    _ZEROCONF_EXECUTOR, _unregister_and_close, self._zeroconf, self._info
                 )
             except Exception as e:
                 logger.warning("Error stopping mDNS advertisement", exc_info=e)
@@ -126,20 +121,73 @@ class DiscoveryAdvertiser:
 
     def _get_local_ip(self) -> str:
         """Get local IP address for advertising."""
-        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        try:
-            # Connect to external address to determine local IP
-            # This doesn't actually send data
-            s.connect(("8.8.8.8", 80))
-            return s.getsockname()[0]
-        except OSError:
+        ip = _default_route_ipv4() or _interface_ipv4()
+        if ip is None:
             # Fallback to localhost if no network
             logger.warning("Could not determine local IP, using localhost")
             return "127.0.0.1"
-        finally:
-            s.close()
+        return ip
 
     @property
     def is_running(self) -> bool:
         """Check if discovery is running."""
         return self._running
+
+
+def _register_and_verify(zeroconf: Zeroconf, info: ServiceInfo) -> bool:
+    """Register the service, then check it can be found by querying for it."""
+    zeroconf.register_service(info)
+    return zeroconf.get_service_info(info.type, info.name) is not None
+
+
+def _unregister_and_close(zeroconf: Zeroconf, info: ServiceInfo) -> None:
+    """Withdraw the service and shut zeroconf down."""
+    zeroconf.unregister_service(info)
+    zeroconf.close()
+
+
+def _default_route_ipv4() -> str | None:
+    """Return the source address the kernel would use for outbound traffic."""
+    s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        # Connecting a UDP socket only picks a route; no packet is sent
+        s.connect(("8.8.8.8", 80))
+        return s.getsockname()[0]
+    except OSError:
+        return None
+    finally:
+        s.close()
+
+
+# Linux ioctls from <linux/sockios.h>
+_SIOCGIFFLAGS = 0x8913
+_SIOCGIFADDR = 0x8915
+_IFF_UP = 0x1
+_IFF_LOOPBACK = 0x8
+
+
+def _interface_ipv4() -> str | None:
+    """Return the first IPv4 address on an interface that is up (Linux only).
+
+    Used when there is no default route, e.g. on a LAN with no internet
+    access, where mDNS can still reach the phone.
+    """
+    if not is_linux():
+        return None
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+        for _, name in socket.if_nameindex():
+            ifreq = struct.pack("256s", name.encode()[:15])
+            try:
+                (flags,) = struct.unpack_from(
+                    "H", fcntl.ioctl(s.fileno(), _SIOCGIFFLAGS, ifreq), 16
+                )
+                if not flags & _IFF_UP or flags & _IFF_LOOPBACK:
+                    continue
+                addr = fcntl.ioctl(s.fileno(), _SIOCGIFADDR, ifreq)
+            except OSError:
+                continue  # Interface vanished or has no IPv4 address
+            ip = socket.inet_ntoa(addr[20:24])
+            # Link-local addresses break mDNS registration (see start())
+            if not ip.startswith("169.254."):
+                return ip
+    return None
@@ -6,7 +6,7 @@ import json
 import logging
 from datetime import datetime
 from pathlib import Path
-from typing import Any
+from typing import Any, BinaryIO
 
 from pydantic import BaseModel
 
@@ -46,11 +46,27 @@ class PersistedSession(BaseModel):
         )
 
 
+# Once the session update log grows past this many bytes it is folded into the
+# snapshot, so a long-running daemon never has a large log to replay
+DEFAULT_LOG_COMPACT_BYTES = 64 * 1024
+
+
 class SessionPersistence:
-    """Manages session persistence to disk."""
+    """Manages session persistence to disk.
 
-    def __init__(self, path: Path | None = None) -> None:
+    The JSON file at path is a snapshot. Routine updates are appended as one
+    JSON line each to a log beside it, so an update costs one small write
+    instead of a rewrite of every session. Loading replays the log over the
+    snapshot; save_sessions (and so compact) folds the log back in, which
+    append_updates also does once the log passes log_compact_bytes.
+    """
+
+    def __init__(
+        self, path: Path | None = None, log_compact_bytes: int = DEFAULT_LOG_COMPACT_BYTES
+    ) -> None:
         self.path = path or Path.home() / ".local/share/wormhole/sessions.json"
+        self.log_path = self.path.with_suffix(".log")
+        self.log_compact_bytes = log_compact_bytes
 
     def _ensure_dir(self) -> None:
         """Ensure the parent directory exists."""
@@ -58,23 +74,41 @@ class SessionPersistence:
 
     def load_sessions(self) -> list[PersistedSession]:
         """Load all persisted sessions."""
-        if not self.path.exists():
-            return []
-
+        items: list[dict[str, Any]] = []
+        if self.path.exists():
+            try:
+                with open(self.path) as f:
+                    items = json.load(f).get("sessions", [])
+            except Exception as e:
+                logger.error(f"Failed to load sessions from {self.path}: {e}")
+                return []
+        items.extend(self._read_log())
+
+        # Later entries for a name replace earlier ones, keeping first-seen order
+        sessions: dict[str, PersistedSession] = {}
+        for item in items:
+            try:
+                session = PersistedSession.from_dict(item)
+            except Exception as e:
+                logger.warning(f"Failed to load session: {e}")
+                continue
+            sessions[session.name] = session
+        return list(sessions.values())
+
+    def _read_log(self) -> list[dict[str, Any]]:
+        """Read the appended updates, skipping a torn final line."""
         try:
-            with open(self.path) as f:
-                data = json.load(f)
-
-            sessions = []
-            for item in data.get("sessions", []):
-                try:
-                    sessions.append(PersistedSession.from_dict(item))
-                except Exception as e:
-                    logger.warning(f"Failed to load session: {e}")
-            return sessions
-        except Exception as e:
-            logger.error(f"Failed to load sessions from {self.path}: {e}")
+            with open(self.log_path, "rb") as f:
+                lines = f.read().splitlines()
+        except FileNotFoundError:
             return []
+        items = []
+        for line in lines:
+            try:
+                items.append(json.loads(line))
+            except ValueError:
+                logger.warning(f"Skipping unreadable line in {self.log_path}")
+        return items
 
     def save_sessions(self, sessions: list[PersistedSession]) -> None:
         """Save all sessions to disk."""
@@ -86,6 +120,8 @@ class SessionPersistence:
             }
             with open(self.path, "w") as f:
                 json.dump(data, f, indent=2)
+            # Everything in the log is now in the snapshot
+            self.log_path.unlink(missing_ok=True)
             logger.debug(f"Saved {len(sessions)} sessions to {self.path}")
         except Exception as e:
             logger.error(f"Failed to save sessions to {self.path}: {e}")
@@ -102,6 +138,24 @@ class SessionPersistence:
         sessions.append(session)
         self.save_sessions(sessions)
 
+    def append_updates(self, sessions: list[PersistedSession]) -> None:
+        """Record the latest state of some sessions without rewriting the others."""
+        self._ensure_dir()
+        try:
+            with open(self.log_path, "a") as f:
+                f.writelines(json.dumps(s.to_dict()) + "\n" for s in sessions)
+                log_size = f.tell()
+        except Exception as e:
+            logger.error(f"Failed to append session updates to {self.log_path}: {e}")
+            return
+        if log_size > self.log_compact_bytes:
+            self.compact()
+
+    def compact(self) -> None:
+        """Fold the update log into the snapshot."""
+        if self.log_path.exists():
+            self.save_sessions(self.load_sessions())
+
     def remove_session(self, name: str) -> None:
         """Remove a session by name."""
         sessions = self.load_sessions()
@@ -124,6 +178,7 @@ class SessionPersistence:
         """Remove all persisted sessions."""
         if self.path.exists():
             self.path.unlink()
+        self.log_path.unlink(missing_ok=True)
 
 
 class PersistedEvent(BaseModel):
@@ -197,9 +252,11 @@ class EventPersistence:
 
         events = []
         try:
-            with open(event_file) as f:
-                for line in f:
-                    line = line.strip()
+            with open(event_file, "rb") as f:
+                if since_sequence > 0:
+                    f.seek(self._find_offset_after(f, since_sequence))
+                for raw_line in f:
+                    line = raw_line.decode("utf-8").strip()
                     if not line:
                         continue
                     try:
@@ -213,6 +270,34 @@ class EventPersistence:
 
         return events
 
+    @staticmethod
+    def _find_offset_after(f: BinaryIO, since_sequence: int) -> int:
+        """Binary search the event file for where sequences pass since_sequence.
+
+        Sequences are appended in increasing order, so this bisects on byte
+        offsets and parses only O(log n) lines. The returned offset is a line
+        start at or before the first event with sequence > since_sequence;
+        unreadable lines never move it forward.
+        """
+        lo = 0
+        hi = f.seek(0, 2)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            f.seek(mid)
+            if mid:
+                f.readline()  # Skip to the next line boundary
+            start = f.tell()
+            line = f.readline()
+            try:
+                past = not line or json.loads(line)["sequence"] > since_sequence
+            except Exception:
+                past = True
+            if past:
+                hi = mid
+            else:
+                lo = start + len(line)
+        return lo
+
     def get_latest_sequence(self, session_name: str) -> int:
         """Get the latest sequence number for a session."""
         event_file = self._get_event_file(session_name)
@@ -2,12 +2,11 @@
 
 from __future__ import annotations
 
-import json
 import uuid
 from datetime import datetime
-from typing import Any, Literal
+from typing import Annotated, Any, Literal
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
 
 # === Phone → Daemon ===
 
@@ -56,27 +55,23 @@ ClientMessage = (
     | SyncMessage
 )
 
+# Discriminated on "type": pydantic parses the JSON and picks the model in one
+# pass instead of json.loads followed by a second validation walk.
+_CLIENT_MESSAGE_ADAPTER: TypeAdapter[ClientMessage] = TypeAdapter(
+    Annotated[ClientMessage, Field(discriminator="type")]
+)
+
 
-def parse_client_message(raw: str) -> ClientMessage:
+def parse_client_message(raw: str | bytes) -> ClientMessage:
     """Parse incoming WebSocket message from phone."""
-    data = json.loads(raw)
-    msg_type = data.get("type")
-
-    match msg_type:
-        case "hello":
-            return HelloMessage.model_validate(data)
-        case "subscribe":
-            return SubscribeMessage.model_validate(data)
-        case "input":
-            return InputMessage.model_validate(data)
-        case "permission_response":
-            return PermissionResponseMessage.model_validate(data)
-        case "control":
-            return ControlMessage.model_validate(data)
-        case "sync":
-            return SyncMessage.model_validate(data)
-        case _:
-            raise ValueError(f"Unknown message type: {msg_type}")
+    try:
+        return _CLIENT_MESSAGE_ADAPTER.validate_json(raw)
+    except ValidationError as e:
+        error = e.errors()[0]
+        if error["type"] in ("union_tag_invalid", "union_tag_not_found"):
+            msg_type = error["input"].get("type") if isinstance(error["input"], dict) else None
+            raise ValueError(f"Unknown message type: {msg_type}") from None
+        raise
 
 
 # === Daemon → Phone ===
@@ -112,7 +107,7 @@ class EventMessage(BaseModel):
     type: Literal["event"] = "event"
     session: str
     sequence: int
-    timestamp: datetime
+    timestamp: int  # Unix time in nanoseconds
     message: dict[str, Any]
 
 
@@ -147,3 +142,47 @@ ServerMessage = (
     | SyncResponseMessage
     | ErrorMessage
 )
+
+
+# Serializers for the hot send paths. dump_json() yields UTF-8 bytes directly,
+# which the WebSocket layer sends as-is instead of re-encoding a str.
+_EVENT_ADAPTER: TypeAdapter[EventMessage] = TypeAdapter(EventMessage)
+_WELCOME_ADAPTER: TypeAdapter[WelcomeMessage] = TypeAdapter(WelcomeMessage)
+_SESSION_INFOS_ADAPTER: TypeAdapter[list[SessionInfo]] = TypeAdapter(list[SessionInfo])
+_SERVER_MESSAGE_ADAPTER: TypeAdapter[ServerMessage] = TypeAdapter(
+    Annotated[ServerMessage, Field(discriminator="type")]
+)
+
+
+def encode_message(msg: ServerMessage) -> bytes:
+    """Serialize any server message to JSON bytes."""
+    return _SERVER_MESSAGE_ADAPTER.dump_json(msg)
+
+
+def encode_event(event: EventMessage) -> bytes:
+    """Serialize an event message to JSON bytes."""
+    return _EVENT_ADAPTER.dump_json(event)
+
+
+def encode_welcome(welcome: WelcomeMessage) -> bytes:
+    """Serialize a welcome message to JSON bytes."""
+    return _WELCOME_ADAPTER.dump_json(welcome)
+
+
+def encode_welcome_prefix(server_version: str, machine_name: str) -> bytes:
+    """Serialize the static start of a welcome message, up to the sessions value.
+
+    Append encode_session_infos(...) and a closing b"}" to complete it.
+    """
+    empty = WelcomeMessage(server_version=server_version, machine_name=machine_name, sessions=[])
+    return encode_welcome(empty).removesuffix(b"[]}")
+
+
+def encode_session_infos(sessions: list[SessionInfo]) -> bytes:
+    """Serialize a session list to JSON bytes."""
+    return _SESSION_INFOS_ADAPTER.dump_json(sessions)
+
+
+def timestamp_ns(dt: datetime) -> int:
+    """Convert a datetime to the integer Unix nanoseconds used on the wire."""
+    return round(dt.timestamp() * 1_000_000) * 1000
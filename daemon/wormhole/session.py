@@ -3,8 +3,13 @@
 from __future__ import annotations
 
 import asyncio
+import itertools
+import json
+import logging
+import shutil
 import uuid
 from collections import deque
+from dataclasses import asdict, dataclass, is_dataclass
 from datetime import datetime
 from enum import Enum
 from pathlib import Path
@@ -16,7 +21,15 @@ if TYPE_CHECKING:
     from claude_agent_sdk import ClaudeSDKClient, ToolPermissionContext
 
 from wormhole.persistence import EventPersistence, PersistedEvent
-from wormhole.protocol import EventMessage, PermissionRequestMessage
+from wormhole.protocol import (
+    ErrorMessage,
+    EventMessage,
+    PendingPermissionInfo,
+    PermissionRequestMessage,
+    timestamp_ns,
+)
+
+logger = logging.getLogger(__name__)
 
 
 class SessionState(str, Enum):
@@ -26,16 +39,21 @@ class SessionState(str, Enum):
     ERROR = "error"
 
 
-class BufferedEvent(BaseModel):
+@dataclass(frozen=True, slots=True)
+class BufferedEvent:
     sequence: int
-    timestamp: datetime
+    timestamp: int  # Unix time in nanoseconds
     message: dict[str, Any]
 
     def estimated_size(self) -> int:
         """Estimate the size of this event in bytes."""
-        import json
-        # Rough estimate: JSON serialized size + overhead
-        return len(json.dumps(self.message)) + 100
+        return _estimate_event_size(self.message)
+
+
+def _estimate_event_size(message: dict[str, Any]) -> int:
+    """Estimate the buffered size of an event message in bytes."""
+    # Rough estimate: JSON serialized size + overhead
+    return len(json.dumps(message)) + 100
 
 
 class PendingPermission(BaseModel):
@@ -46,6 +64,33 @@ class PendingPermission(BaseModel):
     created_at: datetime
 
 
+class _PermissionSlot:
+    """A pending permission: the future the SDK callback awaits plus its details.
+
+    info is the wire form of the details, built the first time a client needs it.
+    """
+
+    __slots__ = ("future", "details", "info")
+
+    def __init__(self, future: asyncio.Future[str], details: PendingPermission) -> None:
+        self.future = future
+        self.details = details
+        self.info: PendingPermissionInfo | None = None
+
+
+_DENY_RESULT: Any = None
+
+
+def _deny_result() -> Any:
+    """Return the shared PermissionResultDeny; it carries no per-request data."""
+    global _DENY_RESULT
+    if _DENY_RESULT is None:
+        from claude_agent_sdk import PermissionResultDeny
+
+        _DENY_RESULT = PermissionResultDeny(message="User denied", interrupt=False)
+    return _DENY_RESULT
+
+
 # Default 2MB buffer size
 DEFAULT_BUFFER_SIZE_BYTES = 2 * 1024 * 1024
 
@@ -64,17 +109,23 @@ class WormholeSession:
         self.directory = directory
         self.buffer_size_bytes = buffer_size_bytes
 
+        # Callback to report changes to what the session list shows
+        self._change_callback: Any = None
+
         self.state = SessionState.IDLE
         self.claude_session_id: str | None = None
         self.cost_usd: float = 0.0
         self.last_activity: datetime | None = None
 
         self._client: ClaudeSDKClient | None = None
-        self._event_buffer: deque[BufferedEvent] = deque()
+        # In-memory event buffer, stored as parallel columns. Sequences are
+        # contiguous and the newest is always self._sequence, so they are not stored.
+        self._event_timestamps: deque[int] = deque()
+        self._event_messages: deque[dict[str, Any]] = deque()
+        self._event_sizes: deque[int] = deque()
         self._event_buffer_size: int = 0  # Current buffer size in bytes
         self._sequence: int = 0
-        self._pending_permissions: dict[str, asyncio.Future[str]] = {}
-        self._pending_permission_details: dict[str, PendingPermission] = {}
+        self._pending_permissions: dict[str, _PermissionSlot] = {}
 
         # Event persistence for full history
         self._event_persistence = event_persistence or EventPersistence()
@@ -85,6 +136,8 @@ class WormholeSession:
         self._broadcast_callback: Any = None
         # Callback to persist session state changes
         self._persistence_callback: Any = None
+        # Callback told when a permission request starts and stops waiting for a decision
+        self._permission_callback: Any = None
 
         # Store original options for restart
         self._startup_options: dict[str, Any] = {}
@@ -97,14 +150,31 @@ class WormholeSession:
         """Set callback for persisting session state changes."""
         self._persistence_callback = callback
 
+    def set_permission_callback(self, callback: Any) -> None:
+        """Set callback(session, request_id, pending) for permission open/close."""
+        self._permission_callback = callback
+
+    def set_change_callback(self, callback: Any) -> None:
+        """Set callback for changes to the state, activity, cost or pending permissions."""
+        self._change_callback = callback
+
+    def _changed(self) -> None:
+        if self._change_callback:
+            self._change_callback()
+
+    @property
+    def state(self) -> SessionState:
+        return self._state
+
+    @state.setter
+    def state(self, state: SessionState) -> None:
+        self._state = state
+        self._changed()
+
     async def start(self, options: dict[str, Any] | None = None) -> None:
         """Start the Claude SDK client."""
-        import logging
-        import shutil
-
         from claude_agent_sdk import ClaudeAgentOptions, ClaudeSDKClient
 
-        logger = logging.getLogger(__name__)
         options = dict(options) if options else {}  # Make a copy
 
         # Store original options for restart (only on first call)
@@ -194,11 +264,9 @@ class WormholeSession:
                 await self._client.disconnect()
             except AttributeError as e:
                 # Handle SDK internal errors (e.g., TaskGroup._exceptions missing)
-                import logging
-                logging.getLogger(__name__).debug(f"SDK disconnect error (ignored): {e}")
+                logger.debug(f"SDK disconnect error (ignored): {e}")
             except Exception as e:
-                import logging
-                logging.getLogger(__name__).warning(f"Error disconnecting SDK client: {e}")
+                logger.warning(f"Error disconnecting SDK client: {e}")
             self._client = None
         self.state = SessionState.IDLE
 
@@ -231,9 +299,6 @@ class WormholeSession:
 
     async def _restart(self) -> None:
         """Restart the Claude SDK client, resuming the existing Claude session if possible."""
-        import logging
-
-        logger = logging.getLogger(__name__)
         logger.info(f"Restarting session {self.name}")
 
         # Disconnect old client if any
@@ -263,9 +328,9 @@ class WormholeSession:
 
     def respond_to_permission(self, request_id: str, decision: str) -> bool:
         """Respond to a pending permission request."""
-        future = self._pending_permissions.get(request_id)
-        if future and not future.done():
-            future.set_result(decision)
+        slot = self._pending_permissions.get(request_id)
+        if slot and not slot.future.done():
+            slot.future.set_result(decision)
             return True
         return False
 
@@ -274,18 +339,29 @@ class WormholeSession:
 
         First checks in-memory buffer, then falls back to persisted events.
         """
-        # Check in-memory buffer first
-        buffered = [e for e in self._event_buffer if e.sequence > sequence]
-        # If we have buffered events and the first one is what they need, use buffer
-        if buffered and buffered[0].sequence == sequence + 1:
-            return buffered
+        # The wanted events are the tail of the buffer if it still holds sequence + 1
+        buffered = len(self._event_messages)
+        count = self._sequence - sequence
+        if buffered and count <= buffered:
+            if count <= 0:
+                return []
+            start = buffered - count
+            return [
+                BufferedEvent(seq, ts, msg)
+                for seq, ts, msg in zip(
+                    range(sequence + 1, self._sequence + 1),
+                    itertools.islice(self._event_timestamps, start, None),
+                    itertools.islice(self._event_messages, start, None),
+                    strict=True,
+                )
+            ]
 
         # Fall back to persisted events
         persisted = self._event_persistence.load_events(self.name, since_sequence=sequence)
         return [
             BufferedEvent(
                 sequence=e.sequence,
-                timestamp=e.timestamp,
+                timestamp=timestamp_ns(e.timestamp),
                 message=e.message,
             )
             for e in persisted
@@ -297,7 +373,22 @@ class WormholeSession:
 
     def get_pending_permissions(self) -> list[PendingPermission]:
         """Get all pending permission requests (for reconnection recovery)."""
-        return list(self._pending_permission_details.values())
+        return [slot.details for slot in self._pending_permissions.values()]
+
+    def get_pending_permission_infos(self) -> list[PendingPermissionInfo]:
+        """Get pending permissions as sent to clients, building each one only once."""
+        infos = []
+        for slot in self._pending_permissions.values():
+            if slot.info is None:
+                slot.info = PendingPermissionInfo(
+                    request_id=slot.details.request_id,
+                    tool_name=slot.details.tool_name,
+                    tool_input=slot.details.tool_input,
+                    session_name=self.name,
+                    created_at=slot.details.created_at,
+                )
+            infos.append(slot.info)
+        return infos
 
     async def _permission_handler(
         self,
@@ -306,22 +397,25 @@ class WormholeSession:
         context: ToolPermissionContext,
     ) -> Any:  # Returns PermissionResultAllow | PermissionResultDeny
         """Handle permission request from SDK."""
-        from claude_agent_sdk import PermissionResultAllow, PermissionResultDeny
+        from claude_agent_sdk import PermissionResultAllow
 
         self.state = SessionState.AWAITING_APPROVAL
         request_id = str(uuid.uuid4())
 
-        # Create future for response
-        future: asyncio.Future[str] = asyncio.get_event_loop().create_future()
-        self._pending_permissions[request_id] = future
-
-        # Store permission details for reconnection recovery
-        self._pending_permission_details[request_id] = PendingPermission(
-            request_id=request_id,
-            tool_name=tool_name,
-            tool_input=input_data,
-            created_at=datetime.now(),
+        # Future for the response, stored with the details kept for reconnection recovery
+        future: asyncio.Future[str] = asyncio.get_running_loop().create_future()
+        self._pending_permissions[request_id] = _PermissionSlot(
+            future,
+            PendingPermission(
+                request_id=request_id,
+                tool_name=tool_name,
+                tool_input=input_data,
+                created_at=datetime.now(),
+            ),
         )
+        self._changed()
+        if self._permission_callback:
+            self._permission_callback(self, request_id, True)
 
         # Broadcast permission request
         if self._broadcast_callback:
@@ -337,21 +431,19 @@ class WormholeSession:
         try:
             decision = await future
         finally:
+            # Runs however the wait ends, including cancellation by the SDK
             self._pending_permissions.pop(request_id, None)
-            self._pending_permission_details.pop(request_id, None)
-            self.state = SessionState.WORKING
+            if self._permission_callback:
+                self._permission_callback(self, request_id, False)
+            self.state = SessionState.WORKING  # Also reports the permission as gone
 
         if decision == "allow":
             return PermissionResultAllow(updated_input=input_data)
         else:
-            return PermissionResultDeny(message="User denied", interrupt=False)
+            return _deny_result()
 
     async def _receive_responses(self) -> None:
         """Receive and process responses from Claude."""
-        import logging
-
-        logger = logging.getLogger(__name__)
-
         if not self._client:
             return
 
@@ -364,7 +456,6 @@ class WormholeSession:
 
             # Broadcast error event
             if self._broadcast_callback:
-                from wormhole.protocol import ErrorMessage
                 error_msg = ErrorMessage(
                     code="SDK_ERROR",
                     message=f"Session error: {str(e)}",
@@ -380,10 +471,9 @@ class WormholeSession:
 
     async def _handle_sdk_message(self, message: Any) -> None:
         """Process a message from the SDK."""
-        from dataclasses import asdict, is_dataclass
-
         self._sequence += 1
         now = datetime.now()
+        now_ns = timestamp_ns(now)
         self.last_activity = now
 
         # Convert SDK message to dict[str, Any]
@@ -402,13 +492,10 @@ class WormholeSession:
                 msg_dict = {"raw": str(message)}
 
         # Buffer event with size-based eviction
-        event = BufferedEvent(
-            sequence=self._sequence,
-            timestamp=now,
-            message=msg_dict,
-        )
-        event_size = event.estimated_size()
-        self._event_buffer.append(event)
+        event_size = _estimate_event_size(msg_dict)
+        self._event_timestamps.append(now_ns)
+        self._event_messages.append(msg_dict)
+        self._event_sizes.append(event_size)
         self._event_buffer_size += event_size
 
         # Persist event to disk for full history
@@ -423,9 +510,10 @@ class WormholeSession:
 
         # Evict old events from memory buffer if exceeds size limit
         # (persisted events are kept on disk)
-        while self._event_buffer_size > self.buffer_size_bytes and self._event_buffer:
-            old_event = self._event_buffer.popleft()
-            self._event_buffer_size -= old_event.estimated_size()
+        while self._event_buffer_size > self.buffer_size_bytes and self._event_messages:
+            self._event_timestamps.popleft()
+            self._event_messages.popleft()
+            self._event_buffer_size -= self._event_sizes.popleft()
 
         # Capture session ID from init message
         # SDK SystemMessage has: subtype, data where data contains session_id
@@ -445,12 +533,15 @@ class WormholeSession:
             if self._persistence_callback:
                 self._persistence_callback(self)
 
+        # Activity time, and possibly the session ID and cost, changed above
+        self._changed()
+
         # Broadcast to connected clients
         if self._broadcast_callback:
             broadcast_msg = EventMessage(
                 session=self.name,
                 sequence=self._sequence,
-                timestamp=now,
+                timestamp=now_ns,
                 message=msg_dict,
             )
             await self._broadcast_callback(broadcast_msg)
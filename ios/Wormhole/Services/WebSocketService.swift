@@ -35,6 +35,12 @@ final class WebSocketService: @unchecked Sendable {
 
         decoder.dateDecodingStrategy = .custom { decoder in
             let container = try decoder.singleValueContainer()
+
+            // Event timestamps are integer Unix nanoseconds
+            if let nanoseconds = try? container.decode(Int64.self) {
+                return Date(timeIntervalSince1970: Double(nanoseconds) / 1_000_000_000)
+            }
+
             let dateString = try container.decode(String.self)
 
             // Try with fractional seconds first (local time)